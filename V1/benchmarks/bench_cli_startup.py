@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark CLI startup: time from launching main.py to its first block
+Runs a hello-world mix repeatedly and reports time-to-first-block (when
+"Running block 1" is logged) and total wall time.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HELLO_MIX = """#lang: bash
+echo "hello"
+"""
+
+def run_once(mix_file, extra_args):
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'main.py', *extra_args, mix_file], cwd=PROJECT_ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    first_block = None
+    for line in process.stderr:
+        if first_block is None and 'Running block 1' in line:
+            first_block = time.perf_counter() - start
+    process.wait()
+    return first_block, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='CLI startup benchmark')
+    parser.add_argument('--runs', type=int, default=10, help='Runs per configuration')
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.mix', delete=False) as f:
+        f.write(HELLO_MIX)
+        mix_file = f.name
+
+    print("🚀 CLI startup benchmark (hello-world bash mix)")
+    print("=" * 70)
+    try:
+        for label, extra_args in [('default config', []), ('--no-docker', ['--no-docker'])]:
+            runs = [run_once(mix_file, extra_args) for _ in range(args.runs)]
+            first = [run[0] for run in runs if run[0] is not None]
+            total = [run[1] for run in runs]
+            if not first:
+                print(f"  {label:<16} main.py never reached block 1")
+                continue
+            print(f"  {label:<16} first block p50 {statistics.median(first) * 1000:7.1f} ms"
+                  f"   total p50 {statistics.median(total) * 1000:7.1f} ms")
+    finally:
+        os.unlink(mix_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-block latency of the three execution modes
+Runs the same block locally, in the namespace sandbox and in Docker
+(Docker is skipped when the daemon is not reachable).
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runners.plugin_manager import PluginManager
+from runners.sandbox import Sandbox
+
+BLOCKS = {
+    'python': ('total = sum(range(1000))\nprint(total)', {'offset': 1}, ['total']),
+    'bash': ('echo "hello from bash"', {}, []),
+    'cpp': ('int total = 0;\nfor (int i = 0; i < 1000; i++) total += i;\nstd::cout << total << std::endl;', {}, []),
+}
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"  {label:<10} mean {statistics.mean(timings) * 1000:8.1f} ms"
+          f"   p50 {statistics.median(timings) * 1000:8.1f} ms   p95 {p95 * 1000:8.1f} ms")
+
+def time_runs(func, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+        if not result.get('success', result.get('return_code') == 0):
+            print(f"    run failed: {result.get('error', '')[:200]}")
+            return None
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='Execution mode latency benchmark')
+    parser.add_argument('--languages', nargs='+', default=['python', 'bash'], choices=sorted(BLOCKS))
+    parser.add_argument('--runs', type=int, default=20, help='Runs per mode')
+    args = parser.parse_args()
+
+    print("⏱️  Execution mode benchmark")
+    print("=" * 70)
+    sandbox_ok = Sandbox.is_available()
+
+    docker_runner = None
+    try:
+        from runners.docker_runner import DockerRunner
+        docker_runner = DockerRunner({'docker_pool': {'enabled': False}})
+        if not docker_runner.get_docker_status()['available']:
+            docker_runner = None
+    except ImportError:
+        pass
+
+    for language in args.languages:
+        code, import_data, export_vars = BLOCKS[language]
+        print(f"\n{language} ({args.runs} runs)")
+        for mode in ['local', 'sandbox']:
+            if mode == 'sandbox' and not sandbox_ok:
+                print("  sandbox    skipped (unprivileged namespaces unavailable)")
+                continue
+            manager = PluginManager({'execution_modes': {language: mode}})
+            runner = manager.get_runner(language)
+            timings = time_runs(lambda: runner.run(code, import_data, export_vars), args.runs)
+            if timings:
+                report(mode, timings)
+
+        if docker_runner is None:
+            print("  docker     skipped (Docker not available)")
+        else:
+            timings = time_runs(lambda: docker_runner.run_code(code, language, {'timeout_seconds': 30},
+                                                               import_data, export_vars), args.runs)
+            if timings:
+                report('docker', timings)
+
+    if docker_runner is not None:
+        docker_runner.cleanup_containers()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark ProjectDatabase save/get/list throughput under concurrent threads
+Compares a connection per call in the default rollback-journal mode (the
+previous behaviour) with the pooled WAL-mode connections.
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.project_db import ProjectDatabase
+
+SAMPLE_MIX = """#lang: python
+#export: total
+total = sum(range(100))
+
+#lang: bash
+#import: total
+echo "$total"
+"""
+
+class LegacyConnections:
+    """Opens a fresh connection for every call, like the pre-pool code"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    @contextmanager
+    def connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def close(self):
+        pass
+
+def run_threads(threads, ops, func):
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(ops):
+                func(n, i)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        print(f"    {len(errors)} threads failed, first error: {errors[0]}")
+    return threads * ops / elapsed
+
+def bench(label, make_db, threads, ops):
+    db = make_db()
+    ids = []
+    lock = threading.Lock()
+
+    def save(n, i):
+        project_id = db.save_project(f"project {n}-{i}", "benchmark", f"author{n % 4}", SAMPLE_MIX,
+                                     tags=["bench", f"t{i % 5}"], is_public=True)
+        with lock:
+            ids.append(project_id)
+
+    save_rate = run_threads(threads, ops, save)
+    get_rate = run_threads(threads, ops, lambda n, i: db.get_project(ids[(n * ops + i) % len(ids)]))
+    list_rate = run_threads(threads, ops, lambda n, i: db.list_projects(author=f"author{n % 4}", limit=20))
+    db.close()
+    print(f"  {label:<22} save {save_rate:9.0f}/s   get {get_rate:9.0f}/s   list {list_rate:9.0f}/s")
+
+def main():
+    parser = argparse.ArgumentParser(description='ProjectDatabase throughput benchmark')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8], help='Thread counts')
+    parser.add_argument('--ops', type=int, default=200, help='Operations per thread per phase')
+    parser.add_argument('--pool-size', type=int, default=4, help='Pooled connections')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='polyrun-db-bench-')
+    print("🗄️  ProjectDatabase benchmark")
+    print("=" * 70)
+    try:
+        for threads in args.threads:
+            print(f"\n{threads} threads x {args.ops} ops")
+
+            def legacy():
+                db = ProjectDatabase(os.path.join(workdir, f'legacy-{threads}.db'))
+                db.pool.close()
+                db.pool = LegacyConnections(db.db_path)
+                return db
+
+            bench("connect per call", legacy, threads, args.ops)
+            bench(f"pooled WAL ({args.pool_size})",
+                  lambda: ProjectDatabase(os.path.join(workdir, f'pooled-{threads}.db'), pool_size=args.pool_size),
+                  threads, args.ops)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
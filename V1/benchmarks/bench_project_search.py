@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark ProjectDatabase.search_projects on a synthetic database
+Builds (or reuses) a database of --projects generated projects and
+compares the previous LIKE '%q%' scan with the FTS5 index for common,
+rare and prefix queries.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import statistics
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.project_db import ProjectDatabase
+from database.blob_store import put_blob
+
+WORDS = ("matrix vector plot data stream parse graph tree sort search cache queue socket json csv "
+         "image audio model train tensor numpy pandas shell script compile linker template thread").split()
+LANGUAGES = ["python", "javascript", "bash", "cpp"]
+
+LEGACY_QUERY = '''
+    SELECT * FROM projects
+    WHERE is_public = ? AND (name LIKE ? OR description LIKE ? OR tags LIKE ?)
+    ORDER BY created_at DESC
+    LIMIT 100
+'''
+
+def populate(db, count, batch=10000):
+    """Insert count synthetic projects in large transactions (triggers fill the index)"""
+    rng = random.Random(42)
+    with db.pool.transaction() as conn:
+        content_key = put_blob(conn.cursor(), "#lang: python\nprint('hello')\n")
+    start = time.perf_counter()
+    for first in range(0, count, batch):
+        rows = []
+        for n in range(first, min(count, first + batch)):
+            name = ' '.join(rng.sample(WORDS, 2)) + f" {n}"
+            description = ' '.join(rng.choices(WORDS, k=8))
+            # One project in 100k gets a rare word
+            if n % 100000 == 7:
+                description += " zeppelin"
+            rows.append((str(uuid.uuid4()), name, description, f"user{n % 5000}", '',
+                         json.dumps(rng.sample(LANGUAGES, 2)), '{}', n % 3 != 0, content_key))
+        with db.pool.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO projects (id, name, description, author, file_path, tags, metadata, is_public,
+                                      content_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            # Every generated project shares the one source blob
+            conn.execute('UPDATE blobs SET ref_count = ref_count + ? WHERE hash = ?',
+                         (len(rows) - 1, content_key))
+        done = min(count, first + batch)
+        if done % 100000 == 0 or done == count:
+            print(f"  inserted {done} projects ({done / (time.perf_counter() - start):.0f}/s)")
+
+def timed(func, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        results = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), len(results)
+
+def main():
+    parser = argparse.ArgumentParser(description='Project search benchmark')
+    parser.add_argument('--projects', type=int, default=1000000, help='Synthetic projects to generate')
+    parser.add_argument('--db', help='Reuse (or create) this database file instead of a temporary one')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per query')
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='polyrun-search-bench-'), 'search.db')
+    db = ProjectDatabase(db_path)
+    existing = db.get_stats()['total_projects']
+    print("🔎 Project search benchmark")
+    print("=" * 70)
+    if existing < args.projects:
+        print(f"Generating {args.projects - existing} projects in {db_path}")
+        populate(db, args.projects - existing)
+    print(f"\n{db.get_stats()['total_projects']} projects, median of {args.runs} runs")
+
+    try:
+        for label, query in [("common word", "matrix"), ("two words", "matrix plot"),
+                             ("rare word", "zeppelin"), ("prefix", "tens")]:
+            like = f'%{query}%'
+            with db.pool.connection() as conn:
+                legacy_time, legacy_hits = timed(
+                    lambda: conn.execute(LEGACY_QUERY, (True, like, like, like)).fetchall(), args.runs)
+            fts_time, fts_hits = timed(lambda: db.search_projects(query), args.runs)
+            print(f"  {label:<12} LIKE scan {legacy_time * 1000:9.1f} ms ({legacy_hits:3d} hits)"
+                  f"   FTS5 {fts_time * 1000:8.1f} ms ({fts_hits:3d} hits)")
+    finally:
+        db.close()
+        if not args.db:
+            os.remove(db_path)
+
+if __name__ == '__main__':
+    main()
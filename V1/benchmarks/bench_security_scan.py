@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark SecurityManager scan throughput on large code blocks
+Compares per-rule re.search (the previous engine) with the compiled
+literal-gated policy, both cold (new code every call) and memoized.
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from security.manager import SecurityManager, DEFAULT_DANGEROUS_PATTERNS
+from security.python_analyzer import analyze_python
+
+def make_block(size_kb, salt):
+    """Benign Python block of roughly size_kb kilobytes"""
+    lines = []
+    i = 0
+    while sum(len(line) + 1 for line in lines) < size_kb * 1024:
+        lines.append(f"value_{salt}_{i} = [n * {i % 7} for n in range({i % 50})]  # row {i}")
+        i += 1
+    return '\n'.join(lines)
+
+def extra_rules(count):
+    """Synthetic rules that never match benign code"""
+    return [rf'forbidden_call_{i}\s*\(' for i in range(count)]
+
+def legacy_scan(patterns, code):
+    for pattern in patterns:
+        if re.search(pattern, code, re.IGNORECASE):
+            return False
+    return True
+
+def measure(label, func, blocks, size_kb):
+    start = time.perf_counter()
+    for block in blocks:
+        func(block)
+    elapsed = time.perf_counter() - start
+    mb = len(blocks) * size_kb / 1024
+    print(f"  {label:<28} {len(blocks) / elapsed:10.1f} scans/s {mb / elapsed:10.1f} MB/s")
+
+def main():
+    parser = argparse.ArgumentParser(description='SecurityManager scan benchmark')
+    parser.add_argument('--size-kb', type=int, default=256, help='Size of each code block')
+    parser.add_argument('--blocks', type=int, default=20, help='Distinct blocks per run')
+    parser.add_argument('--rules', type=int, nargs='+', default=[0, 100, 300], help='Extra rule counts')
+    args = parser.parse_args()
+
+    print("🔒 SecurityManager scan benchmark")
+    print("=" * 70)
+    blocks = [make_block(args.size_kb, salt) for salt in range(args.blocks)]
+    
+    print(f"\nPython AST analyzer, {args.blocks} blocks x {args.size_kb}KB")
+    measure("ast analyzer (cold)", analyze_python, blocks, args.size_kb)
+
+    for rule_count in args.rules:
+        config = {'security_rules': {'python': extra_rules(rule_count)}, 'security_python_analysis': False}
+        manager = SecurityManager(config)
+        patterns = DEFAULT_DANGEROUS_PATTERNS['python'] + extra_rules(rule_count)
+        print(f"\n{len(patterns)} python rules, {args.blocks} blocks x {args.size_kb}KB")
+
+        measure("legacy per-rule re.search", lambda code: legacy_scan(patterns, code), blocks, args.size_kb)
+        measure("compiled (cold)", lambda code: manager._scan_code(code, 'python'), blocks, args.size_kb)
+        manager.verdict_cache.clear()
+        measure("validate (first call)", lambda code: manager.validate_code_safety(code, 'python'),
+                blocks, args.size_kb)
+        measure("validate (memoized)", lambda code: manager.validate_code_safety(code, 'python'),
+                blocks, args.size_kb)
+
+if __name__ == '__main__':
+    main()
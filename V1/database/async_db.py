@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Asyncio facade over ProjectDatabase for the FastAPI backends
+Every call runs on a worker thread so sqlite and file I/O never block the
+event loop: reads on a small pool of reader threads (WAL lets them run
+alongside a write), writes queued on a single writer thread, since SQLite
+admits one writer at a time and queueing in-process is cheaper than
+threads contending for the write lock
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .project_db import ProjectDatabase
+except ImportError:
+    from project_db import ProjectDatabase
+
+DEFAULT_READERS = 4
+
+
+class AsyncProjectDatabase:
+    """
+    The ProjectDatabase operations as coroutines
+
+    Arguments are passed through unchanged; see ProjectDatabase for what
+    each operation does. A write whose caller is cancelled (say the
+    client disconnects) still runs to completion once queued.
+    """
+
+    def __init__(self, db_path: str = "database/polyrun.db", readers: int = DEFAULT_READERS,
+                 db: ProjectDatabase = None, **kwargs):
+        """
+        Args:
+            db_path: SQLite database file
+            readers: Reader threads
+            db: Existing ProjectDatabase to wrap instead of opening db_path
+            kwargs: Passed to ProjectDatabase (search_content, ...)
+        """
+        # One pooled connection per thread, so nobody waits for a connection
+        self.db = db or ProjectDatabase(db_path, pool_size=readers + 1, **kwargs)
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='polyrun-db-reader')
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='polyrun-db-writer')
+
+    async def _read(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(func, *args, **kwargs))
+
+    async def _write(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await asyncio.shield(loop.run_in_executor(self._writer, functools.partial(func, *args, **kwargs)))
+
+    # Reads
+    async def get_project(self, project_id: str) -> Optional[Dict]:
+        return await self._read(self.db.get_project, project_id)
+
+    async def list_projects(self, *args, **kwargs) -> List[Dict]:
+        return await self._read(self.db.list_projects, *args, **kwargs)
+
+    async def list_projects_page(self, *args, **kwargs) -> Dict:
+        return await self._read(self.db.list_projects_page, *args, **kwargs)
+
+    async def search_projects(self, query: str, *args, **kwargs) -> List[Dict]:
+        return await self._read(self.db.search_projects, query, *args, **kwargs)
+
+    async def get_popular_tags(self, limit: int = 20) -> List[Tuple[str, int]]:
+        return await self._read(self.db.get_popular_tags, limit)
+
+    async def get_stats(self) -> Dict:
+        return await self._read(self.db.get_stats)
+
+    async def get_project_by_share_token(self, share_token: str) -> Optional[Dict]:
+        # The access count is written behind, in a batch
+        return await self._read(self.db.get_project_by_share_token, share_token)
+
+    # Writes
+    async def save_project(self, *args, **kwargs) -> str:
+        return await self._write(self.db.save_project, *args, **kwargs)
+
+    async def update_project(self, project_id: str, **updates) -> bool:
+        return await self._write(self.db.update_project, project_id, **updates)
+
+    async def delete_project(self, project_id: str) -> bool:
+        return await self._write(self.db.delete_project, project_id)
+
+    async def create_share_link(self, project_id: str, expires_at: str = None) -> str:
+        return await self._write(self.db.create_share_link, project_id, expires_at)
+
+    async def migrate_files_to_blobs(self, delete_files: bool = False) -> Dict:
+        return await self._write(self.db.migrate_files_to_blobs, delete_files)
+
+    async def close(self):
+        """Finish queued writes and share access counts, then close the connections"""
+        await asyncio.get_running_loop().run_in_executor(None, self.close_sync)
+
+    def close_sync(self):
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        self.db.close()
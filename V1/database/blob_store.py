@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Content-addressed blob storage for PolyRun project files
+.mix sources live in the blobs table keyed by their SHA-256, compressed
+with zlib when that saves space and reference counted, so identical
+projects (copies of the same example) share one row
+"""
+
+import hashlib
+import zlib
+
+# Small sources rarely shrink enough to be worth inflating on every read
+MIN_COMPRESS_BYTES = 256
+COMPRESSION_LEVEL = 6
+
+BLOBS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS blobs (
+        hash TEXT PRIMARY KEY, -- SHA-256 of the uncompressed UTF-8 content
+        data BLOB NOT NULL,
+        compression TEXT NOT NULL, -- 'zlib' or 'none'
+        size INTEGER NOT NULL, -- uncompressed bytes
+        ref_count INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def encode(content: str):
+    """(data, compression) for storing content"""
+    raw = content.encode('utf-8')
+    if len(raw) >= MIN_COMPRESS_BYTES:
+        compressed = zlib.compress(raw, COMPRESSION_LEVEL)
+        if len(compressed) < len(raw):
+            return compressed, 'zlib'
+    return raw, 'none'
+
+
+def decode(data: bytes, compression: str) -> str:
+    if compression == 'zlib':
+        data = zlib.decompress(data)
+    elif compression != 'none':
+        raise ValueError(f"Unknown blob compression: {compression}")
+    return bytes(data).decode('utf-8')
+
+
+def put_blob(cursor, content: str) -> str:
+    """Store content (or add a reference to the existing copy); returns its hash"""
+    key = content_hash(content)
+    cursor.execute('UPDATE blobs SET ref_count = ref_count + 1 WHERE hash = ?', (key,))
+    if cursor.rowcount == 0:
+        data, compression = encode(content)
+        cursor.execute('''
+            INSERT INTO blobs (hash, data, compression, size, ref_count)
+            VALUES (?, ?, ?, ?, 1)
+        ''', (key, data, compression, len(content.encode('utf-8'))))
+    return key
+
+
+def release_blob(cursor, key: str):
+    """Drop one reference to a blob, deleting it when none remain"""
+    if not key:
+        return
+    cursor.execute('UPDATE blobs SET ref_count = ref_count - 1 WHERE hash = ?', (key,))
+    cursor.execute('DELETE FROM blobs WHERE hash = ? AND ref_count <= 0', (key,))
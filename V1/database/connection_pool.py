@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Pooled SQLite connections for PolyRun project management
+Connections are opened once in WAL mode with tuned pragmas and handed
+out to threads on demand, so each call reuses a warm page cache and the
+connection's prepared-statement cache instead of reopening the file
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Applied to every new connection (journal_mode is persistent per file)
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # WAL + NORMAL: durable against application crashes, fsync at checkpoints
+    'synchronous': 'NORMAL',
+    # Negative values are KiB: 16 MiB page cache per connection
+    'cache_size': -16000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+# Compiled statements kept per connection; the queries are constant strings
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections to one database file
+
+    Connections are created lazily up to size and returned to the pool
+    after each use. They run in autocommit mode; writes go through
+    transaction(), which takes the write lock up front (BEGIN IMMEDIATE)
+    so concurrent writers queue on busy_timeout instead of failing on a
+    lock upgrade.
+    """
+
+    def __init__(self, db_path: str, size: int = 4, pragmas: Optional[Dict] = None,
+                 timeout: float = 30.0):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        self.pragmas.update(pragmas or {})
+
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None,
+                               check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"No database connection free after {self.timeout}s")
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for reads (autocommit)"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Borrow a connection inside BEGIN IMMEDIATE; commits unless the block raises"""
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def close(self):
+        """Close idle connections; borrowed ones are closed when returned"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Move project content from projects/<id>.mix files into the blobs table
+
+Usage (from the directory the projects/ paths are relative to):
+    python database/migrate_blobs.py [--db database/polyrun.db] [--delete-files]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.project_db import ProjectDatabase
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate .mix project files into content-addressed blobs')
+    parser.add_argument('--db', default='database/polyrun.db', help='Project database file')
+    parser.add_argument('--delete-files', action='store_true',
+                        help='Remove each .mix file once its content is stored')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        return 1
+
+    db = ProjectDatabase(args.db)
+    try:
+        result = db.migrate_files_to_blobs(delete_files=args.delete_files)
+        stats = db.get_stats()
+    finally:
+        db.close()
+
+    print(f"✅ Migrated {result['migrated']} projects")
+    if result['missing']:
+        print(f"⚠️  {result['missing']} projects reference missing files and were left as they are")
+    print(f"📦 {stats['content_blobs']} distinct sources, {stats['content_bytes']} bytes "
+          f"stored in {stats['stored_bytes']} bytes")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
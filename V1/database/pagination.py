@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Keyset pagination for project listings
+Pages are ordered newest first by (created_at, rowid) and a cursor holds
+the position of the last row returned, so a page costs the same however
+deep it is (OFFSET has to step over every earlier row)
+"""
+
+import base64
+import json
+
+# Filter/order indexes for list_projects; rowid is implicit in each, so
+# the filter, ORDER BY and cursor comparison are all answered from the index
+LIST_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_projects_public_created ON projects (is_public, created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_projects_author_created ON projects (author, created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_projects_created ON projects (created_at)',
+]
+
+# Single-column indexes superseded by the composite ones above
+SUPERSEDED_INDEXES = ['idx_projects_public', 'idx_projects_author']
+
+# Columns a list view shows: no metadata (or storage columns) to fetch and decode
+SUMMARY_COLUMNS = 'id, name, description, author, created_at, updated_at, is_public, language_count, tags'
+
+
+class CursorError(ValueError):
+    """Raised for a cursor that was not produced by encode_cursor"""
+
+
+def encode_cursor(created_at: str, rowid: int) -> str:
+    """Opaque cursor for the position after the row (created_at, rowid)"""
+    raw = json.dumps([created_at, rowid], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """(created_at, rowid) from a cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, rowid = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(created_at, str) or not isinstance(rowid, int):
+        raise CursorError(f"Invalid cursor: {cursor!r}")
+    return created_at, rowid
@@ -3,30 +3,94 @@
 Database models and initialization for PolyRun project management
 """
 
-import sqlite3
 import os
+import copy
 import json
 import uuid
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import hashlib
 
+try:
+    from .connection_pool import ConnectionPool
+    from .blob_store import BLOBS_SCHEMA, decode, put_blob, release_blob
+    from .search_index import SEARCH_QUERY, SEARCH_SCHEMA, fts_query, rebuild_index, set_indexed_content
+    from .pagination import LIST_INDEXES, SUMMARY_COLUMNS, SUPERSEDED_INDEXES, decode_cursor, encode_cursor
+    from .project_tags import HAS_TAG, PROJECT_TAGS_SCHEMA, normalize_tags, rebuild_project_tags, set_project_tags
+    from .project_stats import COUNTERS, STATS_SCHEMA, recount_stats, set_project_languages
+    from .share_cache import AccessCounts, PeriodicFlusher, ShareLinkCache
+except ImportError:
+    # Run as a script: python database/project_db.py
+    from connection_pool import ConnectionPool
+    from blob_store import BLOBS_SCHEMA, decode, put_blob, release_blob
+    from search_index import SEARCH_QUERY, SEARCH_SCHEMA, fts_query, rebuild_index, set_indexed_content
+    from pagination import LIST_INDEXES, SUMMARY_COLUMNS, SUPERSEDED_INDEXES, decode_cursor, encode_cursor
+    from project_tags import HAS_TAG, PROJECT_TAGS_SCHEMA, normalize_tags, rebuild_project_tags, set_project_tags
+    from project_stats import COUNTERS, STATS_SCHEMA, recount_stats, set_project_languages
+    from share_cache import AccessCounts, PeriodicFlusher, ShareLinkCache
+
+# Project columns plus the content blob, for reads that return content
+PROJECT_WITH_CONTENT = '''
+    SELECT p.*, b.data AS content_data, b.compression AS content_compression
+    FROM projects p LEFT JOIN blobs b ON b.hash = p.content_hash
+'''
+
 class ProjectDatabase:
-    def __init__(self, db_path: str = "database/polyrun.db"):
-        """Initialize the project database"""
+    def __init__(self, db_path: str = "database/polyrun.db", pool_size: int = 4,
+                 search_content: bool = False, share_cache_ttl: float = 60.0,
+                 share_flush_interval: float = 5.0):
+        """
+        Initialize the project database
+        
+        Args:
+            db_path: SQLite database file
+            pool_size: Connections shared by the threads using this instance
+            search_content: Also index .mix sources for search_projects
+            share_cache_ttl: Seconds a resolved share token is served from
+                memory (0 disables the cache)
+            share_flush_interval: Seconds between batched writes of share
+                access counts (0 writes each access as it happens)
+        """
         self.db_path = db_path
+        self.search_content = search_content
         
         # Ensure database directory exists
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        
+        # WAL-mode connections reused across calls (see connection_pool.py)
+        self.pool = ConnectionPool(db_path, size=pool_size)
         
         # Initialize database schema
         self._init_database()
+        
+        # Hot share links are answered from memory and their access counts
+        # written behind (see share_cache.py)
+        self.share_cache = ShareLinkCache(ttl=share_cache_ttl)
+        self.share_accesses = AccessCounts()
+        self._share_flusher = None
+        if share_flush_interval > 0:
+            self._share_flusher = PeriodicFlusher(share_flush_interval, self.flush_share_accesses)
+            self._share_flusher.start()
+    
+    def close(self):
+        """Write pending share access counts and close the pooled connections"""
+        if self._share_flusher is not None:
+            self._share_flusher.stop()
+            self._share_flusher = None
+        self.pool.close()
     
     def _init_database(self):
         """Create database tables if they don't exist"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'projects_fts'")
+            index_missing = cursor.fetchone() is None
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'project_tags'")
+            project_tags_missing = cursor.fetchone() is None
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'project_stats'")
+            stats_missing = cursor.fetchone() is None
+            
             # Projects table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS projects (
@@ -40,10 +104,20 @@ class ProjectDatabase:
                     file_path TEXT NOT NULL,
                     language_count INTEGER DEFAULT 0,
                     tags TEXT, -- JSON array of tags
-                    metadata TEXT -- JSON metadata
+                    metadata TEXT, -- JSON metadata
+                    content_hash TEXT -- blobs.hash of the .mix source
                 )
             ''')
             
+            # Databases created before blob storage: file_path holds the
+            # content until migrate_files_to_blobs() moves it
+            columns = [row['name'] for row in cursor.execute('PRAGMA table_info(projects)')]
+            if 'content_hash' not in columns:
+                cursor.execute('ALTER TABLE projects ADD COLUMN content_hash TEXT')
+            
+            # Content-addressed .mix sources (see blob_store.py)
+            cursor.execute(BLOBS_SCHEMA)
+            
             # Project versions table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS project_versions (
@@ -80,13 +154,55 @@ class ProjectDatabase:
                 )
             ''')
             
-            # Create indexes for better performance
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_public ON projects (is_public)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_author ON projects (author)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_created ON projects (created_at)')
+            # Which projects carry which tag (see project_tags.py)
+            for statement in PROJECT_TAGS_SCHEMA:
+                cursor.execute(statement)
+            if project_tags_missing:
+                rebuild_project_tags(cursor)
+            
+            # Create indexes for better performance (see pagination.py)
+            for statement in LIST_INDEXES:
+                cursor.execute(statement)
+            for index in SUPERSEDED_INDEXES:
+                cursor.execute(f'DROP INDEX IF EXISTS {index}')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_shared_links_token ON shared_links (share_token)')
             
-            conn.commit()
+            # Full-text index kept in sync by triggers (see search_index.py)
+            for statement in SEARCH_SCHEMA:
+                cursor.execute(statement)
+            
+            # Counters kept by triggers for get_stats (see project_stats.py)
+            for statement in STATS_SCHEMA:
+                cursor.execute(statement)
+        
+        if index_missing:
+            self.rebuild_search_index()
+        if stats_missing:
+            self.recount_stats()
+    
+    def rebuild_search_index(self):
+        """Re-index every project (and its source when search_content is on)"""
+        with self.pool.transaction() as conn:
+            cursor = conn.cursor()
+            rebuild_index(cursor)
+            if self.search_content:
+                rows = cursor.execute('''
+                    SELECT p.id, b.data, b.compression FROM projects p
+                    JOIN blobs b ON b.hash = p.content_hash
+                ''').fetchall()
+                for row in rows:
+                    set_indexed_content(cursor, row['id'], decode(row['data'], row['compression']))
+    
+    def recount_stats(self):
+        """Recompute the get_stats counters, re-reading every project's languages"""
+        with self.pool.transaction() as conn:
+            cursor = conn.cursor()
+            rows = cursor.execute(PROJECT_WITH_CONTENT).fetchall()
+            for row in rows:
+                project = dict(row)
+                self._attach_content(project)
+                set_project_languages(cursor, project['id'], project['content'])
+            recount_stats(cursor)
     
     def save_project(self, name: str, description: str, author: str, 
                      file_content: str, tags: List[str] = None, 
@@ -98,110 +214,152 @@ class ProjectDatabase:
             project_id: Unique project identifier
         """
         project_id = str(uuid.uuid4())
-        file_path = f"projects/{project_id}.mix"
-        
-        # Ensure projects directory exists
-        os.makedirs("projects", exist_ok=True)
-        
-        # Save .mix file
-        full_file_path = file_path
-        with open(full_file_path, 'w') as f:
-            f.write(file_content)
         
         # Count languages in the file
         language_count = self._count_languages(file_content)
         
         # Prepare data
-        tags_json = json.dumps(tags or [])
+        tags = normalize_tags(tags)
+        tags_json = json.dumps(tags)
         metadata_json = json.dumps(metadata or {})
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             
-            # Insert project
+            # Content is stored once per distinct source
+            content_key = put_blob(cursor, file_content)
+            
+            # Insert project (file_path is only set on rows predating blobs)
             cursor.execute('''
                 INSERT INTO projects 
-                (id, name, description, author, file_path, language_count, tags, metadata, is_public)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (project_id, name, description, author, file_path, 
-                  language_count, tags_json, metadata_json, is_public))
-            
-            # Update tag usage counts
-            if tags:
-                for tag in tags:
-                    cursor.execute('''
-                        INSERT INTO tags (name, usage_count) 
-                        VALUES (?, 1)
-                        ON CONFLICT(name) DO UPDATE SET usage_count = usage_count + 1
-                    ''', (tag,))
-            
-            conn.commit()
+                (id, name, description, author, file_path, language_count, tags, metadata, is_public,
+                 content_hash)
+                VALUES (?, ?, ?, ?, '', ?, ?, ?, ?, ?)
+            ''', (project_id, name, description, author, 
+                  language_count, tags_json, metadata_json, is_public, content_key))
+            set_project_languages(cursor, project_id, file_content)
+            if self.search_content:
+                set_indexed_content(cursor, project_id, file_content)
+            
+            # Link tags and update their usage counts
+            set_project_tags(cursor, project_id, tags)
         
         return project_id
     
     def get_project(self, project_id: str) -> Optional[Dict]:
         """Get a project by ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute('SELECT * FROM projects WHERE id = ?', (project_id,))
+            cursor.execute(PROJECT_WITH_CONTENT + ' WHERE p.id = ?', (project_id,))
             row = cursor.fetchone()
             
             if row:
                 project = dict(row)
                 project['tags'] = json.loads(project['tags'] or '[]')
                 project['metadata'] = json.loads(project['metadata'] or '{}')
-                
-                # Read file content
-                try:
-                    with open(project['file_path'], 'r') as f:
-                        project['content'] = f.read()
-                except FileNotFoundError:
-                    project['content'] = "# File not found"
-                
+                self._attach_content(project)
                 return project
         
         return None
     
     def list_projects(self, author: str = None, is_public: bool = None, 
-                     limit: int = 50, offset: int = 0) -> List[Dict]:
-        """List projects with optional filtering"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+                     limit: int = 50, offset: int = 0, summary: bool = False,
+                     tag: str = None) -> List[Dict]:
+        """
+        List projects with optional filtering, newest first
+        
+        Deep offsets get slower page by page; list_projects_page pages
+        by cursor instead. With summary, projects carry only the columns
+        a list view needs (no metadata). With tag, only projects carrying
+        that tag are listed.
+        """
+        where, params = self._list_filters(author, is_public, tag)
+        columns = SUMMARY_COLUMNS if summary else '*'
+        
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            
-            query = 'SELECT * FROM projects WHERE 1=1'
-            params = []
-            
-            if author:
-                query += ' AND author = ?'
-                params.append(author)
-            
-            if is_public is not None:
-                query += ' AND is_public = ?'
-                params.append(is_public)
-            
-            query += ' ORDER BY created_at DESC LIMIT ? OFFSET ?'
-            params.extend([limit, offset])
-            
-            cursor.execute(query, params)
-            projects = []
-            
-            for row in cursor.fetchall():
-                project = dict(row)
-                project['tags'] = json.loads(project['tags'] or '[]')
-                project['metadata'] = json.loads(project['metadata'] or '{}')
-                projects.append(project)
-            
-            return projects
+            cursor.execute(f'SELECT {columns} FROM projects {where} '
+                           'ORDER BY created_at DESC, rowid DESC LIMIT ? OFFSET ?',
+                           params + [limit, offset])
+            return [self._list_row(row, summary) for row in cursor.fetchall()]
+    
+    def list_projects_page(self, author: str = None, is_public: bool = None, limit: int = 50,
+                           cursor: str = None, summary: bool = True, tag: str = None) -> Dict:
+        """
+        One page of projects, newest first, by keyset pagination
+        
+        Args:
+            author: Only this author's projects
+            is_public: Only public (True) or private (False) projects
+            limit: Page size
+            cursor: next_cursor from the previous page, or None for the first
+            summary: Leave out metadata (see list_projects)
+            tag: Only projects carrying this tag
+        
+        Returns:
+            {'projects': [...], 'next_cursor': cursor for the following
+            page, or None on the last page}
+        
+        Raises:
+            CursorError: cursor is not one returned by this method
+        """
+        where, params = self._list_filters(author, is_public, tag)
+        if cursor is not None:
+            where += ' AND (created_at, rowid) < (?, ?)'
+            params.extend(decode_cursor(cursor))
+        columns = SUMMARY_COLUMNS if summary else '*'
+        
+        with self.pool.connection() as conn:
+            # One extra row tells whether another page follows
+            rows = conn.execute(f'SELECT rowid AS row_id, {columns} FROM projects {where} '
+                                'ORDER BY created_at DESC, rowid DESC LIMIT ?',
+                                params + [limit + 1]).fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['row_id'])
+        
+        projects = []
+        for row in rows:
+            project = self._list_row(row, summary)
+            del project['row_id']
+            projects.append(project)
+        return {'projects': projects, 'next_cursor': next_cursor}
+    
+    def _list_filters(self, author: Optional[str], is_public: Optional[bool], tag: Optional[str] = None):
+        """WHERE clause and parameters shared by the listing queries"""
+        query = 'WHERE 1=1'
+        params = []
+        
+        if author:
+            query += ' AND author = ?'
+            params.append(author)
+        
+        if is_public is not None:
+            query += ' AND is_public = ?'
+            params.append(is_public)
+        
+        if tag:
+            query += f' AND id {HAS_TAG}'
+            params.append(tag)
+        
+        return query, params
+    
+    def _list_row(self, row, summary: bool) -> Dict:
+        project = dict(row)
+        project['tags'] = json.loads(project['tags'] or '[]')
+        if not summary:
+            project['metadata'] = json.loads(project['metadata'] or '{}')
+        return project
     
     def update_project(self, project_id: str, **updates) -> bool:
         """Update a project"""
         if not updates:
             return False
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             
             # Build update query
@@ -214,130 +372,164 @@ class ProjectDatabase:
                     params.append(value)
                 elif key == 'tags':
                     set_clauses.append('tags = ?')
-                    params.append(json.dumps(value))
+                    params.append(json.dumps(normalize_tags(value)))
                 elif key == 'metadata':
                     set_clauses.append('metadata = ?')
                     params.append(json.dumps(value))
                 elif key == 'content':
-                    # Update file content
-                    project = self.get_project(project_id)
+                    # Point the project at the new content's blob
+                    cursor.execute('SELECT content_hash FROM projects WHERE id = ?', (project_id,))
+                    project = cursor.fetchone()
                     if project:
-                        with open(project['file_path'], 'w') as f:
-                            f.write(value)
+                        set_clauses.append('content_hash = ?')
+                        params.append(put_blob(cursor, value))
+                        release_blob(cursor, project['content_hash'])
+                        set_project_languages(cursor, project_id, value)
+                        if self.search_content:
+                            set_indexed_content(cursor, project_id, value)
                         # Update language count
                         set_clauses.append('language_count = ?')
                         params.append(self._count_languages(value))
             
-            if set_clauses:
-                set_clauses.append('updated_at = CURRENT_TIMESTAMP')
-                query = f'UPDATE projects SET {", ".join(set_clauses)} WHERE id = ?'
-                params.append(project_id)
-                
-                cursor.execute(query, params)
-                conn.commit()
-                
-                return cursor.rowcount > 0
+            if not set_clauses:
+                return False
+            
+            set_clauses.append('updated_at = CURRENT_TIMESTAMP')
+            query = f'UPDATE projects SET {", ".join(set_clauses)} WHERE id = ?'
+            params.append(project_id)
+            
+            cursor.execute(query, params)
+            if cursor.rowcount == 0:
+                return False
+            
+            if 'tags' in updates:
+                set_project_tags(cursor, project_id, updates['tags'])
         
-        return False
+        # Share links must not serve the old version
+        self.share_cache.invalidate_project(project_id)
+        return True
     
     def delete_project(self, project_id: str) -> bool:
         """Delete a project and its file"""
-        project = self.get_project(project_id)
-        if not project:
-            return False
-        
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             
+            cursor.execute('SELECT file_path, content_hash FROM projects WHERE id = ?', (project_id,))
+            project = cursor.fetchone()
+            if not project:
+                return False
+            
             # Delete from database
             cursor.execute('DELETE FROM projects WHERE id = ?', (project_id,))
             cursor.execute('DELETE FROM project_versions WHERE project_id = ?', (project_id,))
             cursor.execute('DELETE FROM shared_links WHERE project_id = ?', (project_id,))
-            
-            conn.commit()
-            
-            # Delete file
+            set_project_tags(cursor, project_id, [])
+            release_blob(cursor, project['content_hash'])
+        
+        self.share_cache.invalidate_project(project_id)
+        
+        # Not yet migrated: delete the file once the rows are gone
+        if project['file_path']:
             try:
                 os.remove(project['file_path'])
             except FileNotFoundError:
                 pass
-            
-            return True
+        
+        return True
     
     def create_share_link(self, project_id: str, expires_at: str = None) -> str:
         """Create a shareable link for a project"""
         share_token = hashlib.sha256(f"{project_id}{datetime.now()}".encode()).hexdigest()[:16]
         link_id = str(uuid.uuid4())
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
                 INSERT INTO shared_links (id, project_id, share_token, expires_at)
                 VALUES (?, ?, ?, ?)
             ''', (link_id, project_id, share_token, expires_at))
-            
-            conn.commit()
         
         return share_token
     
     def get_project_by_share_token(self, share_token: str) -> Optional[Dict]:
-        """Get a project by its share token"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Check if share link is valid
-            cursor.execute('''
-                SELECT sl.*, p.* FROM shared_links sl
-                JOIN projects p ON sl.project_id = p.id
-                WHERE sl.share_token = ? AND sl.is_active = TRUE
-                AND (sl.expires_at IS NULL OR sl.expires_at > CURRENT_TIMESTAMP)
-            ''', (share_token,))
-            
-            row = cursor.fetchone()
-            if row:
-                # Update access count
+        """
+        Get a project by its share token
+        
+        The access is counted in memory and written with the next flush
+        (see flush_share_accesses).
+        """
+        project = self.share_cache.get(share_token)
+        if project is None:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Check if share link is valid
                 cursor.execute('''
-                    UPDATE shared_links SET access_count = access_count + 1
-                    WHERE share_token = ?
+                    SELECT p.*, sl.project_id, sl.expires_at, sl.access_count AS share_access_count,
+                           b.data AS content_data, b.compression AS content_compression
+                    FROM shared_links sl
+                    JOIN projects p ON sl.project_id = p.id
+                    LEFT JOIN blobs b ON b.hash = p.content_hash
+                    WHERE sl.share_token = ? AND sl.is_active = TRUE
+                    AND (sl.expires_at IS NULL OR sl.expires_at > CURRENT_TIMESTAMP)
                 ''', (share_token,))
-                conn.commit()
                 
-                project = dict(row)
-                project['tags'] = json.loads(project['tags'] or '[]')
-                project['metadata'] = json.loads(project['metadata'] or '{}')
-                
-                # Read file content
-                try:
-                    with open(project['file_path'], 'r') as f:
-                        project['content'] = f.read()
-                except FileNotFoundError:
-                    project['content'] = "# File not found"
-                
-                return project
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+            
+            project = dict(row)
+            project['tags'] = json.loads(project['tags'] or '[]')
+            project['metadata'] = json.loads(project['metadata'] or '{}')
+            self._attach_content(project)
+            self.share_cache.put(share_token, project, project['expires_at'])
         
-        return None
+        self.share_accesses.add(share_token)
+        if self._share_flusher is None:
+            self.flush_share_accesses()
+        
+        # Callers get their own copy of the cached project
+        return copy.deepcopy(project)
+    
+    def flush_share_accesses(self) -> int:
+        """Write the pending share access counts in one transaction; returns how many"""
+        counts = self.share_accesses.drain()
+        if not counts:
+            return 0
+        try:
+            with self.pool.transaction() as conn:
+                conn.executemany('''
+                    UPDATE shared_links SET access_count = access_count + ?
+                    WHERE share_token = ?
+                ''', [(count, token) for token, count in counts.items()])
+        except Exception:
+            self.share_accesses.restore(counts)
+            raise
+        return sum(counts.values())
     
-    def search_projects(self, query: str, is_public: bool = True) -> List[Dict]:
-        """Search projects by name, description, or tags"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+    def search_projects(self, query: str, is_public: Optional[bool] = True,
+                        limit: int = 100, offset: int = 0, prefix: bool = True,
+                        tag: str = None) -> List[Dict]:
+        """
+        Full-text search over name, description and tags (and sources
+        with search_content), best matches first
+        
+        Args:
+            query: Free text; every word must match
+            is_public: Only public (True) or private (False) projects, or None for both
+            limit: Page size
+            offset: Results to skip
+            prefix: Let words match as prefixes ("java" finds "javascript")
+            tag: Only projects carrying this tag
+        """
+        match = fts_query(query, prefix)
+        if match is None:
+            return []
+        
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            
-            search_query = '''
-                SELECT * FROM projects 
-                WHERE is_public = ? AND (
-                    name LIKE ? OR 
-                    description LIKE ? OR 
-                    tags LIKE ?
-                )
-                ORDER BY created_at DESC
-                LIMIT 100
-            '''
-            
-            search_term = f'%{query}%'
-            cursor.execute(search_query, (is_public, search_term, search_term, search_term))
+            cursor.execute(SEARCH_QUERY, (match, is_public, is_public, tag, tag, limit, offset))
             
             projects = []
             for row in cursor.fetchall():
@@ -350,7 +542,7 @@ class ProjectDatabase:
     
     def get_popular_tags(self, limit: int = 20) -> List[Tuple[str, int]]:
         """Get most popular tags"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -359,38 +551,85 @@ class ProjectDatabase:
                 LIMIT ?
             ''', (limit,))
             
-            return cursor.fetchall()
+            return [tuple(row) for row in cursor.fetchall()]
     
     def get_stats(self) -> Dict:
-        """Get database statistics"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Get database statistics (counters kept by triggers, see project_stats.py)"""
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
-            stats = {}
+            # Projects, public projects, active shares and content storage
+            counters = dict(cursor.execute('SELECT name, value FROM project_stats').fetchall())
+            stats = {name: counters.get(name, 0) for name in COUNTERS}
             
-            # Total projects
-            cursor.execute('SELECT COUNT(*) FROM projects')
-            stats['total_projects'] = cursor.fetchone()[0]
-            
-            # Public projects
-            cursor.execute('SELECT COUNT(*) FROM projects WHERE is_public = TRUE')
-            stats['public_projects'] = cursor.fetchone()[0]
-            
-            # Total shares
-            cursor.execute('SELECT COUNT(*) FROM shared_links WHERE is_active = TRUE')
-            stats['active_shares'] = cursor.fetchone()[0]
-            
-            # Most popular languages
+            # Projects by number of #lang: blocks
             cursor.execute('''
-                SELECT language_count, COUNT(*) as count 
-                FROM projects 
-                GROUP BY language_count 
-                ORDER BY count DESC
+                SELECT language_count, projects FROM language_count_stats
+                ORDER BY projects DESC
             ''')
-            stats['language_distribution'] = dict(cursor.fetchall())
+            stats['language_distribution'] = {row[0]: row[1] for row in cursor.fetchall()}
+            
+            # Projects using each language
+            cursor.execute('SELECT language, projects FROM language_stats ORDER BY projects DESC, language')
+            stats['languages'] = {row[0]: row[1] for row in cursor.fetchall()}
             
             return stats
     
+    def migrate_files_to_blobs(self, delete_files: bool = False) -> Dict:
+        """
+        Move the content of projects still stored as projects/<id>.mix
+        files into blobs
+        
+        Returns counts of migrated projects and of missing files (those
+        rows are left untouched). Files are only deleted once their
+        project's transaction has committed.
+        """
+        with self.pool.connection() as conn:
+            pending = conn.execute('''
+                SELECT id, file_path FROM projects
+                WHERE content_hash IS NULL AND file_path != ''
+            ''').fetchall()
+        
+        result = {'migrated': 0, 'missing': 0}
+        for row in pending:
+            try:
+                with open(row['file_path'], 'r') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                result['missing'] += 1
+                continue
+            
+            with self.pool.transaction() as conn:
+                cursor = conn.cursor()
+                content_key = put_blob(cursor, content)
+                cursor.execute('''
+                    UPDATE projects SET content_hash = ?, file_path = ''
+                    WHERE id = ? AND content_hash IS NULL
+                ''', (content_key, row['id']))
+                if cursor.rowcount == 0:
+                    # Migrated concurrently: undo the extra reference
+                    release_blob(cursor, content_key)
+                    continue
+                if self.search_content:
+                    set_indexed_content(cursor, row['id'], content)
+            result['migrated'] += 1
+            if delete_files:
+                os.remove(row['file_path'])
+        return result
+    
+    def _attach_content(self, project: Dict):
+        """Set project['content'] from the joined blob, or a legacy file"""
+        data = project.pop('content_data', None)
+        compression = project.pop('content_compression', None)
+        if data is not None:
+            project['content'] = decode(data, compression)
+            return
+        try:
+            with open(project['file_path'], 'r') as f:
+                project['content'] = f.read()
+        except (FileNotFoundError, IsADirectoryError):
+            project['content'] = "# File not found"
+    
     def _count_languages(self, content: str) -> int:
         """Count the number of #lang: directives in content"""
         return content.count('#lang:')
@@ -443,4 +682,5 @@ console.log("JS received:", message);
     stats = db.get_stats()
     print(f"✅ Database stats: {stats}")
     
+    db.close()
     print("\n🎉 Database tests completed successfully!")
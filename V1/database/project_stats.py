@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained statistics for PolyRun projects
+Triggers keep counters in project_stats (and per language_count rows in
+language_count_stats) up to date inside the transaction that changes
+projects, shared_links or blobs, so reading them costs the same at any
+database size. Languages come from #lang: directives: the application
+records them in project_languages (blobs are compressed, so a trigger
+cannot parse them) and triggers count projects per language.
+"""
+
+import re
+from typing import List
+
+# Counters in project_stats, in get_stats() order
+COUNTERS = ['total_projects', 'public_projects', 'active_shares',
+            'content_blobs', 'content_bytes', 'stored_bytes']
+
+STATS_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS project_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID',
+    '''
+    CREATE TABLE IF NOT EXISTS language_count_stats (
+        language_count INTEGER PRIMARY KEY,
+        projects INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS project_languages (
+        project_id TEXT NOT NULL,
+        language TEXT NOT NULL,
+        PRIMARY KEY (project_id, language),
+        FOREIGN KEY (project_id) REFERENCES projects (id)
+    ) WITHOUT ROWID
+    ''',
+    'CREATE TABLE IF NOT EXISTS language_stats (language TEXT PRIMARY KEY, projects INTEGER NOT NULL) WITHOUT ROWID',
+
+    # Projects
+    '''
+    CREATE TRIGGER IF NOT EXISTS project_stats_insert AFTER INSERT ON projects BEGIN
+        UPDATE project_stats SET value = value + 1 WHERE name = 'total_projects';
+        UPDATE project_stats SET value = value + 1 WHERE name = 'public_projects' AND new.is_public;
+        INSERT INTO language_count_stats (language_count, projects) VALUES (new.language_count, 1)
+            ON CONFLICT(language_count) DO UPDATE SET projects = projects + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS project_stats_delete AFTER DELETE ON projects BEGIN
+        UPDATE project_stats SET value = value - 1 WHERE name = 'total_projects';
+        UPDATE project_stats SET value = value - 1 WHERE name = 'public_projects' AND old.is_public;
+        UPDATE language_count_stats SET projects = projects - 1 WHERE language_count IS old.language_count;
+        DELETE FROM language_count_stats WHERE projects <= 0;
+        DELETE FROM project_languages WHERE project_id = old.id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS project_stats_public AFTER UPDATE OF is_public ON projects
+    WHEN new.is_public IS NOT old.is_public BEGIN
+        UPDATE project_stats SET value = value + (CASE WHEN new.is_public THEN 1 ELSE -1 END)
+        WHERE name = 'public_projects';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS project_stats_language_count AFTER UPDATE OF language_count ON projects
+    WHEN new.language_count IS NOT old.language_count BEGIN
+        UPDATE language_count_stats SET projects = projects - 1 WHERE language_count IS old.language_count;
+        DELETE FROM language_count_stats WHERE projects <= 0;
+        INSERT INTO language_count_stats (language_count, projects) VALUES (new.language_count, 1)
+            ON CONFLICT(language_count) DO UPDATE SET projects = projects + 1;
+    END
+    ''',
+
+    # Languages
+    '''
+    CREATE TRIGGER IF NOT EXISTS language_stats_insert AFTER INSERT ON project_languages BEGIN
+        INSERT INTO language_stats (language, projects) VALUES (new.language, 1)
+            ON CONFLICT(language) DO UPDATE SET projects = projects + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS language_stats_delete AFTER DELETE ON project_languages BEGIN
+        UPDATE language_stats SET projects = projects - 1 WHERE language = old.language;
+        DELETE FROM language_stats WHERE language = old.language AND projects <= 0;
+    END
+    ''',
+
+    # Share links
+    '''
+    CREATE TRIGGER IF NOT EXISTS share_stats_insert AFTER INSERT ON shared_links WHEN new.is_active BEGIN
+        UPDATE project_stats SET value = value + 1 WHERE name = 'active_shares';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS share_stats_delete AFTER DELETE ON shared_links WHEN old.is_active BEGIN
+        UPDATE project_stats SET value = value - 1 WHERE name = 'active_shares';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS share_stats_active AFTER UPDATE OF is_active ON shared_links
+    WHEN new.is_active IS NOT old.is_active BEGIN
+        UPDATE project_stats SET value = value + (CASE WHEN new.is_active THEN 1 ELSE -1 END)
+        WHERE name = 'active_shares';
+    END
+    ''',
+
+    # Blobs (rows are inserted and deleted, never rewritten)
+    '''
+    CREATE TRIGGER IF NOT EXISTS blob_stats_insert AFTER INSERT ON blobs BEGIN
+        UPDATE project_stats SET value = value + 1 WHERE name = 'content_blobs';
+        UPDATE project_stats SET value = value + new.size WHERE name = 'content_bytes';
+        UPDATE project_stats SET value = value + LENGTH(new.data) WHERE name = 'stored_bytes';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS blob_stats_delete AFTER DELETE ON blobs BEGIN
+        UPDATE project_stats SET value = value - 1 WHERE name = 'content_blobs';
+        UPDATE project_stats SET value = value - old.size WHERE name = 'content_bytes';
+        UPDATE project_stats SET value = value - LENGTH(old.data) WHERE name = 'stored_bytes';
+    END
+    ''',
+]
+
+LANG_DIRECTIVE = re.compile(r'^\s*#lang:([^:\n]*)', re.MULTILINE)
+
+
+def parse_languages(content: str) -> List[str]:
+    """Distinct languages of a .mix source's #lang: blocks, lower-cased"""
+    languages = (match.group(1).strip().lower() for match in LANG_DIRECTIVE.finditer(content))
+    return list(dict.fromkeys(language for language in languages if language))
+
+
+def set_project_languages(cursor, project_id: str, content: str):
+    """Record the languages a project's source uses"""
+    cursor.execute('DELETE FROM project_languages WHERE project_id = ?', (project_id,))
+    cursor.executemany('INSERT INTO project_languages (project_id, language) VALUES (?, ?)',
+                       [(project_id, language) for language in parse_languages(content)])
+
+
+def recount_stats(cursor):
+    """
+    Recompute every counter from the underlying tables
+
+    The triggers keep them exact afterwards; this is for databases that
+    predate them (project_languages must already be filled).
+    """
+    cursor.execute('DELETE FROM project_stats')
+    cursor.execute('''
+        INSERT INTO project_stats (name, value)
+        SELECT 'total_projects', COUNT(*) FROM projects
+        UNION ALL SELECT 'public_projects', COUNT(*) FROM projects WHERE is_public
+        UNION ALL SELECT 'active_shares', COUNT(*) FROM shared_links WHERE is_active
+        UNION ALL SELECT 'content_blobs', COUNT(*) FROM blobs
+        UNION ALL SELECT 'content_bytes', COALESCE(SUM(size), 0) FROM blobs
+        UNION ALL SELECT 'stored_bytes', COALESCE(SUM(LENGTH(data)), 0) FROM blobs
+    ''')
+    cursor.execute('DELETE FROM language_count_stats')
+    cursor.execute('''
+        INSERT INTO language_count_stats (language_count, projects)
+        SELECT language_count, COUNT(*) FROM projects GROUP BY language_count
+    ''')
+    cursor.execute('DELETE FROM language_stats')
+    cursor.execute('''
+        INSERT INTO language_stats (language, projects)
+        SELECT language, COUNT(*) FROM project_languages GROUP BY language
+    ''')
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Project/tag relation for PolyRun projects
+project_tags links projects to rows of the tags table so tag filters are
+index lookups rather than scans of the projects.tags JSON (which is kept
+for returning each project's tags in order); tags.usage_count is the
+number of projects carrying the tag and tags nobody uses are removed
+"""
+
+from typing import Iterable, List
+
+PROJECT_TAGS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS project_tags (
+        project_id TEXT NOT NULL,
+        tag_id INTEGER NOT NULL,
+        PRIMARY KEY (project_id, tag_id),
+        FOREIGN KEY (project_id) REFERENCES projects (id),
+        FOREIGN KEY (tag_id) REFERENCES tags (id)
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_project_tags_tag ON project_tags (tag_id, project_id)',
+]
+
+# Condition on a projects.id column: the project has the tag bound to ?
+HAS_TAG = '''IN (
+    SELECT pt.project_id FROM project_tags pt JOIN tags t ON t.id = pt.tag_id WHERE t.name = ?
+)'''
+
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Tags without duplicates, in their original order"""
+    return list(dict.fromkeys(tags or []))
+
+
+def set_project_tags(cursor, project_id: str, tags: Iterable[str]):
+    """Make project_id carry exactly tags, adjusting usage counts"""
+    wanted = normalize_tags(tags)
+    current = [row[0] for row in cursor.execute('''
+        SELECT t.name FROM project_tags pt JOIN tags t ON t.id = pt.tag_id
+        WHERE pt.project_id = ?
+    ''', (project_id,))]
+
+    for tag in wanted:
+        if tag in current:
+            continue
+        cursor.execute('''
+            INSERT INTO tags (name, usage_count)
+            VALUES (?, 1)
+            ON CONFLICT(name) DO UPDATE SET usage_count = usage_count + 1
+        ''', (tag,))
+        cursor.execute('''
+            INSERT INTO project_tags (project_id, tag_id)
+            SELECT ?, id FROM tags WHERE name = ?
+        ''', (project_id, tag))
+
+    removed = [tag for tag in current if tag not in wanted]
+    for tag in removed:
+        cursor.execute('''
+            DELETE FROM project_tags
+            WHERE project_id = ? AND tag_id = (SELECT id FROM tags WHERE name = ?)
+        ''', (project_id, tag))
+        cursor.execute('UPDATE tags SET usage_count = usage_count - 1 WHERE name = ?', (tag,))
+    if removed:
+        cursor.execute('DELETE FROM tags WHERE usage_count <= 0')
+
+
+def rebuild_project_tags(cursor):
+    """
+    Re-create project_tags from the projects.tags JSON and recount usage
+
+    For databases that predate the relation, whose counts were never
+    decremented when projects were deleted or retagged.
+    """
+    cursor.execute('DELETE FROM project_tags')
+    cursor.execute('''
+        INSERT OR IGNORE INTO tags (name, usage_count)
+        SELECT DISTINCT j.value, 0 FROM projects p, json_each(p.tags) j
+        WHERE json_valid(p.tags) AND j.type = 'text'
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO project_tags (project_id, tag_id)
+        SELECT p.id, t.id FROM projects p, json_each(p.tags) j
+        JOIN tags t ON t.name = j.value
+        WHERE json_valid(p.tags) AND j.type = 'text'
+    ''')
+    cursor.execute('''
+        UPDATE tags SET usage_count = (SELECT COUNT(*) FROM project_tags WHERE tag_id = tags.id)
+    ''')
+    cursor.execute('DELETE FROM tags WHERE usage_count <= 0')
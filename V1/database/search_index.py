@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+FTS5 full-text index over PolyRun projects
+projects_fts mirrors each project's name, description and tags through
+triggers, keyed by the project's rowid; the body column holds the .mix
+source when content search is enabled (blobs are compressed, so the
+application fills it rather than a trigger)
+"""
+
+import re
+
+try:
+    from .project_tags import HAS_TAG
+except ImportError:
+    from project_tags import HAS_TAG
+
+# bm25 weights for name, description, tags, body
+RANK_WEIGHTS = (10.0, 4.0, 6.0, 1.0)
+
+SEARCH_SCHEMA = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+        name, description, tags, body,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO projects_fts (rowid, name, description, tags, body)
+        VALUES (new.rowid, new.name, new.description, new.tags, '');
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS projects_fts_update AFTER UPDATE OF name, description, tags ON projects BEGIN
+        UPDATE projects_fts SET name = new.name, description = new.description, tags = new.tags
+        WHERE rowid = new.rowid;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects BEGIN
+        DELETE FROM projects_fts WHERE rowid = old.rowid;
+    END
+    ''',
+]
+
+# Projects ranked by relevance; the MATCH runs first, filters after
+SEARCH_QUERY = f'''
+    SELECT p.* FROM projects_fts f
+    JOIN projects p ON p.rowid = f.rowid
+    WHERE projects_fts MATCH ? AND (? IS NULL OR p.is_public = ?) AND (? IS NULL OR p.id {HAS_TAG})
+    ORDER BY bm25(projects_fts, {', '.join(map(str, RANK_WEIGHTS))}), p.created_at DESC
+    LIMIT ? OFFSET ?
+'''
+
+
+def fts_query(text: str, prefix: bool = True):
+    """
+    Turn free text into an FTS5 query matching every word
+
+    Words are quoted so operators and punctuation in user input are
+    literal; with prefix each word also matches longer words
+    ("num" finds "numpy"). Returns None when text has no words.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    suffix = '*' if prefix else ''
+    return ' '.join(f'"{word}"{suffix}' for word in words)
+
+
+def set_indexed_content(cursor, project_id: str, content: str):
+    """Index a project's .mix source for content search"""
+    cursor.execute('''
+        UPDATE projects_fts SET body = ?
+        WHERE rowid = (SELECT rowid FROM projects WHERE id = ?)
+    ''', (content, project_id))
+
+
+def rebuild_index(cursor):
+    """
+    Re-create index rows from projects (bodies are left empty)
+
+    Needed for databases that predate the index, and after VACUUM, which
+    may renumber the rowids the index is keyed by.
+    """
+    cursor.execute('DELETE FROM projects_fts')
+    cursor.execute('''
+        INSERT INTO projects_fts (rowid, name, description, tags, body)
+        SELECT rowid, name, description, tags, '' FROM projects
+    ''')
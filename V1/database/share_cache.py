@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Share-link caching with write-behind access counting
+Resolved share tokens are kept in memory for a few seconds, and accesses
+are tallied per token and written in one batched transaction on an
+interval (and on close) instead of one UPDATE per view
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Matches SQLite's CURRENT_TIMESTAMP, so expiry compares like the SQL check
+SQL_TIMESTAMP = '%Y-%m-%d %H:%M:%S'
+
+
+def utc_timestamp():
+    return datetime.now(timezone.utc).strftime(SQL_TIMESTAMP)
+
+
+class ShareLinkCache:
+    """
+    Thread-safe least-recently-used cache of share token -> project with
+    a time to live; entries also lapse when their link's expires_at passes
+    """
+
+    def __init__(self, ttl=60.0, max_entries=1024, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                deadline, expires_at, project = entry
+                if self._clock() < deadline and not (expires_at and expires_at <= utc_timestamp()):
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return project
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def put(self, token, project, expires_at=None):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (self._clock() + self.ttl, expires_at, project)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_project(self, project_id):
+        """Drop every cached link to a project (after it changes)"""
+        with self._lock:
+            for token in [token for token, entry in self._entries.items() if entry[2]['project_id'] == project_id]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class AccessCounts:
+    """Per-token access tallies waiting to be written"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, token, count=1):
+        with self._lock:
+            self._counts[token] += count
+
+    def drain(self):
+        """Take the pending tallies, leaving none"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return counts
+
+    def restore(self, counts):
+        """Put back tallies whose write failed"""
+        with self._lock:
+            self._counts.update(counts)
+
+    def pending(self):
+        with self._lock:
+            return sum(self._counts.values())
+
+
+class PeriodicFlusher:
+    """Daemon thread calling flush every interval seconds, and once more on stop"""
+
+    def __init__(self, interval, flush, name='polyrun-share-flusher'):
+        self.interval = interval
+        self.flush = flush
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # Counts were restored; the next interval retries them
+                logger.warning("Share access flush failed: %s", e)
@@ -4,11 +4,13 @@ from parser import parse_mix_file, validate_mix_file, consolidate_language_block
 from datetime import datetime
 import json
 import argparse
-import importlib
 import logging
 import time
-import psutil
-from runners.plugin_manager import PluginManager
+from runners.plugin_manager import get_plugin_manager
+
+# Heavy modules (docker SDK, psutil, runner modules) are imported on first
+# use so a trivial mix starts running its first block quickly; see
+# tests/test_startup.py for the import budget
 
 def load_config(path='config.json'):
     with open(path, 'r') as f:
@@ -16,8 +18,8 @@ def load_config(path='config.json'):
 
 def get_runner(language, use_docker=False, config=None):
     """Get appropriate runner based on Docker availability and config"""
-    # Initialize plugin manager
-    plugin_manager = PluginManager(config)
+    # Shared plugin manager (runners are loaded on first use)
+    plugin_manager = get_plugin_manager(config)
     
     if use_docker and config and config.get('docker_enabled', False):
         try:
@@ -25,7 +27,8 @@ def get_runner(language, use_docker=False, config=None):
             docker_runner = DockerRunner(config)
             
             # Return a lambda that calls the docker runner with the right signature
-            return lambda code, cfg: docker_runner.run_code(code, language, cfg)
+            return lambda code, cfg, import_data=None, export_vars=None: docker_runner.run_code(
+                code, language, cfg, import_data, export_vars)
         except ImportError as e:
             logging.warning(f"Docker runner not available: {e}, falling back to local execution")
     
@@ -35,26 +38,48 @@ def get_runner(language, use_docker=False, config=None):
         return lambda code, cfg, import_data=None, export_vars=None: runner.run(code, import_data, export_vars)
     
     # Fallback to legacy runners for compatibility
+    import importlib
     try:
         runner_module = importlib.import_module(f"runners.{language}_runner")
         return runner_module.run_code
     except ImportError:
         return None
 
-def setup_logging(config, timestamp):
-    """Setup structured logging"""
+def docker_endpoint_configured():
+    """
+    Cheap check for a Docker daemon endpoint, done before importing the SDK
+    A remote DOCKER_HOST is assumed reachable; the default socket must exist
+    """
+    docker_host = os.environ.get('DOCKER_HOST', '')
+    if docker_host and not docker_host.startswith('unix://'):
+        return True
+    socket_path = docker_host[len('unix://'):] if docker_host else '/var/run/docker.sock'
+    return os.path.exists(socket_path)
+
+def current_memory():
+    """Resident set size of this process in bytes"""
+    try:
+        # Linux: avoids importing psutil for a single number
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+
+def setup_logging(config, timestamp, log_to_file=False):
+    """Setup structured logging; the output/run_<timestamp>.log copy is opt-in"""
     log_level = config.get('log_level', 'INFO')
+    handlers = [logging.StreamHandler()]
     
-    # Create output directory if it doesn't exist
-    os.makedirs('output', exist_ok=True)
+    if log_to_file or config.get('log_to_file', False):
+        # Create output directory if it doesn't exist
+        os.makedirs('output', exist_ok=True)
+        handlers.insert(0, logging.FileHandler(f'output/run_{timestamp}.log'))
     
     logging.basicConfig(
         level=getattr(logging, log_level),
         format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(f'output/run_{timestamp}.log'),
-            logging.StreamHandler()
-        ]
+        handlers=handlers
     )
     return logging.getLogger(__name__)
 
@@ -67,6 +92,7 @@ def main():
     parser.add_argument('--docker', action='store_true', help='Force Docker execution (if available)')
     parser.add_argument('--no-docker', action='store_true', help='Disable Docker execution')
     parser.add_argument('--no-consolidate', action='store_true', help='Disable header consolidation for C/C++')
+    parser.add_argument('--log-file', action='store_true', help='Also write the log to output/run_<timestamp>.log')
     
     args = parser.parse_args()
     
@@ -79,7 +105,7 @@ def main():
     
     # Setup logging
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    logger = setup_logging(config, timestamp)
+    logger = setup_logging(config, timestamp, args.log_file)
     
     # Log execution mode
     if use_docker:
@@ -120,6 +146,9 @@ def main():
     
     # Initialize Docker runner if needed
     docker_runner = None
+    if use_docker and not docker_endpoint_configured():
+        logger.warning("❌ Docker not available, falling back to local execution")
+        use_docker = False
     if use_docker:
         try:
             from runners.docker_runner import DockerRunner
@@ -128,6 +157,8 @@ def main():
             
             if docker_status["available"]:
                 logger.info("✅ Docker runtime ready for secure execution")
+                # One container per language for the whole mix
+                docker_runner.start_session()
             else:
                 logger.warning("❌ Docker not available, falling back to local execution")
                 use_docker = False
@@ -137,12 +168,11 @@ def main():
     
     # Execute each block
     total_start_time = time.time()
-    process = psutil.Process(os.getpid())
-    initial_memory = process.memory_info().rss
+    initial_memory = current_memory()
     
     # Initialize data store for inter-block communication
     shared_data = {}
-    plugin_manager = PluginManager(config)
+    plugin_manager = get_plugin_manager(config)
     
     for i, block in enumerate(blocks):
         lang = block['language']
@@ -178,13 +208,19 @@ def main():
                 "memory_used": 0
             }
         else:
-            # Use plugin manager directly
             try:
-                block_start_memory = process.memory_info().rss
-                result = plugin_manager.run_code(lang, code, import_data, export_vars)
-                logger.debug(f"Plugin manager result: {result}")
-                block_end_memory = process.memory_info().rss
-                result['memory_used'] = block_end_memory - block_start_memory
+                if use_docker and docker_runner:
+                    # Containerized execution with import/export data passing
+                    result = docker_runner.run_code(code, lang, config, import_data, export_vars)
+                    logger.debug(f"Docker runner result: {result}")
+                else:
+                    # Use plugin manager directly
+                    block_start_memory = current_memory()
+                    result = plugin_manager.run_code(lang, code, import_data, export_vars,
+                                                     cacheable=block.get('cache', False))
+                    logger.debug(f"Plugin manager result: {result}")
+                    block_end_memory = current_memory()
+                    result['memory_used'] = block_end_memory - block_start_memory
                 
                 # Handle exported data
                 if result.get('exported_data'):
@@ -212,7 +248,8 @@ def main():
         if result.get('success', result.get('return_code') == 0):
             container_info = " (🐳 Docker)" if result.get('container_used', False) else " (🖥️ Local)"
             security_info = " [🔒 Security Validated]" if result.get('security_blocked') is False else ""
-            logger.info(f"Block {i+1} completed successfully in {result.get('execution_time', 0):.3f}s{container_info}{security_info}")
+            cache_info = " [♻️ Cached]" if result.get('cache_hit') else ""
+            logger.info(f"Block {i+1} completed successfully in {result.get('execution_time', 0):.3f}s{container_info}{security_info}{cache_info}")
             if result.get('output'):
                 logger.info(f"Output:\n{result['output']}")
         else:
@@ -224,14 +261,25 @@ def main():
         # Display memory usage if available
         if result.get('memory_used', 0) > 0:
             logger.info(f"Memory used: {result['memory_used']/1024:.1f}KB")
+        
+        # Container resource statistics (Docker mode)
+        resource_stats = result.get('resource_stats')
+        if resource_stats:
+            logger.info(f"📊 Container stats: peak memory {resource_stats['peak_memory_bytes']/1024:.1f}KB, "
+                        f"CPU {resource_stats['cpu_time_seconds']:.3f}s, peak pids {resource_stats['peak_pids']}")
+            if resource_stats.get('cpu_throttled_periods'):
+                logger.warning(f"⏱️  Block {i+1} was CPU-throttled in {resource_stats['cpu_throttled_periods']}/"
+                               f"{resource_stats['cpu_periods']} periods "
+                               f"({resource_stats['cpu_throttled_time_seconds']:.3f}s)")
     
     # Cleanup containers if Docker was used
     if use_docker and docker_runner:
+        docker_runner.end_session()
         docker_runner.cleanup_containers()
     
     # Final summary
     total_time = time.time() - total_start_time
-    final_memory = process.memory_info().rss
+    final_memory = current_memory()
     total_memory = final_memory - initial_memory
     
     logger.info(f"Execution completed in {total_time:.3f}s")
@@ -1,3 +1,5 @@
+from runners.metrics import observe_stage
+
 def validate_mix_file(blocks):
     errors = []
     for i, block in enumerate(blocks):
@@ -76,12 +78,14 @@ def consolidate_language_blocks(blocks):
                 "start_line": block.get("start_line", 1),
                 "imports": set(),  # Collect all imports
                 "exports": set(),  # Collect all exports
+                "cache": True,  # Only cacheable if every merged block is
                 "code": []
             }
         
         # Add imports and exports
         consolidated[lang]["imports"].update(imports)
         consolidated[lang]["exports"].update(exports)
+        consolidated[lang]["cache"] = consolidated[lang]["cache"] and block.get("cache", False)
         
         if lang.lower() in ['cpp', 'c', 'c++']:
             # Extract headers and main function body
@@ -145,7 +149,8 @@ def consolidate_language_blocks(blocks):
             "start_line": data["start_line"],
             "consolidated": True,
             "imports": list(data.get("imports", [])),
-            "exports": list(data.get("exports", []))
+            "exports": list(data.get("exports", [])),
+            "cache": data["cache"]
         })
     
     return result
@@ -202,11 +207,15 @@ def build_cpp_code(data):
 
 
 def parse_mix_file(file_path):
+    with observe_stage('mix', 'parse'):
+        return _parse_mix_file(file_path)
+
+def _parse_mix_file(file_path):
     with open(file_path, 'r') as f:
         lines = f.readlines()
 
     blocks = []
-    current_block = {"language": None, "code": [], "start_line": None, "imports": [], "exports": []}
+    current_block = {"language": None, "code": [], "start_line": None, "imports": [], "exports": [], "cache": False}
     recording = False
     
     for line_num, line in enumerate(lines, 1):
@@ -220,7 +229,8 @@ def parse_mix_file(file_path):
                     "code": "".join(current_block["code"]).strip(),
                     "start_line": current_block["start_line"],
                     "imports": current_block["imports"],
-                    "exports": current_block["exports"]
+                    "exports": current_block["exports"],
+                    "cache": current_block["cache"]
                 })
             
             # Start new block
@@ -229,7 +239,8 @@ def parse_mix_file(file_path):
                 "code": [],
                 "start_line": line_num,
                 "imports": [],
-                "exports": []
+                "exports": [],
+                "cache": False
             }
             recording = True
             
@@ -242,6 +253,11 @@ def parse_mix_file(file_path):
         elif line_stripped.startswith("#export:") and recording:
             export_vars = line_stripped.replace("#export:", "").strip()
             current_block["exports"].extend([var.strip() for var in export_vars.split(",") if var.strip()])
+        
+        # Check for cache directive (opt-in result memoization)
+        elif (line_stripped == "#cache" or line_stripped.startswith("#cache:")) and recording:
+            cache_value = line_stripped.replace("#cache", "").lstrip(":").strip().lower()
+            current_block["cache"] = cache_value not in ("false", "no", "off", "0")
             
         elif recording:
             current_block["code"].append(line)
@@ -253,7 +269,8 @@ def parse_mix_file(file_path):
             "code": "".join(current_block["code"]).strip(),
             "start_line": current_block["start_line"],
             "imports": current_block["imports"],
-            "exports": current_block["exports"]
+            "exports": current_block["exports"],
+            "cache": current_block["cache"]
         })
 
     return blocks
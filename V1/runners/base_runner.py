@@ -1,20 +1,37 @@
 # Base Runner Class for PolyRun
 import os
+import shutil
+import subprocess
 import tempfile
 from abc import ABC, abstractmethod
 
+# Prefix of the per-run directories holding source, binaries and __export__.json
+RUN_DIR_PREFIX = 'polyrun-run-'
+
 class BaseRunner(ABC):
     """
     Abstract base class for all language runners
     Provides common functionality and interface
     """
     
+    # Command printing the toolchain version (used for result cache keys)
+    version_command = None
+    
+    # Plugin manifest metadata: extra language names and feature flags
+    # (e.g. 'imports', 'exports'), read once when the plugin index is built
+    aliases = ()
+    capabilities = ()
+    
+    # Toolchain versions are resolved once per process and shared by all instances
+    _toolchain_versions = {}
+    
     def __init__(self, config=None):
         self.config = config or {}
         self.timeout = self.config.get('timeout', 30)
         self.memory_limit = self.config.get('memory_limit', '512m')
         self.language = None
         self.file_extension = None
+        self._sandbox = None
         
     @abstractmethod
     def run(self, code, import_data=None, export_vars=None):
@@ -46,12 +63,100 @@ class BaseRunner(ABC):
         except OSError:
             pass
     
+    def make_run_dir(self):
+        """Private directory for one run, so concurrent runs never share export files"""
+        return tempfile.mkdtemp(prefix=RUN_DIR_PREFIX)
+    
+    def remove_run_dir(self, path):
+        """Remove a directory created by make_run_dir (anything else is left alone)"""
+        if os.path.basename(path).startswith(RUN_DIR_PREFIX):
+            shutil.rmtree(path, ignore_errors=True)
+    
+    def get_execution_mode(self):
+        """How child processes run: 'local' or 'sandbox' (config "execution_modes")"""
+        return self.config.get('execution_modes', {}).get(self.language, 'local')
+    
+    def run_process(self, command, timeout, env=None, files=(), collect=(), stage='run'):
+        """
+        Run a child process in this language's execution mode
+        Same contract as subprocess.run with captured text output
+        
+        Args:
+            command: Command line to run
+            timeout: Wall clock limit in seconds
+            env: Environment for the child (defaults to os.environ)
+            files: Host files the command needs (copied into the sandbox)
+            collect: Files the command may create that the runner reads back
+            stage: Stage label for the duration metrics ('run' or 'compile')
+        
+        Output is also streamed live to a listener installed with
+        process_stream.stream_output() on the calling thread, and the child
+        is killed if a token installed with cancellation.cancellable() is
+        cancelled.
+        """
+        from .process_stream import current_listener
+        from .cancellation import current_token
+        from .metrics import PROCESSES_STARTED, PROCESSES_RUNNING, TIMEOUTS, observe_stage
+        listener = current_listener()
+        token = current_token()
+        if listener is not None:
+            # Interpreters block-buffer piped stdout; flush as the code prints
+            env = dict(os.environ if env is None else env, PYTHONUNBUFFERED='1')
+        
+        mode = self.get_execution_mode()
+        PROCESSES_STARTED.inc(self.language, mode)
+        PROCESSES_RUNNING.inc(self.language)
+        try:
+            with observe_stage(self.language, stage):
+                return self._launch(command, timeout, env, files, collect, mode, listener, token)
+        except subprocess.TimeoutExpired:
+            TIMEOUTS.inc(self.language)
+            raise
+        finally:
+            PROCESSES_RUNNING.dec(self.language)
+    
+    def _launch(self, command, timeout, env, files, collect, mode, listener, token):
+        """Start the child in the sandbox or locally and wait for it"""
+        if mode == 'sandbox':
+            from .sandbox import Sandbox, SandboxUnavailable
+            # No upfront probe: the first run tells whether namespaces work
+            if Sandbox._available is not False:
+                if self._sandbox is None:
+                    self._sandbox = Sandbox(self.config, self.language)
+                try:
+                    return self._sandbox.run(command, timeout, env=env, files=files, collect=collect)
+                except SandboxUnavailable:
+                    pass
+        if listener is not None or token is not None:
+            from .process_stream import run_streaming
+            return run_streaming(command, timeout, listener, env=env, token=token)
+        return subprocess.run(command, capture_output=True, text=True, timeout=timeout, env=env)
+    
+    def get_import_environment(self, import_data=None):
+        """Extra environment variables needed to pass imported data (none by default)"""
+        return {}
+    
     def validate_code(self, code):
         """Basic code validation - can be overridden by subclasses"""
         if not code or not code.strip():
             return False, "Empty code block"
         return True, ""
     
+    def get_toolchain_version(self):
+        """Get the first line of the toolchain version output (cached per process)"""
+        if not self.version_command:
+            return None
+        
+        command = tuple(self.version_command)
+        if command not in BaseRunner._toolchain_versions:
+            try:
+                result = subprocess.run(list(command), capture_output=True, text=True, timeout=10)
+                output = (result.stdout or result.stderr).strip()
+                BaseRunner._toolchain_versions[command] = output.splitlines()[0] if output else None
+            except (OSError, subprocess.SubprocessError):
+                BaseRunner._toolchain_versions[command] = None
+        return BaseRunner._toolchain_versions[command]
+    
     def get_runner_info(self):
         """Get information about this runner"""
         return {
@@ -4,12 +4,15 @@ import tempfile
 import os
 import json
 from .base_runner import BaseRunner
+from .metrics import observe_stage
 
 class BashRunner(BaseRunner):
     """
     Bash script runner with environment variable data passing
     """
     
+    version_command = ['bash', '--version']
+    
     def __init__(self, config=None):
         super().__init__(config)
         self.language = "bash"
@@ -42,7 +45,8 @@ class BashRunner(BaseRunner):
         enhanced_code = self._prepare_code(code, import_data, export_vars)
         
         # Create temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix=self.file_extension, delete=False) as f:
+        with tempfile.NamedTemporaryFile(mode='w', suffix=self.file_extension, delete=False,
+                                         dir=self.make_run_dir()) as f:
             f.write(enhanced_code)
             temp_file = f.name
         
@@ -51,27 +55,28 @@ class BashRunner(BaseRunner):
         
         # Prepare environment with imported data
         env = os.environ.copy()
-        if import_data:
-            for key, value in import_data.items():
-                env[f'IMPORT_{key.upper()}'] = str(value)
+        env.update(self.get_import_environment(import_data))
         
         try:
             # Execute the bash script
-            result = subprocess.run(
+            export_file = os.path.join(os.path.dirname(temp_file), "__export__.json")
+            result = self.run_process(
                 ['bash', temp_file],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout,
-                env=env
+                self.timeout,
+                env=env,
+                files=[temp_file],
+                collect=[export_file]
             )
             
             # Read exported data if available
-            exported_data = self._read_exported_data(temp_file)
+            with observe_stage(self.language, 'export'):
+                exported_data = self._read_exported_data(temp_file)
             
             return {
                 'output': result.stdout,
                 'error': result.stderr,
                 'return_code': result.returncode,
+                'truncated': getattr(result, 'truncated', False),
                 'exported_data': exported_data
             }
             
@@ -86,6 +91,10 @@ class BashRunner(BaseRunner):
             # Clean up
             self._cleanup_temp_files(temp_file)
     
+    def get_import_environment(self, import_data=None):
+        """Imported values are passed as IMPORT_<NAME> environment variables"""
+        return {f'IMPORT_{key.upper()}': str(value) for key, value in (import_data or {}).items()}
+    
     def _prepare_code(self, code, import_data=None, export_vars=None):
         """Prepare Bash script with import/export functionality"""
         enhanced_code = ["#!/bin/bash"]
@@ -146,3 +155,4 @@ class BashRunner(BaseRunner):
                 os.remove(export_file)
         except OSError:
             pass
+        self.remove_run_dir(os.path.dirname(temp_file))
@@ -0,0 +1,87 @@
+"""
+Cancellation of in-flight executions
+A CancelToken is installed for the executing thread with cancellable();
+process launches and container execs register how to stop themselves,
+and cancel() runs those callbacks from any thread
+"""
+
+import logging
+import os
+import signal
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class CancelToken:
+    """Cancellation flag plus the callbacks that stop the work in progress"""
+
+    def __init__(self):
+        self._cancelled = False
+        self._callbacks = {}
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """Flag the execution and stop whatever is running (idempotent)"""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = list(self._callbacks.values()), {}
+        for callback in callbacks:
+            _run_callback(callback)
+
+    def on_cancel(self, callback):
+        """
+        Register a callback to stop running work; runs at once if already
+        cancelled. Returns a key for remove().
+        """
+        with self._lock:
+            if not self._cancelled:
+                key = self._next_key
+                self._next_key += 1
+                self._callbacks[key] = callback
+                return key
+        _run_callback(callback)
+        return None
+
+    def remove(self, key):
+        with self._lock:
+            self._callbacks.pop(key, None)
+
+
+def _run_callback(callback):
+    try:
+        callback()
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Cancel callback failed: {e}")
+
+
+@contextmanager
+def cancellable(token):
+    """Make token the cancellation token of work started by this thread"""
+    previous = getattr(_local, 'token', None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+def current_token():
+    """The token installed for this thread, or None"""
+    return getattr(_local, 'token', None)
+
+
+def kill_process_group(process):
+    """SIGKILL a child started with start_new_session and everything it spawned"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
@@ -0,0 +1,341 @@
+"""
+Warm container pool for PolyRun
+Keeps pre-created, locked-down idle containers per language so blocks
+are delivered via copy + exec instead of a full container lifecycle
+"""
+
+import io
+import logging
+import os
+import socket
+import tarfile
+import threading
+import time
+
+from .cancellation import current_token
+
+# Label attached to every container created by PolyRun
+MANAGED_LABEL = 'polyrun.managed'
+POOL_LABEL = 'polyrun.pool'
+
+# Runs as the unprivileged user; PID 1 ignores the SIGKILL from `kill -1`
+RESET_COMMAND = 'kill -9 -1 2>/dev/null; rm -rf {workdir}/* {workdir}/.[!.]* /tmp/* /tmp/.[!.]* 2>/dev/null; true'
+
+
+class PooledContainer:
+    """A warm container owned by the pool"""
+
+    def __init__(self, container, language):
+        self.container = container
+        self.language = language
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.jobs = 0
+
+    @property
+    def id(self):
+        return self.container.id
+
+
+class ContainerPool:
+    """
+    Per-language pool of idle containers
+
+    Containers are started once with the same lockdown options as one-shot
+    runs, execute code with exec_run, and are reset after each job.
+    Containers that fail a health check, time out, or reach
+    max_jobs_per_container are recycled.
+
+    Files go in and out through exec (tar on stdin, cat) rather than the
+    archive API: dockerd refuses put_archive on a read-only rootfs unless
+    the target is a volume, and the archive API does not see inside
+    --tmpfs mounts.
+    """
+
+    def __init__(self, docker_client, security_manager, config):
+        self.docker_client = docker_client
+        self.security_manager = security_manager
+        self.logger = logging.getLogger(__name__)
+
+        pool_config = config.get('docker_pool', {})
+        # When disabled, containers are still created on demand (e.g. for a
+        # mix session) but never kept idle
+        self.enabled = pool_config.get('enabled', False)
+        self.sizes = pool_config.get('sizes', {})
+        self.default_size = pool_config.get('default_size', 1)
+        self.idle_timeout = pool_config.get('idle_timeout_seconds', 300)
+        self.max_jobs = pool_config.get('max_jobs_per_container', 50)
+        self.reap_interval = pool_config.get('reap_interval_seconds', 30)
+        self.workdir = pool_config.get('workdir', '/work')
+        self.tmpfs_size = pool_config.get('tmpfs_size', '100m')
+
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+        self._stop_event = threading.Event()
+
+    def pool_size(self, language):
+        """Maximum number of idle containers kept for a language"""
+        if not self.enabled:
+            return 0
+        return self.sizes.get(language.lower(), self.default_size)
+
+    def image_for(self, language):
+        return f"polyrun-{language.lower()}:latest"
+
+    def prewarm(self, languages=None):
+        """Fill the idle pool for the given (or configured) languages"""
+        for language in languages or list(self.sizes.keys()):
+            while True:
+                with self._lock:
+                    if len(self._idle.get(language, [])) >= self.pool_size(language):
+                        break
+                pooled = self._create(language)
+                with self._lock:
+                    self._idle.setdefault(language, []).append(pooled)
+        self.start_reaper()
+
+    def acquire(self, language, fresh=False):
+        """
+        Take a healthy idle container, or start a new one
+        With fresh, always start a new one (release it with healthy=False
+        so it is never handed to another job)
+        """
+        if fresh:
+            return self._create(language)
+        self.reap_idle()
+        while True:
+            with self._lock:
+                idle = self._idle.get(language, [])
+                pooled = idle.pop() if idle else None
+            if pooled is None:
+                return self._create(language)
+            if self._is_healthy(pooled):
+                return pooled
+            self._destroy(pooled)
+
+    def release(self, pooled, healthy=True):
+        """Return a container to the pool after resetting it, or recycle it"""
+        pooled.jobs += 1
+        pooled.last_used = time.time()
+
+        keep = healthy and pooled.jobs < self.max_jobs and self._reset(pooled)
+        if keep:
+            with self._lock:
+                idle = self._idle.setdefault(pooled.language, [])
+                if len(idle) < self.pool_size(pooled.language):
+                    idle.append(pooled)
+                    return
+        self._destroy(pooled)
+
+    def put_files(self, pooled, files, path=None):
+        """Unpack {name: content} into the container's working directory"""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w') as tar:
+            directories = sorted({os.path.dirname(name) for name in files if os.path.dirname(name)})
+            for directory in directories:
+                info = tarfile.TarInfo(name=directory)
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o755
+                info.uid = info.gid = 1000
+                info.mtime = int(time.time())
+                tar.addfile(info)
+            for name, content in files.items():
+                data = content.encode('utf-8') if isinstance(content, str) else content
+                info = tarfile.TarInfo(name=name)
+                info.size = len(data)
+                info.mode = 0o644
+                info.uid = info.gid = 1000
+                info.mtime = int(time.time())
+                tar.addfile(info, io.BytesIO(data))
+        exit_code = self._exec_with_input(pooled, ['tar', '-x', '-m', '-f', '-', '-C', path or self.workdir],
+                                          buffer.getvalue())
+        if exit_code != 0:
+            raise RuntimeError(f"Copying files into container {pooled.id[:12]} failed (tar exited {exit_code})")
+        return True
+
+    def get_file(self, pooled, path):
+        """Read a single file out of a container, or None if it does not exist"""
+        try:
+            exit_code, output = pooled.container.exec_run(['cat', path], user='runner', demux=True)
+        except Exception:
+            return None
+        if exit_code != 0:
+            return None
+        stdout, _ = output if output else (None, None)
+        return stdout or b''
+
+    def execute(self, pooled, command, timeout, environment=None, workdir=None):
+        """
+        Run a command inside a pooled container
+
+        Returns: dict with exit_code, stdout, stderr, timed_out and (when
+        the current cancellation token fired) cancelled
+        """
+        outcome = {}
+
+        def target():
+            try:
+                exit_code, output = pooled.container.exec_run(
+                    command,
+                    workdir=workdir or self.workdir,
+                    user='runner',
+                    environment=environment or {},
+                    demux=True
+                )
+                stdout, stderr = output if output else (None, None)
+                outcome['exit_code'] = exit_code
+                outcome['stdout'] = (stdout or b'').decode('utf-8', errors='replace')
+                outcome['stderr'] = (stderr or b'').decode('utf-8', errors='replace')
+            except Exception as e:
+                outcome['error'] = e
+
+        worker = threading.Thread(target=target, daemon=True)
+        worker.start()
+        # Cancelling the execution kills the container, which ends the exec
+        token = current_token()
+        cancel_key = token.on_cancel(lambda: self._kill(pooled)) if token is not None else None
+        try:
+            worker.join(timeout)
+        finally:
+            if cancel_key is not None:
+                token.remove(cancel_key)
+
+        if token is not None and token.cancelled:
+            worker.join(5)
+            return {'exit_code': 137, 'stdout': outcome.get('stdout', ''), 'stderr': outcome.get('stderr', ''),
+                    'timed_out': False, 'cancelled': True}
+
+        if worker.is_alive():
+            # The exec cannot be cancelled on its own; kill the whole container
+            self._kill(pooled)
+            worker.join(5)
+            return {'exit_code': 124, 'stdout': '', 'stderr': '', 'timed_out': True}
+
+        if 'error' in outcome:
+            raise outcome['error']
+
+        outcome['timed_out'] = False
+        return outcome
+
+    def reap_idle(self):
+        """Remove containers idle for longer than idle_timeout"""
+        now = time.time()
+        expired = []
+        with self._lock:
+            for language, idle in self._idle.items():
+                keep = []
+                for pooled in idle:
+                    if now - pooled.last_used > self.idle_timeout:
+                        expired.append(pooled)
+                    else:
+                        keep.append(pooled)
+                self._idle[language] = keep
+        for pooled in expired:
+            self._destroy(pooled)
+        return len(expired)
+
+    def start_reaper(self):
+        """Start the background thread that reaps idle containers"""
+        if self._reaper and self._reaper.is_alive():
+            return
+        self._stop_event.clear()
+
+        def loop():
+            while not self._stop_event.wait(self.reap_interval):
+                self.reap_idle()
+
+        self._reaper = threading.Thread(target=loop, name='polyrun-pool-reaper', daemon=True)
+        self._reaper.start()
+
+    def shutdown(self):
+        """Stop the reaper and remove every idle container"""
+        self._stop_event.set()
+        with self._lock:
+            idle = [pooled for containers in self._idle.values() for pooled in containers]
+            self._idle.clear()
+        for pooled in idle:
+            self._destroy(pooled)
+
+    def idle_count(self, language=None):
+        with self._lock:
+            if language:
+                return len(self._idle.get(language, []))
+            return sum(len(idle) for idle in self._idle.values())
+
+    def _create(self, language):
+        limits = self.security_manager.get_resource_limits()
+        container = self.docker_client.containers.run(
+            image=self.image_for(language),
+            command=['sleep', 'infinity'],
+            labels={MANAGED_LABEL: 'true', POOL_LABEL: language},
+            working_dir=self.workdir,
+            mem_limit=limits['mem_limit'],
+            cpu_quota=limits['cpu_quota'],
+            cpu_period=limits['cpu_period'],
+            pids_limit=limits['pids_limit'],
+            network_mode='none',
+            user='runner',
+            detach=True,
+            security_opt=['no-new-privileges'],
+            cap_drop=['ALL'],
+            read_only=True,
+            tmpfs={
+                '/tmp': f'rw,noexec,nosuid,size={self.tmpfs_size}',
+                self.workdir: f'rw,exec,nosuid,size={self.tmpfs_size},uid=1000,gid=1000'
+            }
+        )
+        self.logger.debug(f"Started pooled {language} container {container.id[:12]}")
+        return PooledContainer(container, language)
+
+    def _exec_with_input(self, pooled, command, data):
+        """Run command in the container with data on its stdin; returns the exit code"""
+        api = self.docker_client.api
+        exec_id = api.exec_create(pooled.id, command, stdin=True, user='runner')['Id']
+        stream = api.exec_start(exec_id, socket=True)
+        raw = getattr(stream, '_sock', stream)
+        try:
+            raw.sendall(data)
+            raw.shutdown(socket.SHUT_WR)
+            # Output is only diagnostic; read until the exec closes the stream
+            while raw.recv(65536):
+                pass
+        finally:
+            stream.close()
+        # The exit code can lag the end of the stream slightly
+        for _ in range(50):
+            info = api.exec_inspect(exec_id)
+            if not info.get('Running'):
+                return info.get('ExitCode')
+            time.sleep(0.01)
+        return info.get('ExitCode')
+
+    def _is_healthy(self, pooled):
+        try:
+            pooled.container.reload()
+            return pooled.container.status == 'running'
+        except Exception:
+            return False
+
+    def _reset(self, pooled):
+        try:
+            exit_code, _ = pooled.container.exec_run(
+                ['sh', '-c', RESET_COMMAND.format(workdir=self.workdir)],
+                user='runner'
+            )
+            return exit_code == 0
+        except Exception as e:
+            self.logger.warning(f"Failed to reset container {pooled.id[:12]}: {e}")
+            return False
+
+    def _kill(self, pooled):
+        try:
+            pooled.container.kill()
+        except Exception:
+            pass
+
+    def _destroy(self, pooled):
+        try:
+            pooled.container.remove(force=True)
+        except Exception as e:
+            self.logger.debug(f"Failed to remove container {pooled.id[:12]}: {e}")
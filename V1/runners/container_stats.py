@@ -0,0 +1,118 @@
+"""
+Container resource statistics for PolyRun
+Samples docker stats while a block runs and summarizes peaks and deltas
+"""
+
+import threading
+
+
+def memory_usage(sample):
+    """Memory in use excluding page cache (cgroup v1 and v2 layouts)"""
+    memory_stats = sample.get('memory_stats') or {}
+    usage = memory_stats.get('usage', 0)
+    stats = memory_stats.get('stats') or {}
+    cache = stats.get('inactive_file', stats.get('total_inactive_file', stats.get('cache', 0)))
+    return max(usage - cache, 0)
+
+
+class ContainerStatsSampler:
+    """
+    Polls one-shot container stats on a background thread
+
+    One-shot reads return immediately (no second sample for precpu), so a
+    short interval costs a single API call per tick. CPU time and throttling
+    are reported as deltas from the baseline taken in start(), which keeps
+    numbers per-job even for long-lived pooled containers.
+    """
+
+    def __init__(self, container, interval=0.25, lifetime_peak=True):
+        self.container = container
+        self.interval = interval
+        # cgroup v1 max_usage spans the container lifetime, so pooled
+        # containers must not trust it as a per-job peak
+        self.lifetime_peak = lifetime_peak
+        self.baseline = None
+        self.latest = None
+        self.peak_memory = 0
+        self.peak_pids = 0
+        self.samples = 0
+        self._one_shot = True
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Take the baseline sample and start polling"""
+        self._record(self._read())
+
+        def loop():
+            while not self._stop_event.wait(self.interval):
+                sample = self._read()
+                if sample is None:
+                    break
+                self._record(sample)
+
+        self._thread = threading.Thread(target=loop, name='polyrun-stats', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop polling, take a final sample and return the summary"""
+        if self._stop_event.is_set():
+            return self.summary()
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(max(self.interval * 4, 1))
+        self._record(self._read())
+        return self.summary()
+
+    def summary(self):
+        with self._lock:
+            baseline = self.baseline or {}
+            latest = self.latest or {}
+            base_cpu = (baseline.get('cpu_stats') or {})
+            last_cpu = (latest.get('cpu_stats') or {})
+            base_throttle = base_cpu.get('throttling_data') or {}
+            last_throttle = last_cpu.get('throttling_data') or {}
+            cpu_ns = ((last_cpu.get('cpu_usage') or {}).get('total_usage', 0) -
+                      (base_cpu.get('cpu_usage') or {}).get('total_usage', 0))
+
+            return {
+                'peak_memory_bytes': self.peak_memory,
+                'cpu_time_seconds': max(cpu_ns, 0) / 1e9,
+                'cpu_periods': max(last_throttle.get('periods', 0) - base_throttle.get('periods', 0), 0),
+                'cpu_throttled_periods': max(
+                    last_throttle.get('throttled_periods', 0) - base_throttle.get('throttled_periods', 0), 0),
+                'cpu_throttled_time_seconds': max(
+                    last_throttle.get('throttled_time', 0) - base_throttle.get('throttled_time', 0), 0) / 1e9,
+                'peak_pids': self.peak_pids,
+                'samples': self.samples
+            }
+
+    def _read(self):
+        if self._one_shot:
+            try:
+                return self.container.stats(stream=False, one_shot=True)
+            except Exception:
+                # Older SDK/API without one-shot support; fall back to regular reads
+                self._one_shot = False
+        try:
+            return self.container.stats(stream=False)
+        except Exception:
+            return None
+
+    def _record(self, sample):
+        # Stopped containers report zeroed stats; keep the last live sample
+        if not sample or not ((sample.get('cpu_stats') or {}).get('cpu_usage') or {}).get('total_usage'):
+            return
+        with self._lock:
+            if self.baseline is None:
+                self.baseline = sample
+            self.latest = sample
+            self.samples += 1
+
+            self.peak_memory = max(self.peak_memory, memory_usage(sample))
+            if self.lifetime_peak:
+                max_usage = (sample.get('memory_stats') or {}).get('max_usage', 0)
+                self.peak_memory = max(self.peak_memory, max_usage)
+            self.peak_pids = max(self.peak_pids, (sample.get('pids_stats') or {}).get('current', 0))
@@ -1,21 +1,35 @@
 # C++ Runner for PolyRun
+import hashlib
 import subprocess
 import tempfile
+import threading
 import os
+import shutil
 import time
 import json
 from .base_runner import BaseRunner
+from .metrics import observe_stage
+
+COMPILE_FLAGS = ['-std=c++17']
 
 class CppRunner(BaseRunner):
     """
     C++ code runner with data import/export capabilities
     """
     
+    version_command = ['g++', '--version']
+    
     def __init__(self, config=None):
         super().__init__(config)
         self.language = "cpp"
         self.file_extension = ".cpp"
         
+        # Compiled binaries reused for identical source (see _compile)
+        cache_config = self.config.get('compile_cache', {})
+        self.compile_cache_enabled = cache_config.get('enabled', False)
+        self.compile_cache_dir = cache_config.get('directory', 'cache/binaries')
+        self.compile_cache_entries = cache_config.get('max_entries', 128)
+        
     def run(self, code, import_data=None, export_vars=None):
         """
         Execute C++ code with optional data import/export
@@ -39,7 +53,8 @@ class CppRunner(BaseRunner):
         print("=== END DEBUG ===")
         
         # Create temporary files
-        with tempfile.NamedTemporaryFile(mode='w', suffix=self.file_extension, delete=False) as f:
+        with tempfile.NamedTemporaryFile(mode='w', suffix=self.file_extension, delete=False,
+                                         dir=self.make_run_dir()) as f:
             f.write(enhanced_code)
             cpp_file = f.name
         
@@ -47,12 +62,7 @@ class CppRunner(BaseRunner):
         
         try:
             # Compilation step
-            compile_result = subprocess.run(
-                ['g++', '-std=c++17', cpp_file, '-o', exe_file],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            compile_result = self._compile(cpp_file, exe_file, enhanced_code)
             
             if compile_result.returncode != 0:
                 execution_time = time.time() - start_time
@@ -65,22 +75,25 @@ class CppRunner(BaseRunner):
                 }
             
             # Execution step
-            exec_result = subprocess.run(
+            export_file = os.path.join(os.path.dirname(cpp_file), "__export__.json")
+            exec_result = self.run_process(
                 [exe_file],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout
+                self.timeout,
+                files=[exe_file],
+                collect=[export_file]
             )
             
             execution_time = time.time() - start_time
             
             # Read exported data if available
-            exported_data = self._read_exported_data(cpp_file)
+            with observe_stage(self.language, 'export'):
+                exported_data = self._read_exported_data(cpp_file)
             
             return {
                 'output': exec_result.stdout,
                 'error': exec_result.stderr,
                 'return_code': exec_result.returncode,
+                'truncated': getattr(exec_result, 'truncated', False),
                 'exported_data': exported_data,
                 'execution_time': execution_time
             }
@@ -97,6 +110,52 @@ class CppRunner(BaseRunner):
             # Clean up
             self._cleanup_temp_files(cpp_file, exe_file)
     
+    def _compile(self, cpp_file, exe_file, source):
+        """
+        Compile cpp_file into exe_file
+        
+        With "compile_cache" enabled, binaries are kept under the hash of
+        the toolchain, flags and generated source, so an identical block
+        (the same program submitted again, or many times in one batch)
+        skips g++ entirely.
+        """
+        command = ['g++', *COMPILE_FLAGS, cpp_file, '-o', exe_file]
+        cached = None
+        if self.compile_cache_enabled:
+            key = hashlib.sha256('\0'.join([self.get_toolchain_version() or '', *COMPILE_FLAGS, source])
+                                 .encode('utf-8')).hexdigest()
+            cached = os.path.join(self.compile_cache_dir, key)
+            try:
+                shutil.copy2(cached, exe_file)
+                os.utime(cached)
+                return subprocess.CompletedProcess(command, 0, '', '')
+            except OSError:
+                pass
+        
+        result = self.run_process(command, 30, files=[cpp_file], collect=[exe_file], stage='compile')
+        if cached and result.returncode == 0 and os.path.exists(exe_file):
+            self._store_binary(exe_file, cached)
+        return result
+    
+    def _store_binary(self, exe_file, cached):
+        """Publish a compiled binary to the cache, then trim the oldest entries"""
+        try:
+            os.makedirs(self.compile_cache_dir, exist_ok=True)
+            temp_path = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copy2(exe_file, temp_path)
+            os.replace(temp_path, cached)
+            
+            entries = []
+            with os.scandir(self.compile_cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.tmp'):
+                        entries.append((entry.stat().st_mtime, entry.path))
+            entries.sort()
+            for _, path in entries[:max(0, len(entries) - self.compile_cache_entries)]:
+                self.cleanup_temp_file(path)
+        except OSError:
+            pass
+    
     def _prepare_code(self, code, import_data=None, export_vars=None):
         """Prepare C++ code with import/export functionality"""
         enhanced_code = []
@@ -250,6 +309,7 @@ class CppRunner(BaseRunner):
                 os.remove(export_file)
         except OSError:
             pass
+        self.remove_run_dir(os.path.dirname(cpp_file))
 
 
 # Legacy function for backward compatibility
@@ -9,26 +9,43 @@ import time
 import os
 import logging
 from security.manager import SecurityManager
+from runners.container_pool import ContainerPool, MANAGED_LABEL
+from runners.container_stats import ContainerStatsSampler
+from runners.metrics import TIMEOUTS, observe_stage
 
 class DockerRunner:
-    def __init__(self, config):
+    def __init__(self, config, docker_client=None):
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.security_manager = SecurityManager(config)
+        self.pool = None
+        self.plugin_manager = None
+        
+        # Per-mix session: at most one container per language (see start_session)
+        self._session = None
+        self._session_blocks = 0
         
         # Initialize Docker client
         try:
-            self.docker_client = docker.from_env()
+            self.docker_client = docker_client or docker.from_env()
             self.docker_available = True
             self.logger.info("Docker client initialized successfully")
         except Exception as e:
             self.logger.warning(f"Docker not available: {e}")
             self.docker_available = False
+        
+        # Warm container pool (code is delivered via copy + exec). It is also
+        # used for mix sessions when pooling is disabled, with no idle capacity.
+        if self.docker_available:
+            self.pool = ContainerPool(self.docker_client, self.security_manager, config)
     
-    def run_code(self, code, language, config):
+    def run_code(self, code, language, config, import_data=None, export_vars=None):
         """
         Execute code in a secure Docker container
         Falls back to local execution if Docker is unavailable
+        
+        Imported values and exports use the same glue code as the local
+        runners; files are copied into and out of the container's tmpfs.
         """
         # Validate code safety first
         is_safe, safety_message = self.security_manager.validate_code_safety(code, language)
@@ -44,128 +61,249 @@ class DockerRunner:
                 "security_blocked": True
             }
         
-        if self.docker_available:
-            return self._run_in_docker(code, language, config)
-        else:
+        # With the fast path on, only blocks the analyzer approves take the
+        # cheaper path (pool or mix session); everything else gets a fresh
+        # one-shot container, even inside a session
+        fast_path = self.config.get('security_fast_path', {})
+        approved = None
+        if fast_path.get('enabled', False):
+            approved = self.security_manager.allows_fast_path(code, language)
+        
+        if approved and fast_path.get('mode', 'pool') == 'local':
+            result = self._run_locally(code, language, config, import_data, export_vars)
+        elif not self.docker_available:
             self.logger.warning("Docker unavailable, falling back to local execution")
-            return self._run_locally(code, language, config)
+            result = self._run_locally(code, language, config, import_data, export_vars)
+        elif approved is not False and (self._session is not None or self.pool.enabled):
+            with observe_stage(language, 'run'):
+                result = self._run_in_pool(code, language, config, import_data, export_vars)
+        else:
+            with observe_stage(language, 'run'):
+                result = self._run_in_docker(code, language, config, import_data, export_vars)
+        
+        result['fast_path'] = bool(approved)
+        return result
+    
+    def start_session(self):
+        """
+        Batch the blocks of one mix into at most one container per language
+        
+        Each block runs via exec in its own directory of the container's
+        tmpfs, so compiled artifacts and exchange files live there until
+        end_session() tears the containers down.
+        """
+        self._session = {}
+        self._session_blocks = 0
+    
+    def end_session(self):
+        """Release the session containers (workspace wiped or container removed)"""
+        session, self._session = self._session, None
+        for pooled in (session or {}).values():
+            self.pool.release(pooled)
+    
+    def _acquire(self, language):
+        """Get the session container for a language, or a pooled one"""
+        if self._session is None:
+            return self.pool.acquire(language)
+        key = language.lower()
+        if key not in self._session:
+            self._session[key] = self.pool.acquire(language)
+        return self._session[key]
+    
+    def _release(self, pooled, healthy):
+        """Return a container unless it is pinned to the current session"""
+        if self._session is None:
+            self.pool.release(pooled, healthy=healthy)
+        elif not healthy:
+            self._session.pop(pooled.language.lower(), None)
+            self.pool.release(pooled, healthy=False)
+    
+    def _get_local_runner(self, language):
+        """Get the local runner whose import/export glue is reused in containers"""
+        if self.plugin_manager is None:
+            from runners.plugin_manager import get_plugin_manager
+            self.plugin_manager = get_plugin_manager(self.config)
+        return self.plugin_manager.get_runner(language)
+    
+    def _prepare_block(self, code, language, import_data=None, export_vars=None):
+        """
+        Wrap code with the local runner's import/export handling
+        Returns: (source, environment, runner)
+        """
+        runner = self._get_local_runner(language)
+        if runner is None or not hasattr(runner, '_prepare_code'):
+            return code, {}, None
+        source = runner._prepare_code(code, import_data, export_vars)
+        return source, runner.get_import_environment(import_data), runner
+    
+    def _run_in_docker(self, code, language, config, import_data=None, export_vars=None):
+        """
+        Execute code in a fresh container that is removed afterwards
+        
+        It is created with the same lockdown as pooled containers, and code
+        and exports travel through exec into and out of its tmpfs workdir;
+        no host directory is shared with the container.
+        """
+        return self._run_in_pool(code, language, config, import_data, export_vars, one_shot=True)
     
-    def _run_in_docker(self, code, language, config):
-        """Execute code in Docker container"""
+    def _run_in_pool(self, code, language, config, import_data=None, export_vars=None, one_shot=False):
+        """
+        Execute code in a warm pooled container via copy + exec
+        With one_shot, in a fresh container outside any session, removed afterwards
+        """
         start_time = time.time()
+        file_name = f"code{self._get_file_extension(language)}"
+        timeout = config.get('timeout_seconds', 30)
+        source, environment, runner = self._prepare_block(code, language, import_data, export_vars)
         
-        # Get language-specific settings
-        image_name = f"polyrun-{language}:latest"
-        file_extension = self._get_file_extension(language)
-        run_command = self._get_run_command(language)
+        # Session blocks share a container, so each gets its own directory
+        workdir = self.pool.workdir
+        if self._session is not None and not one_shot:
+            self._session_blocks += 1
+            workdir = f"{self.pool.workdir}/block_{self._session_blocks}"
         
-        # Create temporary directory for code
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Write code to file
-            code_file = os.path.join(temp_dir, f"code{file_extension}")
-            with open(code_file, 'w') as f:
-                f.write(code)
-            
+        try:
+            pooled = self.pool.acquire(language, fresh=True) if one_shot else self._acquire(language)
+        except docker.errors.ImageNotFound:
+            image_name = self.pool.image_for(language)
+            self.logger.error(f"Docker image {image_name} not found. Run build_containers.sh first.")
+            return {
+                "success": False,
+                "output": "",
+                "error": f"Docker image {image_name} not found. Please build containers first.",
+                "execution_time": 0,
+                "memory_used": 0,
+                "exit_code": -1,
+                "container_used": False
+            }
+        except Exception as e:
+            error_msg = f"Docker execution failed: {e}"
+            self.logger.error(error_msg)
+            return {
+                "success": False,
+                "output": "",
+                "error": error_msg,
+                "execution_time": time.time() - start_time,
+                "memory_used": 0,
+                "exit_code": -1,
+                "container_used": False
+            }
+        
+        healthy = True
+        try:
+            relative_dir = os.path.relpath(workdir, self.pool.workdir)
+            self.pool.put_files(pooled, {os.path.normpath(os.path.join(relative_dir, file_name)): source})
+            run_command = self._get_run_command(language, workdir, workdir)
+            sampler = self._start_stats(pooled.container, lifetime_peak=one_shot)
             try:
-                # Get security options and resource limits
-                security_opts = self.security_manager.get_container_security_opts()
-                resource_limits = self.security_manager.get_resource_limits()
-                
-                # Run container
-                container = self.docker_client.containers.run(
-                    image=image_name,
-                    command=run_command,
-                    volumes={temp_dir: {'bind': '/app', 'mode': 'ro'}},
-                    working_dir='/app',
-                    mem_limit=resource_limits['mem_limit'],
-                    cpu_quota=resource_limits['cpu_quota'],
-                    cpu_period=resource_limits['cpu_period'],
-                    pids_limit=resource_limits['pids_limit'],
-                    network_mode='none',
-                    user='runner',
-                    detach=True,
-                    remove=True,
-                    security_opt=['no-new-privileges'],
-                    cap_drop=['ALL'],
-                    read_only=True,
-                    tmpfs={'/tmp': 'rw,noexec,nosuid,size=100m'}
-                )
-                
-                # Wait for completion with timeout
-                timeout = config.get('timeout_seconds', 30)
-                try:
-                    result = container.wait(timeout=timeout)
-                    logs = container.logs().decode('utf-8')
-                    
-                    execution_time = time.time() - start_time
-                    
-                    # Log security event
-                    self.security_manager.log_security_event(
-                        "CONTAINER_EXECUTION", 
-                        language, 
-                        f"Exit code: {result['StatusCode']}, Time: {execution_time:.2f}s"
-                    )
-                    
-                    return {
-                        "success": result['StatusCode'] == 0,
-                        "output": logs,
-                        "error": logs if result['StatusCode'] != 0 else "",
-                        "execution_time": execution_time,
-                        "memory_used": 0,  # Would need container stats for actual memory
-                        "exit_code": result['StatusCode'],
-                        "container_used": True
-                    }
-                    
-                except docker.errors.ContainerError as e:
-                    execution_time = time.time() - start_time
-                    error_msg = f"Container execution failed: {e}"
-                    self.security_manager.log_security_event("CONTAINER_ERROR", language, error_msg)
-                    
-                    return {
-                        "success": False,
-                        "output": "",
-                        "error": error_msg,
-                        "execution_time": execution_time,
-                        "memory_used": 0,
-                        "exit_code": -1,
-                        "container_used": True
-                    }
-                    
-            except docker.errors.ImageNotFound:
-                self.logger.error(f"Docker image {image_name} not found. Run build_containers.sh first.")
+                outcome = self.pool.execute(pooled, run_command, timeout, environment=environment,
+                                            workdir=workdir)
+            finally:
+                resource_stats = sampler.stop() if sampler else {}
+            execution_time = time.time() - start_time
+            
+            if outcome.get('cancelled'):
+                # The container was killed; recycle it rather than reset it
+                healthy = False
+                self.security_manager.log_security_event("CONTAINER_CANCELLED", language, "Execution cancelled")
                 return {
                     "success": False,
-                    "output": "",
-                    "error": f"Docker image {image_name} not found. Please build containers first.",
-                    "execution_time": 0,
-                    "memory_used": 0,
-                    "exit_code": -1,
-                    "container_used": False
+                    "output": outcome['stdout'],
+                    "error": "Execution cancelled",
+                    "execution_time": execution_time,
+                    "memory_used": resource_stats.get('peak_memory_bytes', 0),
+                    "resource_stats": resource_stats,
+                    "exit_code": outcome['exit_code'],
+                    "container_used": True,
+                    "pooled": not one_shot,
+                    "cancelled": True
                 }
-            except Exception as e:
-                execution_time = time.time() - start_time
-                error_msg = f"Docker execution failed: {e}"
-                self.logger.error(error_msg)
-                
+            
+            if outcome['timed_out']:
+                healthy = False
+                TIMEOUTS.inc(language)
+                self.security_manager.log_security_event("CONTAINER_TIMEOUT", language, f"Killed after {timeout}s")
                 return {
                     "success": False,
                     "output": "",
-                    "error": error_msg,
+                    "error": f"Execution timed out after {timeout} seconds",
                     "execution_time": execution_time,
-                    "memory_used": 0,
-                    "exit_code": -1,
-                    "container_used": False
+                    "memory_used": resource_stats.get('peak_memory_bytes', 0),
+                    "resource_stats": resource_stats,
+                    "exit_code": 124,
+                    "container_used": True,
+                    "pooled": not one_shot
                 }
+            
+            self.security_manager.log_security_event(
+                "CONTAINER_EXECUTION",
+                language,
+                f"Exit code: {outcome['exit_code']}, Time: {execution_time:.2f}s" + ("" if one_shot else " (pooled)")
+            )
+            
+            exported_data = {}
+            if runner and export_vars:
+                exported_data = self._fetch_exports(pooled, runner, file_name, workdir)
+            
+            return {
+                "success": outcome['exit_code'] == 0,
+                "output": outcome['stdout'],
+                "error": outcome['stderr'],
+                "execution_time": execution_time,
+                "memory_used": resource_stats.get('peak_memory_bytes', 0),
+                "resource_stats": resource_stats,
+                "exit_code": outcome['exit_code'],
+                "exported_data": exported_data,
+                "container_used": True,
+                "pooled": not one_shot
+            }
+        except Exception as e:
+            healthy = False
+            error_msg = f"Docker execution failed: {e}"
+            self.logger.error(error_msg)
+            return {
+                "success": False,
+                "output": "",
+                "error": error_msg,
+                "execution_time": time.time() - start_time,
+                "memory_used": 0,
+                "exit_code": -1,
+                "container_used": True,
+                "pooled": not one_shot
+            }
+        finally:
+            if one_shot:
+                self.pool.release(pooled, healthy=False)
+            else:
+                self._release(pooled, healthy)
     
-    def _run_locally(self, code, language, config):
+    def _start_stats(self, container, lifetime_peak=True):
+        """Start sampling container stats, or return None if disabled"""
+        stats_config = self.config.get('docker_stats', {})
+        if not stats_config.get('enabled', True):
+            return None
+        sampler = ContainerStatsSampler(
+            container,
+            interval=stats_config.get('interval_seconds', 0.25),
+            lifetime_peak=lifetime_peak
+        )
+        return sampler.start()
+    
+    def _fetch_exports(self, pooled, runner, file_name, workdir):
+        """Copy __export__.json out of the container and decode it with the runner"""
+        data = self.pool.get_file(pooled, f"{workdir}/__export__.json")
+        if data is None:
+            return {}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, "__export__.json"), 'wb') as f:
+                f.write(data)
+            return runner._read_exported_data(os.path.join(temp_dir, file_name))
+    
+    def _run_locally(self, code, language, config, import_data=None, export_vars=None):
         """Fallback to local execution when Docker is unavailable"""
-        # Import the original runners
         try:
-            if language == 'python':
-                from runners.python_runner import run_code
-            elif language == 'cpp':
-                from runners.cpp_runner import run_code
-            else:
+            runner = self._get_local_runner(language)
+            if runner is None:
                 return {
                     "success": False,
                     "output": "",
@@ -176,9 +314,17 @@ class DockerRunner:
                     "container_used": False
                 }
             
-            result = run_code(code, config)
-            result['container_used'] = False
-            return result
+            result = runner.run(code, import_data, export_vars)
+            return {
+                "success": result['return_code'] == 0,
+                "output": result['output'],
+                "error": result['error'] if result['return_code'] != 0 else "",
+                "execution_time": result.get('execution_time', 0),
+                "memory_used": 0,
+                "exit_code": result['return_code'],
+                "exported_data": result.get('exported_data', {}),
+                "container_used": False
+            }
             
         except Exception as e:
             return {
@@ -201,24 +347,34 @@ class DockerRunner:
         }
         return extensions.get(language.lower(), '.txt')
     
-    def _get_run_command(self, language):
+    def _get_run_command(self, language, workdir='/app', build_dir='/tmp'):
         """Get execution command for language"""
         commands = {
-            'python': ['python3', '/app/code.py'],
-            'cpp': ['sh', '-c', 'g++ /app/code.cpp -o /tmp/code && /tmp/code'],
-            'javascript': ['node', '/app/code.js'],
-            'bash': ['bash', '/app/code.sh']
+            'python': ['python3', f'{workdir}/code.py'],
+            'cpp': ['sh', '-c', f'g++ {workdir}/code.cpp -o {build_dir}/code && {build_dir}/code'],
+            'javascript': ['node', f'{workdir}/code.js'],
+            'bash': ['bash', f'{workdir}/code.sh']
         }
-        return commands.get(language.lower(), ['cat', '/app/code.txt'])
+        return commands.get(language.lower(), ['cat', f'{workdir}/code.txt'])
+    
+    def prewarm_pool(self, languages=None):
+        """Start the configured number of idle containers per language"""
+        if self.pool and self.pool.enabled:
+            self.pool.prewarm(languages)
     
     def cleanup_containers(self):
-        """Clean up stopped containers and unused images"""
+        """Clean up PolyRun containers and unused images"""
         if not self.docker_available:
             return
             
         try:
-            # Remove stopped containers
-            self.docker_client.containers.prune()
+            # Tear down session and warm containers
+            self.end_session()
+            if self.pool:
+                self.pool.shutdown()
+            
+            # Remove stopped containers created by PolyRun only
+            self.docker_client.containers.prune(filters={'label': MANAGED_LABEL})
             
             # Remove dangling images if enabled
             if self.config.get('docker_cleanup', True):
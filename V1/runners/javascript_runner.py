@@ -4,6 +4,7 @@ import tempfile
 import os
 import json
 from .base_runner import BaseRunner
+from .metrics import observe_stage
 
 class JavaScriptRunner(BaseRunner):
     """
@@ -11,10 +12,13 @@ class JavaScriptRunner(BaseRunner):
     Supports data import/export through JSON files
     """
     
+    version_command = ['node', '--version']
+    
     def __init__(self, config=None):
         super().__init__(config)
         self.language = "javascript"
         self.file_extension = ".js"
+        self._node_cmd = None
         
     def run(self, code, import_data=None, export_vars=None):
         """
@@ -28,6 +32,67 @@ class JavaScriptRunner(BaseRunner):
         Returns:
             Dict with output, error, return_code, exported_data
         """
+        # Node.js is located once per runner instance
+        if self._node_cmd is None:
+            self._node_cmd, tried_paths = self._find_node()
+        node_cmd = self._node_cmd
+        
+        if not node_cmd:
+            error_msg = f'Node.js not found. Tried paths: {", ".join(tried_paths)}'
+            return {
+                'output': '',
+                'error': error_msg,
+                'return_code': 127,
+                'exported_data': {}
+            }
+        
+        # Prepare code with import/export handling
+        enhanced_code = self._prepare_code(code, import_data, export_vars)
+        
+        # Create temporary file
+        with tempfile.NamedTemporaryFile(mode='w', suffix=self.file_extension, delete=False,
+                                         dir=self.make_run_dir()) as f:
+            f.write(enhanced_code)
+            temp_file = f.name
+        
+        try:
+            # Execute the JavaScript code
+            export_file = os.path.join(os.path.dirname(temp_file), "__export__.json")
+            result = self.run_process(
+                [node_cmd, temp_file],
+                self.timeout,
+                files=[temp_file],
+                collect=[export_file]
+            )
+            
+            # Read exported data if available
+            with observe_stage(self.language, 'export'):
+                exported_data = self._read_exported_data(temp_file)
+            
+            return {
+                'output': result.stdout,
+                'error': result.stderr,
+                'return_code': result.returncode,
+                'truncated': getattr(result, 'truncated', False),
+                'exported_data': exported_data
+            }
+            
+        except subprocess.TimeoutExpired:
+            return {
+                'output': '',
+                'error': f'JavaScript execution timed out after {self.timeout} seconds',
+                'return_code': 124,
+                'exported_data': {}
+            }
+        finally:
+            # Clean up
+            self._cleanup_temp_files(temp_file)
+    
+    def _find_node(self):
+        """
+        Locate (installing if needed) the Node.js binary
+        Returns: (node_cmd or None, tried_paths)
+        """
         # Check if Node.js is available (try multiple common paths)
         node_paths = [
             'nodejs',                  # Ubuntu common name (try first)
@@ -109,52 +174,7 @@ class JavaScriptRunner(BaseRunner):
             except Exception as e:
                 print(f"Diagnostic error: {e}")
         
-        if not node_cmd:
-            error_msg = f'Node.js not found. Tried paths: {", ".join(tried_paths)}'
-            return {
-                'output': '',
-                'error': error_msg,
-                'return_code': 127,
-                'exported_data': {}
-            }
-        
-        # Prepare code with import/export handling
-        enhanced_code = self._prepare_code(code, import_data, export_vars)
-        
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix=self.file_extension, delete=False) as f:
-            f.write(enhanced_code)
-            temp_file = f.name
-        
-        try:
-            # Execute the JavaScript code
-            result = subprocess.run(
-                [node_cmd, temp_file],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout
-            )
-            
-            # Read exported data if available
-            exported_data = self._read_exported_data(temp_file)
-            
-            return {
-                'output': result.stdout,
-                'error': result.stderr,
-                'return_code': result.returncode,
-                'exported_data': exported_data
-            }
-            
-        except subprocess.TimeoutExpired:
-            return {
-                'output': '',
-                'error': f'JavaScript execution timed out after {self.timeout} seconds',
-                'return_code': 124,
-                'exported_data': {}
-            }
-        finally:
-            # Clean up
-            self._cleanup_temp_files(temp_file)
+        return node_cmd, tried_paths
     
     def _prepare_code(self, code, import_data=None, export_vars=None):
         """Prepare JavaScript code with import/export functionality"""
@@ -222,3 +242,4 @@ class JavaScriptRunner(BaseRunner):
                 os.remove(export_file)
         except OSError:
             pass
+        self.remove_run_dir(os.path.dirname(temp_file))
@@ -0,0 +1,346 @@
+"""
+In-process job queue for PolyRun
+Runs .mix executions on a bounded pool of worker threads; each job
+collects its own log instead of redirecting the process-wide stdout
+"""
+
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .cancellation import CancelToken, cancellable, current_token
+
+# Job lifecycle
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Weight of the newest job in the latency moving average
+LATENCY_SMOOTHING = 0.2
+
+
+class JobQueueFull(Exception):
+    """The queue already holds max_queued jobs waiting for a worker"""
+
+
+class Job:
+    """A submitted .mix execution and its isolated output log"""
+
+    def __init__(self, code, consolidate=True, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.code = code
+        self.consolidate = consolidate
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.token = CancelToken()
+        self._lines = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        # Separate from _lock, which cancel() holds while finishing a queued job
+        self._done_lock = threading.Lock()
+        self._done_callbacks = []
+
+    def log(self, message=''):
+        """Append a line to this job's output (used instead of print)"""
+        with self._lock:
+            self._lines.append(str(message))
+
+    def wait(self, timeout=None):
+        """Block until the job finishes; returns False on timeout"""
+        return self._done.wait(timeout)
+
+    def on_done(self, callback):
+        """
+        Register a callback to run (on the finishing thread) when the job
+        finishes; runs at once if it already has
+        """
+        with self._done_lock:
+            if not self._done.is_set():
+                self._done_callbacks.append(callback)
+                return
+        _run_done_callback(callback)
+
+    def _set_done(self):
+        with self._done_lock:
+            self._done.set()
+            callbacks, self._done_callbacks = self._done_callbacks, []
+        for callback in callbacks:
+            _run_done_callback(callback)
+
+    @property
+    def output(self):
+        with self._lock:
+            return '\n'.join(self._lines)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'output': self.output,
+            'error': self.error,
+            'result': self.result
+        }
+
+
+def _run_done_callback(callback):
+    try:
+        callback()
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Job done callback failed: {e}")
+
+
+def run_mix(code, config, consolidate=True, log=print):
+    """
+    Execute .mix source block by block through the shared plugin manager
+
+    Args:
+        code: .mix file contents
+        config: Loaded config.json
+        consolidate: Merge adjacent blocks of the same language first
+        log: Callable receiving each output line
+
+    Stops before the next block once the thread's cancellation token fires.
+
+    Returns: {'blocks': int, 'exports': dict, 'failed_blocks': int, 'cancelled': bool}
+    """
+    from parser import parse_mix_file, consolidate_language_blocks
+    from .plugin_manager import get_plugin_manager
+
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.mix', delete=False) as f:
+        f.write(code)
+        mix_file = f.name
+    try:
+        blocks = parse_mix_file(mix_file)
+    finally:
+        os.unlink(mix_file)
+    log(f"📂 Parsed {len(blocks)} code blocks")
+
+    if consolidate:
+        blocks = consolidate_language_blocks(blocks)
+        log(f"🔄 Consolidated to {len(blocks)} blocks")
+
+    # Shared plugin manager: runners stay warm across jobs
+    plugin_manager = get_plugin_manager(config)
+    export_data = {}
+    failed_blocks = 0
+    token = current_token()
+
+    for i, block in enumerate(blocks):
+        if token is not None and token.cancelled:
+            log(f"🛑 Execution cancelled, skipped {len(blocks) - i} remaining blocks")
+            break
+        language = block['language']
+        exports = block.get('exports', [])
+
+        log(f"\n🚀 Running block {i+1}: {language}")
+
+        import_data = {}
+        for var in block.get('imports', []):
+            if var in export_data:
+                import_data[var] = export_data[var]
+                log(f"📥 Importing {var}: {import_data[var]}")
+
+        if not plugin_manager.is_language_supported(language):
+            log(f"❌ No runner found for language: {language}")
+            failed_blocks += 1
+            continue
+
+        result = plugin_manager.run_code(language, block['code'], import_data, exports,
+                                         cacheable=block.get('cache', False))
+        if result.get('cache_hit'):
+            log("♻️ Using cached result")
+
+        output_displayed = False
+        if result.get('output'):
+            log(result['output'].strip())
+            output_displayed = True
+        if result.get('error'):
+            log(f"Error: {result['error'].strip()}")
+        if result.get('return_code', 0) != 0:
+            failed_blocks += 1
+
+        if exports and 'exported_data' in result:
+            for var, value in result['exported_data'].items():
+                if var in exports:
+                    export_data[var] = value
+                    log(f"📤 Exported {var}: {value}")
+
+        if not output_displayed:
+            log("✅ Block completed successfully")
+
+    return {'blocks': len(blocks), 'exports': export_data, 'failed_blocks': failed_blocks,
+            'cancelled': bool(token is not None and token.cancelled)}
+
+
+class JobQueue:
+    """
+    Bounded job queue served by a fixed pool of worker threads
+
+    Configured by the "job_queue" section of config.json; the
+    POLYRUN_JOB_WORKERS environment variable overrides the worker count so
+    each host can size concurrency to its own cores. Finished jobs are kept
+    for retention_seconds (at most max_jobs of them) for polling.
+    """
+
+    def __init__(self, config=None, executor=None):
+        self.config = config or {}
+        job_config = self.config.get('job_queue', {})
+        self.workers = int(os.environ.get('POLYRUN_JOB_WORKERS') or job_config.get('workers') or os.cpu_count() or 1)
+        self.max_queued = job_config.get('max_queued', 64)
+        self.retention = job_config.get('retention_seconds', 3600)
+        self.max_jobs = job_config.get('max_jobs', 1000)
+        self.executor = executor or run_mix
+        self.logger = logging.getLogger(__name__)
+
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+        # Moving average of submit-to-finish seconds (None until a job finishes)
+        self.latency = None
+
+    def submit(self, code, consolidate=True, job_id=None):
+        """
+        Queue a job and return it; raises JobQueueFull when at capacity and
+        ValueError when job_id is already in use
+        """
+        self._start_workers()
+        job = Job(code, consolidate, job_id)
+        with self._lock:
+            self._expire()
+            if job.id in self._jobs:
+                raise ValueError(f"Job id {job.id} is already in use")
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise JobQueueFull(f"Job queue is full ({self.max_queued} jobs waiting)")
+        return job
+
+    def get(self, job_id):
+        """Look up a job by id, or None if unknown or expired"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job: a queued job never starts, a running one has its
+        processes killed and skips its remaining blocks. Returns the job,
+        or None if unknown.
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        job.token.cancel()
+        with job._lock:
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+        return job
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queued': self._queue.qsize(),
+                'running': self._running,
+                'max_queued': self.max_queued,
+                'jobs': len(self._jobs),
+                'latency_seconds': self.latency
+            }
+
+    def shutdown(self, wait=True):
+        """Stop the workers after the jobs already queued"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _start_workers(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f'polyrun-job-worker-{len(self._threads)}',
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._running += 1
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+    def _run(self, job):
+        with job._lock:
+            # Cancelled while queued: already finished, the worker moves on
+            if job.token.cancelled:
+                return
+            job.started_at = time.time()
+            job.status = RUNNING
+        try:
+            with cancellable(job.token):
+                job.result = self.executor(job.code, self.config, job.consolidate, job.log)
+            status = COMPLETED
+        except Exception as e:
+            self.logger.exception(f"Job {job.id} failed")
+            job.error = str(e)
+            status = FAILED
+        if job.token.cancelled:
+            status = CANCELLED
+        self._finish(job, status)
+
+    def _finish(self, job, status):
+        # Status last, so pollers never see a finished job without its result
+        job.finished_at = time.time()
+        if status != CANCELLED:
+            with self._lock:
+                elapsed = job.finished_at - job.created_at
+                self.latency = elapsed if self.latency is None else self.latency + LATENCY_SMOOTHING * (elapsed - self.latency)
+        job.status = status
+        job._set_done()
+
+    def _expire(self):
+        """Drop finished jobs past retention, and the oldest beyond max_jobs (caller holds the lock)"""
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self._jobs.items()):
+            if job.status in FINISHED_STATES and (job.finished_at < cutoff or len(self._jobs) > self.max_jobs):
+                del self._jobs[job_id]
+
+
+def job_queue_metrics(get_queue):
+    """Scrape-time metrics for the queue returned by get_queue()"""
+    from .metrics import Collected
+    return [
+        Collected('polyrun_jobs_queued', 'Jobs waiting for a worker', (),
+                  lambda: {(): get_queue().stats()['queued']}),
+        Collected('polyrun_jobs_running', 'Jobs being executed by a worker', (),
+                  lambda: {(): get_queue().stats()['running']}),
+    ]
@@ -0,0 +1,230 @@
+"""
+Execution metrics for PolyRun
+A small in-process registry of counters, gauges and histograms rendered
+in the Prometheus text exposition format by the backends' /metrics
+endpoints. Recording is a lock and a few additions, so runners can
+instrument every child process; values that already exist elsewhere
+(queue depth, child rusage) are read only when scraped.
+"""
+
+import bisect
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers sub-millisecond cache hits up to the default timeouts
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base for a metric family: one value per combination of label values"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """(suffix, label values, extra labels, value) tuples for rendering"""
+        with self._lock:
+            return [('', key, (), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, key, extra, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(self.labels, key, extra)} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the wall-clock duration of the with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels):
+        with self._lock:
+            entry = self._values.get(labels)
+            return entry[2] if entry else 0
+
+    def samples(self):
+        with self._lock:
+            entries = [(key, list(counts), total, count) for key, (counts, total, count) in sorted(self._values.items())]
+        samples = []
+        for key, counts, total, count in entries:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', key, (('le', _format_value(float(bound))),), cumulative))
+            samples.append(('_sum', key, (), total))
+            samples.append(('_count', key, (), count))
+        return samples
+
+
+class Collected(Metric):
+    """Metric whose samples come from a callback at scrape time"""
+
+    def __init__(self, name, documentation, labels, collect, kind='gauge'):
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self):
+        return [('', tuple(key), (), value) for key, value in sorted(self.collect().items())]
+
+
+class MetricsRegistry:
+    """Named metric families, rendered together for /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric; a metric registered again under its name replaces the old one"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def collected(self, name, documentation, labels, collect, kind='gauge'):
+        """Register collect(), returning {label values tuple: value}, for scrape time"""
+        return self.register(Collected(name, documentation, labels, collect, kind))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _child_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {('user',): usage.ru_utime, ('system',): usage.ru_stime}
+
+
+def _child_max_rss():
+    # ru_maxrss is in kilobytes on Linux
+    return {(): resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024}
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'polyrun_stage_duration_seconds',
+    'Time spent per execution stage (parse, compile, run, export)',
+    ('language', 'stage'))
+PROCESSES_STARTED = REGISTRY.counter(
+    'polyrun_runner_processes_started_total', 'Child processes launched by runners', ('language', 'mode'))
+PROCESSES_RUNNING = REGISTRY.gauge(
+    'polyrun_runner_processes_running', 'Child processes currently running', ('language',))
+TIMEOUTS = REGISTRY.counter(
+    'polyrun_timeouts_total', 'Executions killed for exceeding their time limit', ('language',))
+SECURITY_EVENTS = REGISTRY.counter(
+    'polyrun_security_events_total',
+    'Security events by type (UNSAFE_CODE_BLOCKED counts blocked code)', ('event', 'language'))
+
+REGISTRY.collected(
+    'polyrun_child_cpu_seconds_total', 'CPU time of finished child processes', ('mode',),
+    _child_cpu, kind='counter')
+REGISTRY.collected(
+    'polyrun_child_max_rss_bytes', 'Largest resident set size of any finished child process', (),
+    _child_max_rss)
+
+
+def observe_stage(language, stage):
+    """Context manager timing one stage of a block into STAGE_SECONDS"""
+    return STAGE_SECONDS.time(language or 'unknown', stage)
+
+
+def render(extra=()):
+    """
+    All registered metrics in the Prometheus text format, followed by
+    extra metrics owned by the caller (e.g. a backend's queue gauges)
+    """
+    lines = [line for metric in extra for line in metric.render()]
+    return REGISTRY.render() + ''.join(line + '\n' for line in lines)
@@ -1,95 +1,140 @@
 # Plugin Manager for PolyRun Language Runners
 import importlib
-import os
+import json
+import threading
 from typing import Dict, List, Optional, Any
 from .base_runner import BaseRunner
+from .result_cache import ResultCache
+from .plugin_manifest import PluginManifest, load_target
+
+# Static manifest: language -> 'module.Class'. Nothing is imported until a
+# language is first used, and aliases share one runner instance.
+BUILT_IN_RUNNERS = {
+    'python': 'python_runner.PythonRunner',
+    'cpp': 'cpp_runner.CppRunner',
+    'c++': 'cpp_runner.CppRunner',
+    'c': 'cpp_runner.CppRunner',
+    'javascript': 'javascript_runner.JavaScriptRunner',
+    'js': 'javascript_runner.JavaScriptRunner',
+    'bash': 'bash_runner.BashRunner',
+    'sh': 'bash_runner.BashRunner',
+    'shell': 'bash_runner.BashRunner'
+}
+
+# Process-wide managers, one per distinct configuration
+_shared_managers = {}
+_shared_lock = threading.Lock()
+
+def get_plugin_manager(config=None):
+    """
+    Get the shared PluginManager for a configuration
+    
+    Runner instances (and their warm resources) are reused across blocks,
+    runs and requests instead of being rebuilt by every caller.
+    """
+    key = json.dumps(config or {}, sort_keys=True, default=str)
+    manager = _shared_managers.get(key)
+    if manager is None:
+        with _shared_lock:
+            manager = _shared_managers.get(key)
+            if manager is None:
+                manager = PluginManager(config)
+                _shared_managers[key] = manager
+    return manager
 
 class PluginManager:
     """
     Manages dynamic loading and discovery of language runners
     Supports plugin architecture for extensibility
+    
+    Languages map to runner classes through a manifest; runner modules are
+    imported and instantiated on first use. Use get_plugin_manager() to
+    share one instance per process.
     """
     
     def __init__(self, config=None):
         self.config = config or {}
         self.runners: Dict[str, BaseRunner] = {}
         self.runner_cache: Dict[str, Any] = {}
+        self.result_cache = ResultCache(self.config)
+        self._instances: Dict[Any, BaseRunner] = {}
+        self._plugin_paths: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self.manifest = PluginManifest(self.config)
+        self.plugins: List[Dict[str, Any]] = []
         self._load_built_in_runners()
         self._discover_external_plugins()
     
     def _load_built_in_runners(self):
-        """Load built-in language runners"""
-        built_in_runners = {
-            'python': 'python_runner.PythonRunner',
-            'cpp': 'cpp_runner.CppRunner',
-            'c++': 'cpp_runner.CppRunner',
-            'c': 'cpp_runner.CppRunner',
-            'javascript': 'javascript_runner.JavaScriptRunner',
-            'js': 'javascript_runner.JavaScriptRunner',
-            'bash': 'bash_runner.BashRunner',
-            'sh': 'bash_runner.BashRunner',
-            'shell': 'bash_runner.BashRunner'
-        }
-        
-        for language, runner_path in built_in_runners.items():
-            try:
-                self._load_runner(language, runner_path)
-            except Exception as e:
-                print(f"Warning: Failed to load {language} runner: {e}")
+        """Register built-in language runners (imported lazily)"""
+        for language, runner_path in BUILT_IN_RUNNERS.items():
+            self.runner_cache[language] = runner_path
     
     def _discover_external_plugins(self):
-        """Discover external plugins in the plugins directory"""
-        plugins_dir = os.path.join(os.path.dirname(__file__), '..', 'plugins')
-        if not os.path.exists(plugins_dir):
-            return
-        
-        for filename in os.listdir(plugins_dir):
-            if filename.endswith('_runner.py'):
-                try:
-                    language = filename.replace('_runner.py', '')
-                    module_path = f'plugins.{filename[:-3]}'
-                    self._load_runner(language, f'{module_path}.{language.title()}Runner')
-                except Exception as e:
-                    print(f"Warning: Failed to load plugin {filename}: {e}")
+        """Register plugin runners from the cached manifest (imported lazily)"""
+        self.plugins = self.manifest.load()
+        for entry in self.plugins:
+            if entry.get('path'):
+                self._plugin_paths[entry['target']] = entry['path']
+            for language in [entry['language']] + entry['aliases']:
+                self.runner_cache[language] = entry['target']
     
     def _load_runner(self, language: str, runner_path: str):
-        """Load a specific runner"""
+        """Import a runner class from its manifest path"""
         try:
-            module_name, class_name = runner_path.rsplit('.', 1)
-            
-            # Handle relative imports for built-in runners
-            if not module_name.startswith('.') and '.' not in module_name:
-                module_name = f'runners.{module_name}'
-            
-            module = importlib.import_module(module_name, package='runners')
-            runner_class = getattr(module, class_name)
-            
-            if issubclass(runner_class, BaseRunner):
-                self.runner_cache[language.lower()] = runner_class
+            if ':' in runner_path:
+                # Plugin target ('module:Class')
+                runner_class = load_target(runner_path, self._plugin_paths.get(runner_path))
+                class_name = runner_path
             else:
-                print(f"Warning: {class_name} is not a BaseRunner subclass")
+                module_name, class_name = runner_path.rsplit('.', 1)
+                
+                # Handle relative imports for built-in runners
+                if not module_name.startswith('.') and '.' not in module_name:
+                    module_name = f'runners.{module_name}'
+                
+                module = importlib.import_module(module_name, package='runners')
+                runner_class = getattr(module, class_name)
+            
+            if isinstance(runner_class, type) and issubclass(runner_class, BaseRunner):
+                return runner_class
+            print(f"Warning: {class_name} is not a BaseRunner subclass")
                 
         except Exception as e:
             print(f"Failed to load {language} runner: {e}")
+        return None
     
     def get_runner(self, language: str) -> Optional[BaseRunner]:
         """Get a runner instance for the specified language"""
         language = language.lower()
         
-        if language in self.runners:
-            return self.runners[language]
+        runner = self.runners.get(language)
+        if runner is not None:
+            return runner
         
-        if language in self.runner_cache:
-            try:
-                runner_class = self.runner_cache[language]
-                runner = runner_class(self.config)
-                self.runners[language] = runner
-                return runner
-            except Exception as e:
-                print(f"Failed to instantiate {language} runner: {e}")
+        with self._lock:
+            if language in self.runners:
+                return self.runners[language]
+            if language not in self.runner_cache:
                 return None
-        
-        return None
+            
+            entry = self.runner_cache[language]
+            runner = self._instances.get(entry)
+            if runner is None:
+                runner_class = self._load_runner(language, entry) if isinstance(entry, str) else entry
+                if runner_class is None:
+                    # Broken plugin: stop advertising the language
+                    del self.runner_cache[language]
+                    return None
+                try:
+                    runner = runner_class(self.config)
+                except Exception as e:
+                    print(f"Failed to instantiate {language} runner: {e}")
+                    return None
+                self._instances[entry] = runner
+            
+            self.runners[language] = runner
+            return runner
     
     def get_supported_languages(self) -> List[str]:
         """Get list of supported languages"""
@@ -108,19 +153,25 @@ class PluginManager:
     
     def reload_plugins(self):
         """Reload all plugins (useful for development)"""
-        self.runners.clear()
-        self.runner_cache.clear()
-        self._load_built_in_runners()
-        self._discover_external_plugins()
+        with self._lock:
+            self.runners.clear()
+            self.runner_cache.clear()
+            self._instances.clear()
+            self._plugin_paths.clear()
+            self._load_built_in_runners()
+            self._discover_external_plugins()
     
     def add_custom_runner(self, language: str, runner_class: type):
         """Add a custom runner programmatically"""
         if issubclass(runner_class, BaseRunner):
-            self.runner_cache[language.lower()] = runner_class
+            with self._lock:
+                self.runner_cache[language.lower()] = runner_class
+                self.runners.pop(language.lower(), None)
         else:
             raise ValueError(f"Runner class must inherit from BaseRunner")
     
-    def run_code(self, language: str, code: str, import_data=None, export_vars=None):
+    def run_code(self, language: str, code: str, import_data=None, export_vars=None,
+                 cacheable: bool = False):
         """
         Convenient method to run code in any supported language
         
@@ -129,9 +180,10 @@ class PluginManager:
             code: Source code to execute
             import_data: Data to import from previous blocks
             export_vars: Variables to export to next blocks
+            cacheable: Block opted into result memoization (#cache directive)
             
         Returns:
-            Execution result dictionary
+            Execution result dictionary (cache hits have cache_hit=True)
         """
         runner = self.get_runner(language)
         if not runner:
@@ -142,4 +194,21 @@ class PluginManager:
                 'exported_data': {}
             }
         
-        return runner.run(code, import_data, export_vars)
+        if not self.result_cache.should_cache(cacheable):
+            return runner.run(code, import_data, export_vars)
+        
+        cache_key = self.result_cache.make_key(
+            f"{runner.language}:{type(runner).__name__}",
+            code,
+            runner.get_toolchain_version(),
+            import_data,
+            export_vars
+        )
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = runner.run(code, import_data, export_vars)
+        self.result_cache.put(cache_key, result)
+        result['cache_hit'] = False
+        return result
@@ -0,0 +1,170 @@
+# Plugin Manifest for PolyRun
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Package entry point group third-party runners register under, e.g.
+#   [project.entry-points."polyrun.runners"]
+#   ruby = "polyrun_ruby.runner:RubyRunner"
+ENTRY_POINT_GROUP = 'polyrun.runners'
+
+# Bump when the manifest layout changes so stale indexes are rebuilt
+MANIFEST_VERSION = 1
+
+DEFAULT_PLUGINS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'plugins')
+
+
+class PluginManifest:
+    """
+    Cached index of external runner plugins
+
+    Plugins come from `<name>_runner.py` files in the plugins directory and
+    from the `polyrun.runners` entry point group. Building the index imports
+    each plugin once to read its languages, aliases and capabilities; the
+    result is stored as JSON and reused until a plugin file or an installed
+    package changes (checked by mtime) or the manifest version is bumped.
+    """
+
+    def __init__(self, config=None):
+        plugin_config = (config or {}).get('plugins', {})
+        self.plugins_dir = plugin_config.get('directory', DEFAULT_PLUGINS_DIR)
+        self.path = plugin_config.get('manifest', 'cache/plugin_manifest.json')
+        self.use_entry_points = plugin_config.get('entry_points', True)
+        self.rebuilt = False
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Return the plugin entries, rebuilding the cached index if stale"""
+        fingerprint = self.fingerprint()
+        cached = self._read()
+        if cached and cached.get('version') == MANIFEST_VERSION and cached.get('fingerprint') == fingerprint:
+            self.rebuilt = False
+            return cached['runners']
+
+        runners = self.build()
+        self._write({
+            'version': MANIFEST_VERSION,
+            'fingerprint': fingerprint,
+            'created_at': time.time(),
+            'runners': runners
+        })
+        self.rebuilt = True
+        return runners
+
+    def fingerprint(self) -> str:
+        """Cheap change detector: plugin file mtimes and package dir mtimes"""
+        parts = [f"manifest:{MANIFEST_VERSION}", f"entry_points:{self.use_entry_points}",
+                 f"directory:{os.path.abspath(self.plugins_dir)}"]
+        for filename in self._plugin_files():
+            path = os.path.join(self.plugins_dir, filename)
+            parts.append(f"{filename}:{os.stat(path).st_mtime_ns}")
+
+        # Installing or removing a package changes its site directory's mtime.
+        # Other sys.path entries (the script directory, the working directory)
+        # change whenever a file is written there, so they are left out
+        if self.use_entry_points:
+            for entry in sys.path:
+                if os.path.basename(entry.rstrip(os.sep)) not in ('site-packages', 'dist-packages'):
+                    continue
+                try:
+                    parts.append(f"{entry}:{os.stat(entry).st_mtime_ns}")
+                except OSError:
+                    continue
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def build(self) -> List[Dict[str, Any]]:
+        """Import every plugin once and describe it"""
+        runners = []
+        for filename in self._plugin_files():
+            language = filename.replace('_runner.py', '')
+            path = os.path.abspath(os.path.join(self.plugins_dir, filename))
+            target = f"plugins.{filename[:-3]}:{language.title()}Runner"
+            entry = self._describe(language, target, f"file:{filename}", path)
+            if entry:
+                runners.append(entry)
+
+        for entry_point in self._entry_points():
+            dist = getattr(entry_point, 'dist', None)
+            source = f"entry_point:{dist.name}=={dist.version}" if dist else "entry_point"
+            entry = self._describe(entry_point.name, entry_point.value, source)
+            if entry:
+                runners.append(entry)
+        return runners
+
+    def _describe(self, language: str, target: str, source: str,
+                  path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        from .base_runner import BaseRunner
+        try:
+            runner_class = load_target(target, path)
+        except Exception as e:
+            print(f"Warning: Failed to load plugin {target}: {e}")
+            return None
+        if not (isinstance(runner_class, type) and issubclass(runner_class, BaseRunner)):
+            print(f"Warning: {target} is not a BaseRunner subclass")
+            return None
+
+        return {
+            'language': language.lower(),
+            'aliases': [alias.lower() for alias in getattr(runner_class, 'aliases', ())],
+            'capabilities': list(getattr(runner_class, 'capabilities', ())),
+            'target': target,
+            'path': path,
+            'source': source
+        }
+
+    def _plugin_files(self) -> List[str]:
+        if not os.path.isdir(self.plugins_dir):
+            return []
+        return sorted(name for name in os.listdir(self.plugins_dir) if name.endswith('_runner.py'))
+
+    def _entry_points(self):
+        if not self.use_entry_points:
+            return []
+        from importlib import metadata
+        try:
+            return list(metadata.entry_points(group=ENTRY_POINT_GROUP))
+        except TypeError:
+            # Python < 3.10: entry_points() returns a dict of groups
+            return list(metadata.entry_points().get(ENTRY_POINT_GROUP, []))
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, manifest: Dict[str, Any]):
+        """Atomically replace the cached index (best effort)"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
+
+
+def load_target(target: str, path: Optional[str] = None):
+    """Import 'package.module:Class', loading the module from path if given"""
+    module_name, _, attribute = target.partition(':')
+    module = sys.modules.get(module_name)
+    if module is None and path:
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[module_name]
+            raise
+    elif module is None:
+        module = importlib.import_module(module_name)
+    for part in attribute.split('.'):
+        module = getattr(module, part)
+    return module
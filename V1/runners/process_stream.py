@@ -0,0 +1,127 @@
+"""
+Live output streaming for runner child processes
+A caller installs a listener for the current thread with stream_output();
+BaseRunner.run_process and the sandbox then report stdout/stderr chunks
+to it as the child writes them. Streamed output is returned only as a
+bounded tail, since the listener has already seen all of it.
+The same launcher makes children cancellable (see cancellation.py).
+"""
+
+import codecs
+import collections
+import os
+import subprocess
+import threading
+from contextlib import contextmanager
+
+from .cancellation import kill_process_group
+
+CHUNK_SIZE = 4096
+
+# Characters of each stream kept for the result when a listener is attached
+STREAMED_TAIL_CHARS = 64 * 1024
+
+_local = threading.local()
+
+
+@contextmanager
+def stream_output(listener):
+    """
+    Report output of processes started by this thread to listener
+
+    listener(stream, text) is called from reader threads with stream
+    'stdout' or 'stderr'. It may block to apply backpressure; the child
+    then blocks once its pipe fills.
+    """
+    previous = getattr(_local, 'listener', None)
+    _local.listener = listener
+    try:
+        yield
+    finally:
+        _local.listener = previous
+
+
+def current_listener():
+    """The listener installed for this thread, or None"""
+    return getattr(_local, 'listener', None)
+
+
+class _Tail:
+    """Decoded output of one stream, trimmed to the last limit characters"""
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.parts = collections.deque()
+        self.size = 0
+        self.truncated = False
+
+    def append(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.limit is None:
+            return
+        while self.size - len(self.parts[0]) >= self.limit:
+            self.size -= len(self.parts.popleft())
+            self.truncated = True
+
+    def text(self):
+        data = ''.join(self.parts)
+        if self.limit is not None and len(data) > self.limit:
+            self.truncated = True
+            data = data[-self.limit:]
+        return data
+
+
+def _pump(pipe, stream, listener, tail):
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    fd = pipe.fileno()
+    while True:
+        data = os.read(fd, CHUNK_SIZE)
+        text = decoder.decode(data, final=not data)
+        if text:
+            tail.append(text)
+            if listener is not None:
+                listener(stream, text)
+        if not data:
+            break
+    pipe.close()
+
+
+def run_streaming(command, timeout, listener=None, env=None, token=None):
+    """
+    subprocess.run(capture_output=True, text=True) that also feeds each
+    chunk to listener as it arrives and can be cancelled through token
+
+    The child leads its own process group, so a timeout or cancellation
+    kills everything it spawned. Raises subprocess.TimeoutExpired like
+    subprocess.run; a cancelled child returns -SIGKILL.
+
+    With a listener, stdout and stderr keep only their last
+    STREAMED_TAIL_CHARS characters, and the result's truncated attribute
+    tells whether anything was dropped.
+    """
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env,
+                               start_new_session=True)
+    cancel_key = token.on_cancel(lambda: kill_process_group(process)) if token is not None else None
+    limit = STREAMED_TAIL_CHARS if listener is not None else None
+    stdout, stderr = _Tail(limit), _Tail(limit)
+    readers = [
+        threading.Thread(target=_pump, args=(process.stdout, 'stdout', listener, stdout), daemon=True),
+        threading.Thread(target=_pump, args=(process.stderr, 'stderr', listener, stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_group(process)
+        process.wait()
+        raise
+    finally:
+        if cancel_key is not None:
+            token.remove(cancel_key)
+        for reader in readers:
+            reader.join()
+    result = subprocess.CompletedProcess(command, returncode, stdout.text(), stderr.text())
+    result.truncated = stdout.truncated or stderr.truncated
+    return result
@@ -7,12 +7,15 @@ import json
 import pickle
 import base64
 from .base_runner import BaseRunner
+from .metrics import observe_stage
 
 class PythonRunner(BaseRunner):
     """
     Python code runner with data import/export capabilities
     """
     
+    version_command = ['python3', '--version']
+    
     def __init__(self, config=None):
         super().__init__(config)
         self.language = "python"
@@ -36,28 +39,32 @@ class PythonRunner(BaseRunner):
         enhanced_code = self._prepare_code(code, import_data, export_vars)
         
         # Create temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix=self.file_extension, delete=False) as f:
+        with tempfile.NamedTemporaryFile(mode='w', suffix=self.file_extension, delete=False,
+                                         dir=self.make_run_dir()) as f:
             f.write(enhanced_code)
             temp_file = f.name
         
         try:
             # Execute the Python code
-            result = subprocess.run(
+            export_file = os.path.join(os.path.dirname(temp_file), "__export__.json")
+            result = self.run_process(
                 ['python3', temp_file],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout
+                self.timeout,
+                files=[temp_file],
+                collect=[export_file]
             )
             
             execution_time = time.time() - start_time
             
             # Read exported data if available
-            exported_data = self._read_exported_data(temp_file)
+            with observe_stage(self.language, 'export'):
+                exported_data = self._read_exported_data(temp_file)
             
             return {
                 'output': result.stdout,
                 'error': result.stderr,
                 'return_code': result.returncode,
+                'truncated': getattr(result, 'truncated', False),
                 'exported_data': exported_data,
                 'execution_time': execution_time
             }
@@ -170,6 +177,7 @@ class PythonRunner(BaseRunner):
                 os.remove(export_file)
         except OSError:
             pass
+        self.remove_run_dir(os.path.dirname(temp_file))
 
 
 # Legacy function for backward compatibility
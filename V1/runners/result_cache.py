@@ -0,0 +1,160 @@
+# Result Cache for PolyRun
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Bump when the cached entry layout changes so stale entries are never reused
+CACHE_FORMAT_VERSION = 1
+
+
+class ResultCache:
+    """
+    Opt-in memoization of deterministic block executions
+
+    Entries are keyed by the block fingerprint (language, code, exports),
+    the runner/toolchain version and a hash of the imported values. Each
+    entry is stored as a JSON file so results survive across CLI runs.
+    """
+
+    def __init__(self, config=None):
+        cache_config = (config or {}).get('result_cache', {})
+        self.enabled = cache_config.get('enabled', False)
+        self.cache_all = cache_config.get('cache_all', False)
+        self.directory = cache_config.get('directory', 'cache/results')
+        self.ttl_seconds = cache_config.get('ttl_seconds', 3600)
+        self.max_entries = cache_config.get('max_entries', 256)
+        self.max_bytes = int(cache_config.get('max_size_mb', 64) * 1024 * 1024)
+        self._lock = threading.Lock()
+
+    def should_cache(self, cacheable: bool) -> bool:
+        """Check whether a block is eligible for caching"""
+        return self.enabled and (cacheable or self.cache_all)
+
+    def make_key(self, language: str, code: str, toolchain: Optional[str],
+                 import_data: Optional[Dict[str, Any]] = None,
+                 export_vars: Optional[List[str]] = None) -> str:
+        """Build the cache key for a block execution"""
+        imports_blob = json.dumps(import_data or {}, sort_keys=True, default=repr)
+        fingerprint = json.dumps({
+            'format': CACHE_FORMAT_VERSION,
+            'language': language,
+            'code': hashlib.sha256(code.encode('utf-8')).hexdigest(),
+            'exports': sorted(export_vars or []),
+            'toolchain': toolchain,
+            'imports': hashlib.sha256(imports_blob.encode('utf-8')).hexdigest()
+        }, sort_keys=True)
+        return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result marked as a cache hit, or None"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry.get('created_at', 0) > self.ttl_seconds:
+            self._remove(path)
+            return None
+
+        # Touch the entry so eviction is least-recently-used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        result = entry['result']
+        result['cache_hit'] = True
+        result['cached_execution_time'] = result.get('execution_time', 0)
+        result['execution_time'] = 0
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> bool:
+        """Store a successful result; returns False if it was not cacheable"""
+        if result.get('return_code') != 0:
+            return False
+        # A streamed run kept only the tail of its output
+        if result.get('truncated'):
+            return False
+
+        entry = {
+            'created_at': time.time(),
+            'result': {
+                'output': result.get('output', ''),
+                'error': result.get('error', ''),
+                'return_code': result.get('return_code'),
+                'exported_data': result.get('exported_data') or {},
+                'execution_time': result.get('execution_time', 0)
+            }
+        }
+
+        try:
+            payload = json.dumps(entry)
+        except (TypeError, ValueError):
+            # Exports that cannot round-trip through JSON are never cached
+            return False
+
+        if len(payload) > self.max_bytes:
+            return False
+
+        with self._lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                path = self._entry_path(key)
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'w') as f:
+                    f.write(payload)
+                os.replace(temp_path, path)
+            except OSError:
+                return False
+            self._evict()
+        return True
+
+    def clear(self):
+        """Remove all cached entries"""
+        with self._lock:
+            for path, _, _ in self._list_entries():
+                self._remove(path)
+
+    def _evict(self):
+        """Drop expired entries, then least-recently-used ones until within bounds"""
+        entries = self._list_entries()
+        now = time.time()
+        live = []
+        for path, mtime, size in entries:
+            if now - mtime > self.ttl_seconds:
+                self._remove(path)
+            else:
+                live.append((path, mtime, size))
+
+        live.sort(key=lambda entry: entry[1])
+        total_bytes = sum(size for _, _, size in live)
+        while live and (len(live) > self.max_entries or total_bytes > self.max_bytes):
+            path, _, size = live.pop(0)
+            self._remove(path)
+            total_bytes -= size
+
+    def _list_entries(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith('.json'):
+                        stat = entry.stat()
+                        entries.append((entry.path, stat.st_mtime, stat.st_size))
+        except OSError:
+            pass
+        return entries
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
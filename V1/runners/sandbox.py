@@ -0,0 +1,129 @@
+"""
+Linux namespace sandbox for PolyRun runners
+Runs child processes in unprivileged user/mount/network/PID namespaces
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+
+from .cancellation import current_token
+from .process_stream import current_listener, run_streaming
+
+LAUNCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_launcher.py')
+
+# Launcher exit status and stderr prefix when the namespaces cannot be set up
+SETUP_FAILED = 125
+SETUP_FAILED_PREFIX = '[sandbox] setup failed'
+
+DEFAULT_LIMITS = {
+    'memory_mb': 512,
+    'file_size_mb': 64,
+    'open_files': 64,
+    'max_processes': None,
+}
+
+
+class SandboxUnavailable(OSError):
+    """The kernel refused to create the sandbox namespaces"""
+
+
+class Sandbox:
+    """
+    Namespace sandbox configured by the "sandbox" section of config.json
+
+    Commands see a read-only root, a private tmpfs over the directory
+    holding their input files (and over /tmp), no network, their own PID
+    namespace and rlimits. Input files keep their host paths, so runners
+    pass the same command line they would run locally.
+    """
+
+    # Whether this kernel allows unprivileged namespaces (probed once per process)
+    _available = None
+
+    def __init__(self, config=None, language=None):
+        self.config = (config or {}).get('sandbox', {})
+        
+        # Per-language overrides, e.g. V8 reserves far more address space
+        # than it uses, so JavaScript needs memory_mb: 0 (no RLIMIT_AS)
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(self.config.get('limits', {}))
+        self.limits.update(self.config.get('language_limits', {}).get(language, {}))
+        self.uid = self.config.get('uid', 1000)
+        self.tmpfs_size = self.config.get('tmpfs_size', '64m')
+
+    @classmethod
+    def is_available(cls):
+        """Check that an empty command runs inside the namespaces"""
+        if cls._available is None:
+            try:
+                result = subprocess.run(
+                    [sys.executable, '-I', '-S', LAUNCHER, json.dumps({
+                        'command': ['true'], 'workdir': '/tmp', 'env': {'PATH': os.environ.get('PATH', '')}
+                    })],
+                    capture_output=True, text=True, timeout=10
+                )
+                cls._available = result.returncode == 0
+                if not cls._available:
+                    logging.getLogger(__name__).warning(
+                        f"Namespace sandbox unavailable: {result.stderr.strip()}")
+            except (OSError, subprocess.SubprocessError) as e:
+                logging.getLogger(__name__).warning(f"Namespace sandbox unavailable: {e}")
+                cls._available = False
+        return cls._available
+
+    def run(self, command, timeout, env=None, files=(), collect=()):
+        """
+        Run a command in the sandbox (same contract as subprocess.run)
+
+        Args:
+            command: Command line, referring to input files by host path
+            timeout: Wall clock limit in seconds
+            env: Environment for the command (defaults to os.environ)
+            files: Host files copied into the sandbox at the same paths
+            collect: Files copied back to the host if the command created them
+
+        All files must live in one directory, which becomes the tmpfs workdir.
+        Raises subprocess.TimeoutExpired like subprocess.run, and
+        SandboxUnavailable if the namespaces cannot be created.
+        """
+        workdirs = {os.path.dirname(os.path.abspath(path)) for path in list(files) + list(collect)}
+        if len(workdirs) > 1:
+            raise ValueError(f"Sandbox files must share one directory, got {sorted(workdirs)}")
+        workdir = workdirs.pop() if workdirs else '/tmp'
+
+        limits = dict(self.limits)
+        if timeout and not limits.get('cpu_seconds'):
+            limits['cpu_seconds'] = int(timeout) + 1
+
+        spec = {
+            'command': list(command),
+            'workdir': workdir,
+            'env': dict(os.environ if env is None else env),
+            'files': [os.path.abspath(path) for path in files],
+            'collect': [os.path.abspath(path) for path in collect],
+            'limits': limits,
+            'uid': self.uid,
+            'tmpfs_size': self.tmpfs_size,
+        }
+
+        # Killing the launcher takes the whole PID namespace down with it
+        launcher = [sys.executable, '-I', '-S', LAUNCHER, json.dumps(spec)]
+        listener = current_listener()
+        token = current_token()
+        if listener is not None or token is not None:
+            # Setup failures fall back to local execution; keep them off the stream
+            def forward(stream, text):
+                if not (stream == 'stderr' and text.startswith(SETUP_FAILED_PREFIX)):
+                    listener(stream, text)
+            result = run_streaming(launcher, timeout, forward if listener is not None else None, token=token)
+        else:
+            result = subprocess.run(launcher, capture_output=True, text=True, timeout=timeout)
+        if result.returncode == SETUP_FAILED and result.stderr.startswith(SETUP_FAILED_PREFIX):
+            Sandbox._available = False
+            logging.getLogger(__name__).warning(f"Namespace sandbox unavailable: {result.stderr.strip()}")
+            raise SandboxUnavailable(result.stderr.strip())
+        Sandbox._available = True
+        return result
@@ -0,0 +1,212 @@
+"""
+Namespace sandbox launcher for PolyRun
+Run as a script by runners/sandbox.py; only depends on the standard library
+
+Usage: python3 -I -S sandbox_launcher.py '<json spec>'
+
+The launcher unshares user, mount, network, PID, IPC and UTS namespaces,
+remounts the root read-only, mounts a private tmpfs over the work
+directory (and /tmp), copies the input files in, and forks the command
+as PID 1 of the new PID namespace with rlimits applied. Afterwards it
+copies the requested output files back to the host and exits with the
+command's status.
+"""
+
+import ctypes
+import json
+import os
+import resource
+import signal
+import sys
+
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUTS = 0x04000000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWNET = 0x40000000
+
+MS_RDONLY = 1
+MS_NOSUID = 2
+MS_NODEV = 4
+MS_NOEXEC = 8
+MS_REMOUNT = 32
+MS_NOATIME = 1024
+MS_NODIRATIME = 2048
+MS_BIND = 4096
+MS_REC = 16384
+MS_PRIVATE = 1 << 18
+MS_RELATIME = 1 << 21
+
+PR_SET_PDEATHSIG = 1
+
+# statvfs flags that must be kept when remounting a mount we do not own
+LOCKED_FLAGS = [
+    (os.ST_NOSUID, MS_NOSUID),
+    (os.ST_NODEV, MS_NODEV),
+    (os.ST_NOEXEC, MS_NOEXEC),
+    (os.ST_NOATIME, MS_NOATIME),
+    (os.ST_NODIRATIME, MS_NODIRATIME),
+    (os.ST_RELATIME, MS_RELATIME),
+]
+
+# Exit status reported when the sandbox itself could not be set up
+SETUP_FAILED = 125
+
+libc = ctypes.CDLL(None, use_errno=True)
+libc.mount.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_ulong, ctypes.c_char_p]
+
+
+def check(result, what):
+    if result != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"{what}: {os.strerror(errno)}")
+
+
+def mount(source, target, fstype, flags, data=None):
+    check(libc.mount(source and source.encode(), target.encode(), fstype and fstype.encode(),
+                     flags, data and data.encode()), f"mount {target}")
+
+
+def write_file(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def enter_namespaces(uid):
+    """Unshare namespaces and map the caller to an unprivileged uid inside"""
+    host_uid, host_gid = os.geteuid(), os.getegid()
+    flags = CLONE_NEWUSER | CLONE_NEWNS | CLONE_NEWNET | CLONE_NEWPID | CLONE_NEWIPC | CLONE_NEWUTS
+    check(libc.unshare(flags), "unshare")
+    write_file('/proc/self/setgroups', 'deny')
+    # A non-zero uid inside means exec drops the namespace capabilities, so
+    # the command cannot undo the mounts set up below
+    write_file('/proc/self/uid_map', f'{uid} {host_uid} 1')
+    write_file('/proc/self/gid_map', f'{uid} {host_gid} 1')
+
+
+def mount_points():
+    with open('/proc/self/mountinfo') as f:
+        points = [line.split()[4] for line in f]
+    return [point.replace('\\040', ' ') for point in points]
+
+
+def make_root_readonly():
+    """Bind the root onto itself and remount every mount read-only"""
+    mount(None, '/', None, MS_REC | MS_PRIVATE)
+    mount('/', '/', None, MS_BIND | MS_REC)
+    for point in mount_points():
+        try:
+            locked = os.statvfs(point).f_flag
+        except OSError:
+            continue
+        flags = MS_REMOUNT | MS_BIND | MS_RDONLY
+        for st_flag, ms_flag in LOCKED_FLAGS:
+            if locked & st_flag:
+                flags |= ms_flag
+        try:
+            mount(None, point, None, flags)
+        except OSError:
+            # Pseudo filesystems (proc, sysfs...) may refuse; they are
+            # replaced or unreachable from inside the sandbox anyway
+            pass
+
+
+def read_inputs(paths):
+    """Read input files before their directory is covered by the tmpfs"""
+    inputs = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            inputs.append((path, f.read(), os.stat(path).st_mode & 0o777))
+    return inputs
+
+
+def write_inputs(inputs):
+    for path, data, mode in inputs:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        os.chmod(path, mode)
+
+
+def copy_outputs(paths, host_dir_fd, workdir):
+    """Copy outputs from the tmpfs to the host directory hidden beneath it"""
+    for path in paths:
+        if os.path.dirname(path) != workdir or not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        mode = os.stat(path).st_mode & 0o777
+        fd = os.open(os.path.basename(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode, dir_fd=host_dir_fd)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(os.path.basename(path), mode, dir_fd=host_dir_fd)
+
+
+def set_limits(limits):
+    rlimits = {
+        'memory_mb': (resource.RLIMIT_AS, 1024 * 1024),
+        'cpu_seconds': (resource.RLIMIT_CPU, 1),
+        'file_size_mb': (resource.RLIMIT_FSIZE, 1024 * 1024),
+        'open_files': (resource.RLIMIT_NOFILE, 1),
+        'max_processes': (resource.RLIMIT_NPROC, 1),
+    }
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    for name, (limit, scale) in rlimits.items():
+        value = limits.get(name)
+        if value:
+            resource.setrlimit(limit, (int(value * scale), int(value * scale)))
+
+
+def run_child(spec):
+    """PID 1 of the new PID namespace: finish setup and exec the command"""
+    libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL)
+    try:
+        # Fresh /proc showing only the sandbox's own processes
+        mount('proc', '/proc', 'proc', MS_NOSUID | MS_NODEV | MS_NOEXEC)
+    except OSError:
+        pass
+    set_limits(spec.get('limits', {}))
+    os.chdir(spec['workdir'])
+    os.execvpe(spec['command'][0], spec['command'], spec['env'])
+
+
+def main():
+    spec = json.loads(sys.argv[1])
+    workdir = spec['workdir']
+
+    try:
+        inputs = read_inputs(spec.get('files', []))
+        host_dir_fd = os.open(workdir, os.O_RDONLY | os.O_DIRECTORY)
+        enter_namespaces(spec.get('uid', 1000))
+        make_root_readonly()
+
+        tmpfs_options = f"size={spec.get('tmpfs_size', '64m')},mode=0700,uid={spec.get('uid', 1000)},gid={spec.get('uid', 1000)}"
+        for target in sorted({workdir, '/tmp'}):
+            if os.path.isdir(target):
+                mount('tmpfs', target, 'tmpfs', MS_NOSUID | MS_NODEV, tmpfs_options)
+        # A workdir below /tmp is hidden by the /tmp tmpfs; recreate it there
+        os.makedirs(workdir, exist_ok=True)
+        write_inputs(inputs)
+    except OSError as e:
+        sys.stderr.write(f"[sandbox] setup failed: {e}\n")
+        sys.exit(SETUP_FAILED)
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_child(spec)
+        except OSError as e:
+            sys.stderr.write(f"[sandbox] exec failed: {e}\n")
+        os._exit(127)
+
+    _, status = os.waitpid(pid, 0)
+    copy_outputs(spec.get('collect', []), host_dir_fd, workdir)
+
+    if os.WIFSIGNALED(status):
+        sys.exit(128 + os.WTERMSIG(status))
+    sys.exit(os.WEXITSTATUS(status))
+
+
+if __name__ == '__main__':
+    main()
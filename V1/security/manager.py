@@ -4,9 +4,115 @@ Handles security policies, resource limits, and code validation
 """
 
 import re
+import json
+import hashlib
 import logging
+import threading
+from security.verdict_cache import VerdictCache, code_fingerprint
+from security.python_analyzer import analyze_python, ANALYZER_VERSION
+from runners.metrics import SECURITY_EVENTS
+
+FILE_OPERATIONS_PATTERN = r'open\s*\([^)]*["\'][rwa]'
+
+# Built-in rules; config "security_rules" adds more per language
+DEFAULT_DANGEROUS_PATTERNS = {
+    'python': [
+        r'os\.system\s*\(',
+        r'subprocess\.',
+        r'eval\s*\(',
+        r'exec\s*\(',
+        r'__import__\s*\(',
+        FILE_OPERATIONS_PATTERN,
+        r'import\s+socket',
+        r'import\s+urllib',
+        r'import\s+requests',
+    ],
+    'cpp': [
+        r'system\s*\(',
+        r'fork\s*\(',
+        r'exec[lv]*\s*\(',
+        r'#include\s*<sys/',
+        r'#include\s*<unistd\.h>',
+        r'fopen\s*\(',
+        r'popen\s*\(',
+    ]
+}
+
+CPP_INFINITE_LOOP = re.compile(r'while\s*\(\s*true\s*\)', re.IGNORECASE)
+
+REGEX_METACHARS = set('.^$*+?{}[]|()')
+
+
+def required_literal(pattern):
+    """
+    Leading literal text that every match of a pattern must contain
+    Returns the lowercased literal, or '' when none can be extracted safely
+    """
+    if '|' in pattern:
+        return ''
+    
+    literal = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            # Escaped punctuation is literal; \s, \d, \b... end the literal
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break
+            char = pattern[i + 1]
+            step = 2
+        elif char in REGEX_METACHARS:
+            break
+        else:
+            step = 1
+        
+        # A character followed by an optional quantifier is not required
+        following = pattern[i + step:i + step + 1]
+        if following and following in '*?{':
+            break
+        literal.append(char)
+        i += step
+    
+    text = ''.join(literal).lower()
+    return text if len(text) >= 2 else ''
+
+
+class CompiledPolicy:
+    """
+    All rules of one language, compiled once
+    
+    Python's backtracking engine loses its literal-prefix scan on a large
+    alternation, so instead the block is lowercased once and each rule's
+    required literal is checked with a substring search; only rules whose
+    literal is present run their precompiled regex.
+    """
+    
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.rules = [
+            (pattern, re.compile(pattern, re.IGNORECASE), required_literal(pattern))
+            for pattern in self.patterns
+        ]
+    
+    def search(self, code):
+        """Return the pattern of the first matching rule, or None"""
+        lowered = None
+        for pattern, regex, literal in self.rules:
+            if literal:
+                if lowered is None:
+                    lowered = code.lower()
+                if literal not in lowered:
+                    continue
+            if regex.search(code):
+                return pattern
+        return None
+
 
 class SecurityManager:
+    # Compiled policies are shared by every manager with the same rules
+    _compiled_policies = {}
+    _compile_lock = threading.Lock()
+    
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
@@ -15,39 +121,95 @@ class SecurityManager:
         self.policies = config.get('docker_security_policies', {})
         self.resource_limits = config.get('docker_resource_limits', {})
         
+        # Python blocks are checked with the AST analyzer; the built-in
+        # regexes (bar the open() rule) and rules from config apply on top
+        self.python_analysis = config.get('security_python_analysis', True)
+        
+        # Scanning rules and verdict memoization
+        self.rules = self._load_rules(config)
+        self.policy_id = hashlib.sha256(json.dumps(self.rules, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        self.verdict_cache = VerdictCache(config.get('security_verdict_cache_size', 1024))
+    
+    def _load_rules(self, config):
+        """Merge the built-in patterns with rules from config"""
+        rules = {language: list(patterns) for language, patterns in DEFAULT_DANGEROUS_PATTERNS.items()}
+        if self.python_analysis:
+            # The analyzer tells reads from writes; the rest stay as a backstop
+            rules['python'].remove(FILE_OPERATIONS_PATTERN)
+        for language, extra_rules in config.get('security_rules', {}).items():
+            patterns = rules.setdefault(language.lower(), [])
+            for rule in extra_rules:
+                patterns.append(rule if isinstance(rule, str) else rule['pattern'])
+        return rules
+    
+    def get_compiled_policy(self, language, patterns=None):
+        """Get the compiled policy for a language (compiled once per process)"""
+        if patterns is None:
+            patterns = self.rules.get(language.lower(), [])
+        patterns = tuple(patterns)
+        key = (language.lower(), patterns)
+        policy = SecurityManager._compiled_policies.get(key)
+        if policy is None:
+            with SecurityManager._compile_lock:
+                policy = SecurityManager._compiled_policies.get(key)
+                if policy is None:
+                    policy = CompiledPolicy(patterns)
+                    SecurityManager._compiled_policies[key] = policy
+        return policy
+        
     def validate_code_safety(self, code, language):
         """
         Perform static analysis to detect potentially dangerous patterns
         Returns: (is_safe: bool, message: str)
         """
-        dangerous_patterns = {
-            'python': [
-                r'os\.system\s*\(',
-                r'subprocess\.',
-                r'eval\s*\(',
-                r'exec\s*\(',
-                r'__import__\s*\(',
-                r'open\s*\([^)]*["\'][rwa]',  # File operations
-                r'import\s+socket',
-                r'import\s+urllib',
-                r'import\s+requests',
-            ],
-            'cpp': [
-                r'system\s*\(',
-                r'fork\s*\(',
-                r'exec[lv]*\s*\(',
-                r'#include\s*<sys/',
-                r'#include\s*<unistd\.h>',
-                r'fopen\s*\(',
-                r'popen\s*\(',
-            ]
-        }
-        
-        patterns = dangerous_patterns.get(language.lower(), [])
+        key = code_fingerprint(language, code, self.policy_id)
+        verdict = self.verdict_cache.get(key)
+        if verdict is None:
+            verdict = self._scan_code(code, language)
+            self.verdict_cache.put(key, verdict)
+        return verdict
+    
+    def analyze_code(self, code, language):
+        """
+        AST analysis report for a block, cached by fingerprint
+        Returns None for languages without an analyzer
+        """
+        if language.lower() != 'python' or not self.python_analysis:
+            return None
+        key = code_fingerprint(language, code, 'analysis', ANALYZER_VERSION)
+        report = self.verdict_cache.get(key)
+        if report is None:
+            report = analyze_python(code)
+            self.verdict_cache.put(key, report)
+        return report
+    
+    def allows_fast_path(self, code, language):
+        """
+        Whether a block may skip full container isolation
+        Only pure blocks qualify: safe, and within the analyzer's allowlist
+        of modules and builtins
+        """
+        report = self.analyze_code(code, language)
+        if report is None or not report['pure']:
+            return False
+        return self.validate_code_safety(code, language)[0]
+    
+    def _scan_code(self, code, language):
+        """Run the analyzer, the compiled policy and resource usage checks"""
+        report = self.analyze_code(code, language)
+        if report is not None:
+            if report['verdict'] == 'unsafe':
+                finding = next(item for item in report['findings'] if item['severity'] == 'unsafe')
+                return False, f"Unsafe Python construct: {finding['detail']} (line {finding['line']})"
+            if report['syntax_error']:
+                # Unparseable blocks get the conservative regex rules
+                pattern = self.get_compiled_policy(language, DEFAULT_DANGEROUS_PATTERNS['python']).search(code)
+                if pattern is not None:
+                    return False, f"Potentially dangerous pattern detected: {pattern}"
         
-        for pattern in patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                return False, f"Potentially dangerous pattern detected: {pattern}"
+        pattern = self.get_compiled_policy(language).search(code)
+        if pattern is not None:
+            return False, f"Potentially dangerous pattern detected: {pattern}"
         
         # Check for excessive resource usage patterns
         if language.lower() == 'python':
@@ -55,7 +217,7 @@ class SecurityManager:
                 return False, "Potential infinite loop detected without sleep"
             
         elif language.lower() == 'cpp':
-            if re.search(r'while\s*\(\s*true\s*\)', code, re.IGNORECASE):
+            if CPP_INFINITE_LOOP.search(code):
                 return False, "Potential infinite loop detected"
         
         return True, "Code passed safety validation"
@@ -86,7 +248,7 @@ class SecurityManager:
         """Get resource limits for containers"""
         return {
             'mem_limit': self.resource_limits.get('memory', '512m'),
-            'cpu_quota': int(self.resource_limits.get('cpu', '0.5') * 100000),  # Convert to microseconds
+            'cpu_quota': int(float(self.resource_limits.get('cpu', '0.5')) * 100000),  # Convert to microseconds
             'cpu_period': 100000,  # 100ms
             'pids_limit': 50,
             'ulimits': [
@@ -104,4 +266,5 @@ class SecurityManager:
     
     def log_security_event(self, event_type, language, details):
         """Log security-related events"""
+        SECURITY_EVENTS.inc(event_type, language)
         self.logger.info(f"Security Event: {event_type} | Language: {language} | Details: {details}")
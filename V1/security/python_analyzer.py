@@ -0,0 +1,350 @@
+"""
+AST-based safety analysis for Python blocks
+Resolves imports and attribute chains in a single tree walk
+"""
+
+import ast
+import builtins
+import importlib
+import types
+
+# Bump when the rules change so cached reports are not reused
+ANALYZER_VERSION = 3
+
+# Importing any of these blocks the code
+UNSAFE_MODULES = {
+    'subprocess', 'socket', 'ctypes', 'pty', 'cffi', 'posix', 'nt', '_posixsubprocess',
+    'runpy', 'code', 'codeop',
+}
+
+# Allowed, but only with full container isolation
+RESTRICTED_MODULES = {
+    'urllib', 'http', 'requests', 'ftplib', 'smtplib', 'telnetlib', 'ssl',
+    'shutil', 'importlib', 'multiprocessing', 'pickle', 'marshal', 'signal',
+    'pathlib', 'tempfile', '_io',
+}
+
+# `from X import *` of these hides what the names resolve to
+STAR_RESTRICTED_MODULES = {'os', 'sys', 'io'} | UNSAFE_MODULES | RESTRICTED_MODULES
+
+# Qualified names that block the code; a rule also covers names it prefixes
+# (os.exec covers os.execv, os.spawn covers os.spawnlp)
+UNSAFE_NAMES = (
+    'os.system', 'os.popen', 'os.fork', 'os.forkpty', 'os.kill', 'os.killpg',
+    'os.exec', 'os.spawn', 'os.posix_spawn', 'asyncio.create_subprocess',
+    'importlib.import_module', 'importlib.__import__', 'sys.modules',
+)
+
+# Qualified names (or prefixes) that need full container isolation
+RESTRICTED_NAMES = (
+    'os.remove', 'os.unlink', 'os.rmdir', 'os.removedirs', 'os.rename', 'os.replace',
+    'os.chmod', 'os.chown', 'os.mkdir', 'os.makedirs', 'os.open', 'os.write',
+    'os.putenv', 'os.chdir', 'os.symlink', 'os.link', 'os.truncate', 'os.ftruncate',
+    'os.fdopen', 'os.mkfifo', 'os.mknod', 'os.utime', 'os.lchown', 'os.fchmod', 'os.fchown',
+    'os.setsid', 'os.setpgid', 'os.setpgrp', 'os.setuid', 'os.setgid', 'os.setreuid',
+    'os.setregid', 'os.setresuid', 'os.setresgid', 'sys.settrace', 'sys.setprofile',
+)
+
+# Calls that open files, checked for a writing mode like the open() builtin
+OPEN_FUNCTIONS = {'io.open', 'io.FileIO', 'codecs.open'}
+
+UNSAFE_BUILTINS = {'eval', 'exec', 'compile', '__import__'}
+RESTRICTED_BUILTINS = {'getattr', 'setattr', 'delattr', 'globals', 'locals', 'vars', 'breakpoint'}
+
+# Introspection used to climb out of restricted namespaces (frames carry
+# their globals and builtins)
+UNSAFE_ATTRIBUTES = {
+    '__subclasses__', '__globals__', '__builtins__', '__code__', '__closure__',
+    'f_globals', 'f_builtins', 'f_locals', 'f_back', 'gi_frame', 'cr_frame', 'ag_frame', 'tb_frame',
+}
+RESTRICTED_ATTRIBUTES = {'__bases__', '__base__', '__mro__', '__getattribute__', '__dict__'}
+
+# A block is pure, and may take the fast path, only if everything it
+# imports and every builtin it names is listed here. Modules reached
+# through a pure module's attributes (enum.bltns, datetime.sys) must be
+# pure too; operator, string and typing can turn strings into attribute
+# lookups or code, so they are left out.
+PURE_MODULES = {
+    'math', 'cmath', 'decimal', 'fractions', 'numbers', 'random', 'statistics',
+    'itertools', 'functools', 'collections', 'heapq', 'bisect', 'array', 'copy',
+    're', 'textwrap', 'unicodedata', 'json', 'datetime', 'calendar', 'time',
+    'enum', 'pprint', 'abc', 'hashlib', 'base64', 'binascii', 'struct', 'keyword', 'difflib',
+}
+
+PURE_BUILTINS = {
+    'abs', 'aiter', 'all', 'anext', 'any', 'ascii', 'bin', 'bool', 'bytearray', 'bytes',
+    'callable', 'chr', 'classmethod', 'complex', 'dict', 'dir', 'divmod', 'enumerate',
+    'filter', 'float', 'format', 'frozenset', 'hasattr', 'hash', 'hex', 'id', 'int',
+    'isinstance', 'issubclass', 'iter', 'len', 'list', 'map', 'max', 'memoryview', 'min',
+    'next', 'object', 'oct', 'ord', 'pow', 'print', 'property', 'range', 'repr', 'reversed',
+    'round', 'set', 'slice', 'sorted', 'staticmethod', 'str', 'sum', 'super', 'tuple',
+    'type', 'zip', 'Ellipsis', 'NotImplemented', '__name__', '__doc__', '__debug__',
+} | {
+    name for name, value in vars(builtins).items()
+    if isinstance(value, type) and issubclass(value, BaseException)
+}
+
+# Names that are builtins (site adds exit, help, ...)
+BUILTIN_NAMES = set(dir(builtins)) | {'exit', 'quit', 'help', 'copyright', 'credits', 'license'}
+
+# Underscore attributes a pure block may use
+PURE_ATTRIBUTES = {'__name__', '__qualname__', '__doc__', '__init__', '__class__'}
+
+
+class PythonAnalyzer(ast.NodeVisitor):
+    """
+    Walks a module once, tracking import aliases, and reports findings
+
+    Findings are 'unsafe' (block the code) or 'restricted' (allowed, but
+    not on the cheaper execution paths). A block with no findings is 'safe'.
+    Separately, a block is 'pure' when it stays within the PURE_* allowlists.
+    """
+
+    def __init__(self):
+        self.aliases = {}
+        self.bound_names = set()
+        self.imports = set()
+        self.findings = []
+        self.pure = True
+        self._builtin_uses = []
+        self._loads = []
+        self._star_modules = set()
+
+    def analyze(self, code):
+        """
+        Analyze a block of Python source
+        Returns: {'verdict', 'findings', 'imports', 'syntax_error', 'pure'}
+        """
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError) as e:
+            return {
+                'verdict': 'restricted',
+                'findings': [self._finding('restricted', getattr(e, 'lineno', 0) or 0, f"Syntax error: {e}")],
+                'imports': [],
+                'syntax_error': True,
+                'pure': False
+            }
+
+        self.visit(tree)
+
+        # Bindings are not tracked per scope or branch, so a shadowed name may
+        # still be the builtin where it is used: it needs full isolation
+        for severity, line, name in self._builtin_uses:
+            if name in self.bound_names:
+                self._add('restricted', line, f"Use of {name}(), which is rebound in this block")
+            else:
+                self._add(severity, line, f"Use of builtin {name}()")
+
+        for line, name in self._loads:
+            # Bindings may not happen first, so builtin names count regardless
+            if name in BUILTIN_NAMES and name not in PURE_BUILTINS:
+                self.pure = False
+            # Names a star import may have brought in
+            for module in self._star_modules:
+                self._check_name(line, f"{module}.{name}")
+
+        verdict = 'safe'
+        if any(finding['severity'] == 'unsafe' for finding in self.findings):
+            verdict = 'unsafe'
+        elif self.findings:
+            verdict = 'restricted'
+
+        return {
+            'verdict': verdict,
+            'findings': sorted(self.findings, key=lambda finding: finding['line']),
+            'imports': sorted(self.imports),
+            'syntax_error': False,
+            'pure': self.pure and verdict == 'safe'
+        }
+
+    # Name resolution
+
+    def resolve(self, node):
+        """Fully qualified dotted name of an expression, or None"""
+        if isinstance(node, ast.Name):
+            return self.aliases.get(node.id, node.id)
+        if isinstance(node, ast.Attribute):
+            base = self.resolve(node.value)
+            return f"{base}.{node.attr}" if base else None
+        if isinstance(node, ast.Call) and self._is_builtin(node.func, 'getattr') and len(node.args) >= 2:
+            attribute = node.args[1]
+            if isinstance(attribute, ast.Constant) and isinstance(attribute.value, str):
+                base = self.resolve(node.args[0])
+                return f"{base}.{attribute.value}" if base else None
+        return None
+
+    def _is_builtin(self, node, name):
+        # Aliases are not flow-aware either, so the name may still be the builtin
+        return isinstance(node, ast.Name) and node.id == name
+
+    # Imports
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self._record_import(node.lineno, alias.name)
+            if alias.asname:
+                self.aliases[alias.asname] = alias.name
+                self.bound_names.add(alias.asname)
+            else:
+                top = alias.name.split('.')[0]
+                self.aliases[top] = top
+                self.bound_names.add(top)
+
+    def visit_ImportFrom(self, node):
+        if node.level:
+            self._add('restricted', node.lineno, "Relative import")
+            self.pure = False
+            return
+        self._record_import(node.lineno, node.module)
+        for alias in node.names:
+            qualified = f"{node.module}.{alias.name}"
+            if alias.name == '*':
+                self.pure = False
+                self._star_modules.add(node.module)
+                if node.module.split('.')[0] in STAR_RESTRICTED_MODULES:
+                    self._add('restricted', node.lineno, f"Star import from {node.module}")
+                continue
+            self._check_name(node.lineno, qualified)
+            self._check_purity(qualified)
+            local = alias.asname or alias.name
+            self.aliases[local] = qualified
+            self.bound_names.add(local)
+
+    def _record_import(self, line, module):
+        top = module.split('.')[0]
+        self.imports.add(top)
+        if top not in PURE_MODULES:
+            self.pure = False
+        if top in UNSAFE_MODULES:
+            self._add('unsafe', line, f"Import of {module}")
+        elif top in RESTRICTED_MODULES:
+            self._add('restricted', line, f"Import of {module}")
+        else:
+            self._check_name(line, module)
+
+    # Bindings that shadow builtins
+
+    def visit_FunctionDef(self, node):
+        self.bound_names.add(node.name)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.bound_names.add(node.name)
+        self.generic_visit(node)
+
+    def visit_arg(self, node):
+        self.bound_names.add(node.arg)
+        self.generic_visit(node)
+
+    # References
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Store):
+            self.bound_names.add(node.id)
+            return
+        self._loads.append((node.lineno, node.id))
+        if node.id in self.aliases:
+            self._check_name(node.lineno, self.aliases[node.id])
+        if node.id == '__builtins__':
+            self._add('unsafe', node.lineno, "Access to __builtins__")
+        elif node.id in UNSAFE_BUILTINS:
+            self._builtin_uses.append(('unsafe', node.lineno, node.id))
+        elif node.id in RESTRICTED_BUILTINS:
+            self._builtin_uses.append(('restricted', node.lineno, node.id))
+
+    def visit_Attribute(self, node):
+        if node.attr in UNSAFE_ATTRIBUTES:
+            self._add('unsafe', node.lineno, f"Access to {node.attr}")
+        elif node.attr in RESTRICTED_ATTRIBUTES:
+            self._add('restricted', node.lineno, f"Access to {node.attr}")
+        if node.attr.startswith('_') and node.attr not in PURE_ATTRIBUTES:
+            self.pure = False
+        name = self.resolve(node)
+        self._check_name(node.lineno, name)
+        self._check_purity(name)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if self._is_builtin(node.func, 'getattr') and len(node.args) >= 2:
+            attribute = node.args[1]
+            if isinstance(attribute, ast.Constant) and isinstance(attribute.value, str):
+                # getattr(os, 'system') is os.system
+                if attribute.value in UNSAFE_ATTRIBUTES:
+                    self._add('unsafe', node.lineno, f"Access to {attribute.value}")
+                self._check_name(node.lineno, self.resolve(node))
+            else:
+                self._add('restricted', node.lineno, "Dynamic getattr() with a computed name")
+            # Resolved above; only walk the object and any default
+            for child in [node.args[0]] + node.args[2:]:
+                self.visit(child)
+            return
+
+        if self._is_builtin(node.func, 'open'):
+            self._check_open(node)
+        elif self.resolve(node.func) in OPEN_FUNCTIONS:
+            self._check_open(node, self.resolve(node.func))
+        self.generic_visit(node)
+
+    def _check_open(self, node, function='open'):
+        mode = node.args[1] if len(node.args) >= 2 else None
+        for keyword in node.keywords:
+            if keyword.arg == 'mode':
+                mode = keyword.value
+        if mode is None:
+            return
+        if not (isinstance(mode, ast.Constant) and isinstance(mode.value, str)):
+            self._add('restricted', node.lineno, f"{function}() with a computed mode")
+        elif set(mode.value) & set('wax+'):
+            self._add('restricted', node.lineno, f"{function}() for writing (mode '{mode.value}')")
+
+    def _check_purity(self, name):
+        """A pure module's attribute chain must not lead into an impure module"""
+        if not name or name.split('.')[0] not in PURE_MODULES:
+            return
+        value = importlib.import_module(name.split('.')[0])
+        for attribute in name.split('.')[1:]:
+            value = getattr(value, attribute, None)
+            if not isinstance(value, types.ModuleType):
+                return
+            if value.__name__.split('.')[0] not in PURE_MODULES:
+                self.pure = False
+                return
+
+    # Findings
+
+    def _check_name(self, line, name):
+        if not name:
+            return
+        if name.startswith('builtins.'):
+            builtin = name[len('builtins.'):]
+            if builtin in UNSAFE_BUILTINS:
+                self._add('unsafe', line, f"Use of builtin {builtin}()")
+            elif builtin in RESTRICTED_BUILTINS:
+                self._add('restricted', line, f"Use of builtin {builtin}()")
+        elif name.split('.')[0] in UNSAFE_MODULES:
+            self._add('unsafe', line, f"Use of {name}")
+        elif _prefix_match(name, UNSAFE_NAMES):
+            self._add('unsafe', line, f"Use of {name}")
+        elif _prefix_match(name, RESTRICTED_NAMES):
+            self._add('restricted', line, f"Use of {name}")
+
+    def _finding(self, severity, line, detail):
+        return {'severity': severity, 'line': line, 'detail': detail}
+
+    def _add(self, severity, line, detail):
+        finding = self._finding(severity, line, detail)
+        if finding not in self.findings:
+            self.findings.append(finding)
+
+
+def _prefix_match(name, rules):
+    """True when name is a rule or a name/member under it (os.exec matches os.execv)"""
+    return any(name.startswith(rule) for rule in rules)
+
+
+def analyze_python(code):
+    """Analyze a Python block with a fresh analyzer"""
+    return PythonAnalyzer().analyze(code)
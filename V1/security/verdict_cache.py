@@ -0,0 +1,55 @@
+"""
+Bounded verdict cache for PolyRun security checks
+Memoizes analysis results by code fingerprint
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def code_fingerprint(language, code, *extra):
+    """Stable fingerprint of a block (plus any policy identifiers)"""
+    digest = hashlib.sha256()
+    for part in (language.lower(), code) + tuple(str(item) for item in extra):
+        digest.update(part.encode('utf-8', errors='surrogatepass'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class VerdictCache:
+    """Thread-safe least-recently-used cache with a fixed number of entries"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
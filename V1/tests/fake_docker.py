@@ -0,0 +1,162 @@
+"""
+In-process stand-in for the docker SDK client used by DockerRunner tests
+"""
+
+import io
+import os
+import tarfile
+import time
+
+
+class FakeContainer:
+    """Records files, execs and lifecycle calls instead of talking to Docker"""
+
+    def __init__(self, client, container_id, kwargs):
+        self.client = client
+        self.id = container_id
+        self.kwargs = kwargs
+        self.status = 'running'
+        self.files = {}
+        self.exec_calls = []
+        self.removed = False
+        self.killed = False
+        self.result = None
+
+    def reload(self):
+        pass
+
+    def extract(self, path, data):
+        """What `tar -x -C path` does with data on stdin"""
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            for member in tar.getmembers():
+                if member.isfile():
+                    self.files[os.path.normpath(f"{path}/{member.name}")] = tar.extractfile(member).read()
+
+    def stats(self, stream=True, decode=None, one_shot=None):
+        if self.client.stats_samples:
+            self.client.last_stats = self.client.stats_samples.pop(0)
+        return self.client.last_stats
+
+    def wait(self, timeout=None):
+        return {'StatusCode': self.result[0]}
+
+    def logs(self):
+        return (self.result[1] or b'') + (self.result[2] or b'')
+
+    def exec_run(self, cmd, workdir=None, user=None, environment=None, demux=False):
+        self.exec_calls.append(cmd)
+        if cmd[:2] == ['sh', '-c'] and 'rm -rf' in cmd[2]:
+            self.files.clear()
+            return 0, (None, None) if demux else b''
+        if cmd[0] == 'cat':
+            if cmd[1] not in self.files:
+                return 1, (None, b'No such file or directory') if demux else b'No such file or directory'
+            return 0, (self.files[cmd[1]], None) if demux else self.files[cmd[1]]
+        if self.client.exec_delay:
+            time.sleep(self.client.exec_delay)
+        exit_code, stdout, stderr = self.client.exec_handler(self, cmd, environment or {})
+        if demux:
+            return exit_code, (stdout, stderr)
+        return exit_code, (stdout or b'') + (stderr or b'')
+
+    def kill(self):
+        self.killed = True
+        self.status = 'exited'
+
+    def remove(self, force=False):
+        self.removed = True
+        self.status = 'removed'
+        self.client.removed.append(self.id)
+
+
+class FakeExecSocket:
+    """Attached exec stream: collects stdin, runs the command when it is closed for writing"""
+
+    def __init__(self, api, exec_id):
+        self.api = api
+        self.exec_id = exec_id
+        self.sent = b''
+
+    def sendall(self, data):
+        self.sent += data
+
+    def shutdown(self, how):
+        container, cmd = self.api.execs[self.exec_id]['container'], self.api.execs[self.exec_id]['cmd']
+        exit_code = 2
+        if cmd[:2] == ['tar', '-x'] and not container.killed:
+            container.extract(cmd[cmd.index('-C') + 1], self.sent)
+            exit_code = 0
+        self.api.execs[self.exec_id]['exit_code'] = exit_code
+
+    def recv(self, size):
+        return b''
+
+    def close(self):
+        pass
+
+
+class FakeAPI:
+    """The low-level APIClient calls used for exec with stdin"""
+
+    def __init__(self, client):
+        self.client = client
+        self.execs = {}
+
+    def exec_create(self, container_id, cmd, stdin=False, user=None):
+        container = next(container for container in self.client.created if container.id == container_id)
+        exec_id = f"exec{len(self.execs)}"
+        self.execs[exec_id] = {'container': container, 'cmd': cmd, 'stdin': stdin, 'exit_code': None}
+        return {'Id': exec_id}
+
+    def exec_start(self, exec_id, socket=False):
+        return FakeExecSocket(self, exec_id)
+
+    def exec_inspect(self, exec_id):
+        return {'Running': False, 'ExitCode': self.execs[exec_id]['exit_code']}
+
+
+class FakeContainers:
+    def __init__(self, client):
+        self.client = client
+        self.prune_calls = []
+
+    def run(self, **kwargs):
+        self.client.run_calls.append(kwargs)
+        container = FakeContainer(self.client, f"fake{len(self.client.run_calls):060d}", kwargs)
+        self.client.created.append(container)
+        if kwargs.get('command') != ['sleep', 'infinity']:
+            # One-shot container: runs its command immediately
+            container.result = self.client.exec_handler(container, kwargs['command'], kwargs.get('environment') or {})
+        return container
+
+    def prune(self, filters=None):
+        self.prune_calls.append(filters)
+        return {}
+
+
+class FakeImages:
+    def __init__(self):
+        self.prune_calls = []
+
+    def prune(self, filters=None):
+        self.prune_calls.append(filters)
+        return {}
+
+
+class FakeDockerClient:
+    """Minimal docker.DockerClient replacement"""
+
+    def __init__(self, exec_handler=None, exec_delay=0):
+        self.exec_handler = exec_handler or (lambda container, cmd, env: (0, b'ok\n', b''))
+        self.exec_delay = exec_delay
+        self.stats_samples = []
+        self.last_stats = {}
+        self.run_calls = []
+        self.created = []
+        self.removed = []
+        self.containers = FakeContainers(self)
+        self.api = FakeAPI(self)
+        self.images = FakeImages()
+
+    def info(self):
+        return {'ServerVersion': 'fake'}
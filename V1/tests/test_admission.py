@@ -0,0 +1,182 @@
+import unittest
+import importlib.util
+import threading
+import asyncio
+import types
+import sys
+import os
+
+# Add project root and web backend to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(PROJECT_ROOT, 'web', 'backend')
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, BACKEND_DIR)
+
+from admission import AdmissionController, AdmissionRejected, client_key
+from runners.job_queue import JobQueue
+
+def load_web_main():
+    """Import web/backend/main.py without clashing with the CLI's main.py"""
+    spec = importlib.util.spec_from_file_location('web_backend_main', os.path.join(BACKEND_DIR, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class FakeHeaders(dict):
+    """Lower-cased header name -> list of values, like Starlette's getlist"""
+
+    def getlist(self, name):
+        return self.get(name, [])
+
+def fake_request(host, **headers):
+    return types.SimpleNamespace(client=types.SimpleNamespace(host=host),
+                                 headers=FakeHeaders({name.replace('_', '-'): [value] for name, value in headers.items()}))
+
+class TestAdmissionController(unittest.TestCase):
+    """Tests for token buckets, in-flight limits and Retry-After"""
+
+    def test_rate_limit_per_client(self):
+        """Test that an empty bucket gives 429 without affecting other clients"""
+        admission = AdmissionController({'admission': {'rate_per_second': 0.5, 'burst': 2}})
+        admission.check_rate('a')
+        admission.check_rate('a')
+        with self.assertRaises(AdmissionRejected) as raised:
+            admission.check_rate('a')
+
+        self.assertEqual(raised.exception.status_code, 429)
+        self.assertEqual(raised.exception.retry_after, 2)
+        admission.check_rate('b')
+        self.assertEqual(admission.stats()['rejected_rate_limited'], 1)
+
+    def test_queue_depth_sheds_load(self):
+        """Test that requests beyond in-flight plus queue depth get 503"""
+        admission = AdmissionController({'admission': {'max_in_flight': 1, 'max_queue_depth': 1,
+                                                       'rate_per_second': 0}})
+
+        async def scenario():
+            release = asyncio.Event()
+            entered = []
+
+            async def hold(name):
+                async with admission.admit(name):
+                    entered.append(name)
+                    await release.wait()
+
+            first = asyncio.create_task(hold('first'))
+            second = asyncio.create_task(hold('second'))
+            await asyncio.sleep(0.01)
+            self.assertEqual((admission.in_flight, admission.waiting), (1, 1))
+
+            with self.assertRaises(AdmissionRejected) as raised:
+                async with admission.admit('third'):
+                    pass
+            release.set()
+            await asyncio.gather(first, second)
+            return entered, raised.exception
+
+        entered, rejection = asyncio.run(scenario())
+        self.assertEqual(entered, ['first', 'second'])
+        self.assertEqual(rejection.status_code, 503)
+        stats = admission.stats()
+        self.assertEqual((stats['admitted'], stats['rejected_overloaded']), (2, 1))
+        self.assertIsNotNone(stats['latency_seconds'])
+
+    def test_retry_after_follows_observed_latency(self):
+        """Test that the 503 hint is the latency average, clamped"""
+        admission = AdmissionController({'admission': {'max_retry_after': 30}})
+        self.assertEqual(admission.retry_after(), 1)
+        admission.latency = 7.2
+        self.assertEqual(admission.retry_after(), 8)
+        self.assertEqual(admission.retry_after(latency=400), 30)
+
+    def test_client_table_is_bounded(self):
+        """Test that idle client buckets are pruned at max_clients"""
+        admission = AdmissionController({'admission': {'max_clients': 3, 'burst': 1}})
+        for n in range(10):
+            admission.check_rate(f'client{n}')
+        self.assertLessEqual(admission.stats()['clients'], 3)
+
+    def test_client_seen_through_trusted_proxies(self):
+        """Test that forwarding headers are only believed from trusted proxies"""
+        admission = AdmissionController({'admission': {'trusted_proxies': ['10.0.0.0/8']}})
+        # Spoofed left-hand entry; the proxy appended the real peer
+        via_proxy = fake_request('10.0.0.7', x_forwarded_for='6.6.6.6, 203.0.113.5, 10.1.2.3')
+        self.assertEqual(admission.client_key(via_proxy), '203.0.113.5')
+        direct = fake_request('198.51.100.9', x_forwarded_for='203.0.113.5')
+        self.assertEqual(admission.client_key(direct), '198.51.100.9')
+        self.assertEqual(admission.client_key(fake_request('10.0.0.7')), '10.0.0.7')
+        self.assertEqual(client_key(via_proxy), '10.0.0.7')
+
+        forwarded = fake_request('10.0.0.7', forwarded='for="[2001:db8::1]:4711";proto=https, for=10.1.2.3')
+        self.assertEqual(client_key(forwarded, admission.trusted_proxies, 'forwarded'), '2001:db8::1')
+        self.assertEqual(client_key(fake_request('10.0.0.7', forwarded='for=_hidden'),
+                                    admission.trusted_proxies, 'forwarded'), '10.0.0.7')
+
+class TestAdmissionEndpoints(unittest.TestCase):
+    """Tests for 429/503 responses from both FastAPI backends"""
+
+    def setUp(self):
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            self.skipTest("fastapi test client not installed")
+        self.TestClient = TestClient
+
+    def test_modern_server_rate_limit_and_full_queue(self):
+        """Test that /jobs returns 429 and 503 with Retry-After"""
+        import modern_server
+        release = threading.Event()
+        job_queue = JobQueue({'job_queue': {'workers': 1, 'max_queued': 1}},
+                             executor=lambda code, config, consolidate, log: release.wait(10))
+        self.addCleanup(job_queue.shutdown)
+        self.addCleanup(release.set)
+        job_queue.latency = 12.5
+        modern_server._job_queue = job_queue
+        modern_server._admission = AdmissionController({'admission': {'rate_per_second': 0.1, 'burst': 3}})
+        self.addCleanup(setattr, modern_server, '_job_queue', None)
+        self.addCleanup(setattr, modern_server, '_admission', None)
+        client = self.TestClient(modern_server.app)
+
+        statuses = [client.post('/jobs', json={'code': ''}) for _ in range(4)]
+        self.assertEqual([response.status_code for response in statuses[:2]], [202, 202])
+        # One job running, one queued: the third is shed
+        self.assertEqual(statuses[2].status_code, 503)
+        self.assertEqual(statuses[2].headers['Retry-After'], '13')
+        self.assertEqual(statuses[3].status_code, 429)
+        self.assertEqual(statuses[3].headers['Retry-After'], '10')
+        self.assertEqual(client.get('/health').json()['admission']['rejected_overloaded'], 1)
+
+    def test_web_api_rate_limit(self):
+        """Test that /api/execute runs admitted requests and rejects the rest"""
+        web_main = load_web_main()
+        with self.TestClient(web_main.app) as client:
+            web_main.admission = AdmissionController({'admission': {'rate_per_second': 0.1, 'burst': 1}})
+            first = client.post('/api/execute', json={'code': '#lang: bash\necho admitted\n'})
+            second = client.post('/api/execute', json={'code': '#lang: bash\necho rejected\n'})
+            stats = client.get('/api/admission').json()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('admitted', first.json()['output'])
+        self.assertEqual(second.status_code, 429)
+        self.assertEqual(second.headers['Retry-After'], '10')
+        self.assertEqual((stats['admitted'], stats['rejected_rate_limited']), (1, 1))
+
+    def test_clients_behind_a_proxy_get_their_own_buckets(self):
+        """Test that /jobs rate limits forwarded clients separately, not the proxy"""
+        import modern_server
+        job_queue = JobQueue({'job_queue': {'workers': 1}}, executor=lambda code, config, consolidate, log: None)
+        self.addCleanup(job_queue.shutdown)
+        modern_server._job_queue = job_queue
+        modern_server._admission = AdmissionController({'admission': {
+            'rate_per_second': 0.1, 'burst': 1, 'trusted_proxies': ['10.0.0.0/8']}})
+        self.addCleanup(setattr, modern_server, '_job_queue', None)
+        self.addCleanup(setattr, modern_server, '_admission', None)
+        client = self.TestClient(modern_server.app, client=('10.0.0.7', 40000))
+
+        def submit(address):
+            return client.post('/jobs', json={'code': ''}, headers={'X-Forwarded-For': address}).status_code
+
+        self.assertEqual([submit('203.0.113.5'), submit('198.51.100.9'), submit('203.0.113.5')], [202, 202, 429])
+
+if __name__ == '__main__':
+    unittest.main()
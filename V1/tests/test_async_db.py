@@ -0,0 +1,142 @@
+import unittest
+import importlib.util
+import threading
+import tempfile
+import asyncio
+import shutil
+import time
+import sys
+import os
+
+# Add project root and web backend to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(PROJECT_ROOT, 'web', 'backend')
+sys.path.insert(0, PROJECT_ROOT)
+
+from database.project_db import ProjectDatabase
+from database.async_db import AsyncProjectDatabase
+
+SAMPLE_MIX = '#lang: python\nprint("hi")\n\n#lang: bash\necho hi\n'
+
+class RecordingDatabase(ProjectDatabase):
+    """Notes the thread each call runs on; saves take save_delay seconds"""
+
+    save_delay = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = []
+
+    def save_project(self, *args, **kwargs):
+        self.threads.append(('save', threading.current_thread().name))
+        time.sleep(self.save_delay)
+        return super().save_project(*args, **kwargs)
+
+    def get_project(self, project_id):
+        self.threads.append(('get', threading.current_thread().name))
+        return super().get_project(project_id)
+
+class TestAsyncProjectDatabase(unittest.TestCase):
+    """Tests for the asyncio facade"""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, True)
+        self.db = AsyncProjectDatabase(db=RecordingDatabase(os.path.join(self.workdir, 'polyrun.db')))
+        self.addCleanup(self.db.close_sync)
+
+    def test_reads_and_writes_use_their_own_threads(self):
+        """Test that calls run on the reader pool or the single writer, never the loop"""
+        async def scenario():
+            ids = await asyncio.gather(*[self.db.save_project(f"p{n}", "", "a", SAMPLE_MIX) for n in range(4)])
+            projects = await asyncio.gather(*[self.db.get_project(project_id) for project_id in ids])
+            return threading.current_thread().name, ids, projects
+
+        loop_thread, ids, projects = asyncio.run(scenario())
+        self.assertEqual([project['id'] for project in projects], ids)
+        writers = {name for call, name in self.db.db.threads if call == 'save'}
+        readers = {name for call, name in self.db.db.threads if call == 'get'}
+        self.assertEqual(len(writers), 1)
+        self.assertTrue(all(name.startswith('polyrun-db-writer') for name in writers))
+        self.assertTrue(all(name.startswith('polyrun-db-reader') for name in readers))
+        self.assertNotIn(loop_thread, writers | readers)
+
+    def test_slow_writes_do_not_stall_the_loop(self):
+        """Test that the loop keeps serving while writes are queued, and cancelled callers' writes land"""
+        self.db.db.save_delay = 0.2
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticking = asyncio.create_task(ticker())
+            first = asyncio.create_task(self.db.save_project("first", "", "a", SAMPLE_MIX))
+            # Still queued behind first when its caller goes away
+            abandoned = asyncio.create_task(self.db.save_project("abandoned", "", "a", SAMPLE_MIX))
+            await asyncio.sleep(0.05)
+            abandoned.cancel()
+            await first
+            await self.db.save_project("kept", "", "a", SAMPLE_MIX)
+            ticking.cancel()
+            return ticks, await self.db.list_projects()
+
+        ticks, projects = asyncio.run(scenario())
+        self.assertGreater(ticks, 10)
+        self.assertEqual({project['name'] for project in projects}, {"first", "abandoned", "kept"})
+
+class TestProjectEndpoints(unittest.TestCase):
+    """End-to-end tests for the /api/projects endpoints"""
+
+    def test_save_list_search_and_share(self):
+        """Test the project endpoints against a scratch database"""
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            self.skipTest("fastapi test client not installed")
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, True)
+        spec = importlib.util.spec_from_file_location('web_backend_main', os.path.join(BACKEND_DIR, 'main.py'))
+        web_main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(web_main)
+
+        with TestClient(web_main.app) as client:
+            web_main.config['project_database'] = {'path': os.path.join(workdir, 'polyrun.db'), 'readers': 2}
+            public = client.post('/api/projects', json={'name': 'Matrix demo', 'code': SAMPLE_MIX,
+                                                        'tags': ['python'], 'is_public': True})
+            private = client.post('/api/projects', json={'name': 'Matrix secret', 'code': SAMPLE_MIX})
+            self.assertEqual(public.status_code, 201)
+            public_id, private_id = public.json()['id'], private.json()['id']
+
+            page = client.get('/api/projects', params={'limit': 1}).json()
+            self.assertEqual([project['id'] for project in page['projects']], [public_id])
+            self.assertIsNone(page['next_cursor'])
+            self.assertEqual(client.get('/api/projects', params={'cursor': 'bogus'}).status_code, 400)
+            self.assertEqual(client.get('/api/projects', params={'limit': 1000}).status_code, 422)
+
+            found = client.get('/api/projects/search', params={'q': 'matrix', 'tag': 'python'}).json()
+            self.assertEqual([project['id'] for project in found['projects']], [public_id])
+            self.assertEqual(client.get(f'/api/projects/{public_id}').json()['content'], SAMPLE_MIX)
+            self.assertEqual(client.get('/api/projects/missing').status_code, 404)
+
+            token = client.post(f'/api/projects/{public_id}/share').json()['share_token']
+            shared = client.get(f'/api/shared/{token}').json()
+            self.assertEqual(shared['name'], 'Matrix demo')
+            self.assertEqual(shared['id'], public_id)
+            self.assertEqual(client.post('/api/projects/missing/share').status_code, 404)
+
+            # Private projects are neither served nor shareable without accounts
+            self.assertEqual(client.get(f'/api/projects/{private_id}').status_code, 404)
+            self.assertEqual(client.post(f'/api/projects/{private_id}/share').status_code, 404)
+
+            stats = client.get('/api/projects/stats').json()
+            self.assertEqual(stats['total_projects'], 2)
+            self.assertEqual(stats['popular_tags'], {'python': 1})
+        self.assertIsNone(web_main.project_db)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import importlib.util
+import tempfile
+import asyncio
+import shutil
+import json
+import sys
+import os
+from unittest import mock
+
+# Add project root and web backend to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(PROJECT_ROOT, 'web', 'backend')
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, BACKEND_DIR)
+
+from runners.cpp_runner import CppRunner
+from batch import BatchError, parse_programs, program_key, run_batch
+
+class TestParsePrograms(unittest.TestCase):
+    """Tests for decoding batch uploads"""
+
+    def test_json_array_and_object(self):
+        """Test that arrays, {"programs": [...]} and bare strings are accepted"""
+        self.assertEqual(parse_programs(b'[{"code": "a"}, "b"]'), [{'code': 'a'}, {'code': 'b'}])
+        self.assertEqual(parse_programs('{"programs": [{"code": "a", "id": "x"}]}'), [{'code': 'a', 'id': 'x'}])
+
+    def test_ndjson_keeps_going_past_bad_lines(self):
+        """Test that a malformed NDJSON line only fails its own entry"""
+        entries = parse_programs(b'{"code": "a"}\n\nnot json\n"b"\n', 'application/x-ndjson')
+        self.assertEqual(entries[0], {'code': 'a'})
+        self.assertIsInstance(entries[1], BatchError)
+        self.assertIn('Line 3', str(entries[1]))
+        self.assertEqual(entries[2], {'code': 'b'})
+
+    def test_undecodable_body(self):
+        """Test that a body that is not a batch raises BatchError"""
+        for body in (b'{"code": "a"}', b'nope', b'\xff'):
+            with self.assertRaises(BatchError):
+                parse_programs(body, 'application/json')
+
+class TestRunBatch(unittest.TestCase):
+    """Tests for parallel, deduplicated batch execution"""
+
+    def collect(self, programs, execute, max_parallel=4, dedupe=True):
+        async def scenario():
+            return [result async for result in run_batch(programs, execute, max_parallel, dedupe)]
+        return asyncio.run(scenario())
+
+    def test_identical_programs_run_once(self):
+        """Test that duplicates reuse the first program's execution"""
+        calls = []
+
+        async def execute(code):
+            calls.append(code)
+            return {'output': code.upper()}
+
+        programs = [(f'p{i}', program_key(code), code) for i, code in enumerate(['a', 'b', 'a', 'a'])]
+        results = sorted(self.collect(programs, execute), key=lambda result: result['index'])
+
+        self.assertEqual(sorted(calls), ['a', 'b'])
+        self.assertEqual([result['output'] for result in results], ['A', 'B', 'A', 'A'])
+        self.assertEqual([result['duplicate_of'] for result in results], [None, None, 0, 0])
+        self.assertEqual([result['id'] for result in results], ['p0', 'p1', 'p2', 'p3'])
+
+        calls.clear()
+        self.collect(programs, execute, dedupe=False)
+        self.assertEqual(len(calls), 4)
+
+    def test_results_stream_in_completion_order_within_parallel_limit(self):
+        """Test that a fast program is reported before a slow one started earlier"""
+        running, peak = [0], [0]
+
+        async def execute(delay):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(delay)
+            running[0] -= 1
+            if delay < 0:
+                raise RuntimeError("boom")
+            return {'delay': delay}
+
+        delays = [0.2, 0.01, 0.01, 0.01, -1]
+        results = self.collect([(None, None, delay) for delay in delays], execute, max_parallel=2)
+
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(results[-1]['index'], 0)
+        failed = next(result for result in results if result['index'] == 4)
+        self.assertEqual((failed['success'], failed['error']), (False, 'Internal error: boom'))
+
+class TestCompileCache(unittest.TestCase):
+    """Tests for reusing compiled C++ binaries"""
+
+    def test_identical_source_compiles_once(self):
+        """Test that the second run of the same block skips g++"""
+        if shutil.which('g++') is None:
+            self.skipTest("g++ not installed")
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        runner = CppRunner({'timeout': 20, 'compile_cache': {'enabled': True, 'directory': cache_dir}})
+        code = 'std::cout << "cached" << std::endl;'
+
+        with mock.patch.object(runner, 'run_process', wraps=runner.run_process) as run_process:
+            first = runner.run(code)
+            compiles = run_process.call_count
+            second = runner.run(code)
+
+        self.assertEqual(compiles, 2)
+        self.assertEqual(run_process.call_count, 3)
+        self.assertEqual((first['output'], second['output']), ('cached\n', 'cached\n'))
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+class TestBatchEndpoint(unittest.TestCase):
+    """End-to-end test for POST /api/batch"""
+
+    def test_ndjson_results_per_program(self):
+        """Test that every program gets a result line and duplicates are shared"""
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            self.skipTest("fastapi test client not installed")
+        spec = importlib.util.spec_from_file_location('web_backend_main', os.path.join(BACKEND_DIR, 'main.py'))
+        web_main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(web_main)
+
+        body = '\n'.join([
+            json.dumps({'id': 'first', 'code': '#lang: bash\necho "run $RANDOM"\n'}),
+            json.dumps({'id': 'second', 'code': '#lang: bash\necho other\n'}),
+            json.dumps({'id': 'copy', 'code': '#lang: bash\necho "run $RANDOM"\n'}),
+            json.dumps({'id': 'broken'}),
+        ])
+        with TestClient(web_main.app) as client:
+            web_main.config['execution_modes'] = {}
+            response = client.post('/api/batch', content=body, headers={'Content-Type': 'application/x-ndjson'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['content-type'], 'application/x-ndjson')
+        results = {line['id']: line for line in map(json.loads, response.text.splitlines())}
+        self.assertEqual(set(results), {'first', 'second', 'copy', 'broken'})
+        self.assertTrue(results['second']['success'])
+        self.assertEqual(results['copy']['output'], results['first']['output'])
+        self.assertEqual(results['copy']['duplicate_of'], 0)
+        self.assertFalse(results['broken']['success'])
+        self.assertIn('Invalid program', results['broken']['error'])
+        self.assertEqual({line['execution_id'] for line in results.values()}, {response.headers['x-execution-id']})
+        self.assertEqual(web_main.active_executions, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+import unittest
+import importlib.util
+import threading
+import json
+import time
+import sys
+import os
+
+# Add project root and web backend to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(PROJECT_ROOT, 'web', 'backend')
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, BACKEND_DIR)
+
+from runners.cancellation import CancelToken, cancellable
+from runners.bash_runner import BashRunner
+from runners.python_runner import PythonRunner
+from runners.sandbox import Sandbox
+from runners.job_queue import JobQueue, CANCELLED, COMPLETED
+from tests.fake_docker import FakeDockerClient
+
+try:
+    from runners.docker_runner import DockerRunner
+    DOCKER_SDK_AVAILABLE = True
+except (ImportError, AttributeError):
+    DOCKER_SDK_AVAILABLE = False
+
+# Long sleeps tagged with an unusual duration so leftovers can be spotted
+SLEEP_MARKER = '31.7'
+
+def marker_processes():
+    """PIDs of processes still running `sleep SLEEP_MARKER`"""
+    pids = []
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                if f.read().split(b'\0')[:2] == [b'sleep', SLEEP_MARKER.encode()]:
+                    pids.append(pid)
+        except OSError:
+            continue
+    return pids
+
+def cancel_later(token, delay=0.3):
+    timer = threading.Timer(delay, token.cancel)
+    timer.start()
+    return timer
+
+class TestCancelToken(unittest.TestCase):
+    """Tests for the token itself"""
+
+    def test_callbacks_run_once(self):
+        """Test that cancel runs registered callbacks once and late ones at once"""
+        token = CancelToken()
+        calls = []
+        key = token.on_cancel(lambda: calls.append('removed'))
+        token.remove(key)
+        token.on_cancel(lambda: calls.append('early'))
+        token.cancel()
+        token.cancel()
+        token.on_cancel(lambda: calls.append('late'))
+        self.assertEqual(calls, ['early', 'late'])
+        self.assertTrue(token.cancelled)
+
+class TestProcessCancellation(unittest.TestCase):
+    """Tests that cancelling kills the whole process group"""
+
+    def test_local_block_and_children_are_killed(self):
+        """Test that a cancelled bash block and its background job die"""
+        runner = BashRunner({'timeout': 20, 'execution_modes': {'bash': 'local'}})
+        token = CancelToken()
+        cancel_later(token)
+        start = time.time()
+        with cancellable(token):
+            result = runner.run(f'sleep {SLEEP_MARKER} &\nsleep {SLEEP_MARKER}\n')
+
+        self.assertLess(time.time() - start, 5)
+        self.assertNotEqual(result['return_code'], 0)
+        time.sleep(0.1)
+        self.assertEqual(marker_processes(), [])
+
+    def test_sandboxed_block_is_killed(self):
+        """Test that cancelling a sandboxed block tears down its namespace"""
+        if not Sandbox.is_available():
+            self.skipTest("namespace sandbox unavailable")
+        runner = PythonRunner({'timeout': 20, 'execution_modes': {'python': 'sandbox'}})
+        token = CancelToken()
+        cancel_later(token)
+        start = time.time()
+        with cancellable(token):
+            runner.run(f"import subprocess\nsubprocess.run(['sleep', '{SLEEP_MARKER}'])")
+
+        self.assertLess(time.time() - start, 5)
+        time.sleep(0.1)
+        self.assertEqual(marker_processes(), [])
+
+    def test_already_cancelled_token_kills_at_launch(self):
+        """Test that a block started after cancel does not keep running"""
+        token = CancelToken()
+        token.cancel()
+        start = time.time()
+        with cancellable(token):
+            BashRunner({'timeout': 20, 'execution_modes': {}}).run(f'sleep {SLEEP_MARKER}')
+        self.assertLess(time.time() - start, 5)
+
+@unittest.skipUnless(DOCKER_SDK_AVAILABLE, "docker SDK not installed")
+class TestPoolCancellation(unittest.TestCase):
+    """Tests that a cancelled pooled exec recycles its container"""
+
+    def test_cancel_kills_and_recycles_container(self):
+        """Test that cancel kills the pooled container and releases it"""
+        def exec_handler(container, cmd, environment):
+            while not container.killed:
+                time.sleep(0.01)
+            return 137, b'', b''
+
+        client = FakeDockerClient(exec_handler=exec_handler)
+        runner = DockerRunner({'docker_pool': {'enabled': True, 'sizes': {'python': 1}},
+                               'docker_resource_limits': {'cpu': '0.5', 'memory': '256m'}},
+                              docker_client=client)
+        token = CancelToken()
+        cancel_later(token, 0.1)
+        with cancellable(token):
+            result = runner._run_in_pool('print(1)', 'python', {'timeout_seconds': 20})
+
+        self.assertTrue(result['cancelled'])
+        self.assertEqual(result['error'], 'Execution cancelled')
+        self.assertEqual(runner.pool.idle_count('python'), 0)
+        self.assertEqual(len(client.removed), 1)
+
+class TestJobCancellation(unittest.TestCase):
+    """Tests for cancelling queued and running jobs"""
+
+    def test_running_job_skips_remaining_blocks_and_frees_worker(self):
+        """Test that cancel stops the block, skips the rest and frees the slot"""
+        job_queue = JobQueue({'job_queue': {'workers': 1}, 'execution_modes': {}})
+        self.addCleanup(job_queue.shutdown)
+        job = job_queue.submit(f'#lang: bash\necho first\nsleep {SLEEP_MARKER}\n\n'
+                               '#lang: bash\necho never\n', consolidate=False)
+        while 'Running block 1' not in job.output:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        follow_up = job_queue.submit('#lang: bash\necho next\n')
+
+        start = time.time()
+        self.assertIs(job_queue.cancel(job.id), job)
+        self.assertTrue(job.wait(5))
+        self.assertTrue(follow_up.wait(5))
+
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(job.status, CANCELLED)
+        self.assertNotIn('never', job.output)
+        self.assertIn('skipped 1 remaining blocks', job.output)
+        self.assertEqual(follow_up.status, COMPLETED)
+
+    def test_queued_job_never_starts(self):
+        """Test that a job cancelled while queued is finished without running"""
+        release = threading.Event()
+        ran = []
+
+        def executor(code, config, consolidate, log):
+            ran.append(code)
+            release.wait(10)
+
+        job_queue = JobQueue({'job_queue': {'workers': 1}}, executor=executor)
+        self.addCleanup(job_queue.shutdown)
+        self.addCleanup(release.set)
+        job_queue.submit('first')
+        queued = job_queue.submit('second')
+
+        job_queue.cancel(queued.id)
+        self.assertTrue(queued.wait(1))
+        self.assertEqual(queued.status, CANCELLED)
+        release.set()
+        job_queue.shutdown()
+        self.assertEqual(ran, ['first'])
+
+class TestCancellationEndpoints(unittest.TestCase):
+    """Tests for the HTTP and websocket cancel paths"""
+
+    def setUp(self):
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            self.skipTest("fastapi test client not installed")
+        spec = importlib.util.spec_from_file_location('web_backend_main', os.path.join(BACKEND_DIR, 'main.py'))
+        self.web_main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.web_main)
+        self.TestClient = TestClient
+
+    def test_http_execution_cancelled_by_id(self):
+        """Test that /api/executions/{id}/cancel stops a waiting /api/execute"""
+        responses = []
+        with self.TestClient(self.web_main.app) as client:
+            request = threading.Thread(target=lambda: responses.append(client.post('/api/execute', json={
+                'code': f'#lang: bash\nsleep {SLEEP_MARKER}\n\n#lang: bash\necho never\n',
+                'consolidate': False,
+                'execution_id': 'run-1'
+            })))
+            request.start()
+            while 'run-1' not in self.web_main.active_executions:
+                time.sleep(0.01)
+            time.sleep(0.2)
+            cancel = client.post('/api/executions/run-1/cancel')
+            request.join(5)
+            missing = client.post('/api/executions/run-1/cancel')
+
+        self.assertEqual(cancel.status_code, 200)
+        self.assertEqual(missing.status_code, 404)
+        body = responses[0].json()
+        self.assertEqual((body['execution_id'], body['cancelled'], body['success']), ('run-1', True, False))
+        self.assertNotIn('never', body['output'])
+
+    def test_websocket_cancel_message(self):
+        """Test that {"type": "cancel"} ends the running execution"""
+        messages = []
+        with self.TestClient(self.web_main.app) as client:
+            with client.websocket_connect('/api/ws/execute') as websocket:
+                websocket.send_text(json.dumps({'code': f'#lang: bash\nsleep {SLEEP_MARKER}\n'}))
+                while not messages or messages[-1]['type'] != 'block_start':
+                    messages.append(json.loads(websocket.receive_text()))
+                start = time.time()
+                websocket.send_text(json.dumps({'type': 'cancel'}))
+                while messages[-1]['type'] not in ('cancelled', 'complete', 'error'):
+                    messages.append(json.loads(websocket.receive_text()))
+
+        self.assertEqual(messages[-1]['type'], 'cancelled')
+        self.assertEqual(messages[-1]['execution_id'], messages[0]['execution_id'])
+        self.assertLess(time.time() - start, 5)
+
+if __name__ == '__main__':
+    unittest.main()
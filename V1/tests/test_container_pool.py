@@ -0,0 +1,152 @@
+import unittest
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fake_docker import FakeDockerClient
+
+try:
+    from runners.docker_runner import DockerRunner
+    from runners.container_pool import MANAGED_LABEL
+    DOCKER_SDK_AVAILABLE = True
+except (ImportError, AttributeError):
+    DOCKER_SDK_AVAILABLE = False
+
+@unittest.skipUnless(DOCKER_SDK_AVAILABLE, "docker SDK not installed")
+class TestContainerPool(unittest.TestCase):
+    """Tests for the warm Docker container pool using a fake client"""
+
+    def make_runner(self, client, **pool_overrides):
+        pool_config = {
+            'enabled': True,
+            'sizes': {'python': 1},
+            'idle_timeout_seconds': 300,
+            'max_jobs_per_container': 3
+        }
+        pool_config.update(pool_overrides)
+        config = {'docker_pool': pool_config, 'docker_resource_limits': {'cpu': '0.5', 'memory': '256m'}}
+        return DockerRunner(config, docker_client=client)
+
+    def test_container_reused_between_jobs(self):
+        """Test that consecutive blocks reuse one warm container"""
+        client = FakeDockerClient()
+        runner = self.make_runner(client)
+
+        first = runner.run_code('print("a")', 'python', {'timeout_seconds': 5})
+        second = runner.run_code('print("b")', 'python', {'timeout_seconds': 5})
+
+        self.assertTrue(first['success'])
+        self.assertTrue(second['pooled'])
+        self.assertEqual(len(client.run_calls), 1)
+        container = client.created[0]
+        self.assertIn(['python3', '/work/code.py'], container.exec_calls)
+        # Workspace is wiped after every job
+        self.assertEqual(container.files, {})
+
+    def test_containers_are_locked_down(self):
+        """Test that pooled containers use the same lockdown as one-shot runs"""
+        client = FakeDockerClient()
+        runner = self.make_runner(client)
+        runner.prewarm_pool(['python'])
+
+        kwargs = client.run_calls[0]
+        self.assertEqual(kwargs['network_mode'], 'none')
+        self.assertTrue(kwargs['read_only'])
+        self.assertEqual(kwargs['cap_drop'], ['ALL'])
+        self.assertEqual(kwargs['labels'][MANAGED_LABEL], 'true')
+        self.assertEqual(kwargs['cpu_quota'], 50000)
+        self.assertEqual(runner.pool.idle_count('python'), 1)
+
+    def test_recycled_after_max_jobs(self):
+        """Test that containers are replaced after max_jobs_per_container"""
+        client = FakeDockerClient()
+        runner = self.make_runner(client, max_jobs_per_container=2)
+
+        for _ in range(3):
+            runner.run_code('print(1)', 'python', {'timeout_seconds': 5})
+
+        self.assertEqual(len(client.run_calls), 2)
+        self.assertTrue(client.created[0].removed)
+
+    def test_timeout_kills_and_recycles(self):
+        """Test that a timed out exec kills its container"""
+        client = FakeDockerClient(exec_delay=0.5)
+        runner = self.make_runner(client)
+
+        result = runner.run_code('print(1)', 'python', {'timeout_seconds': 0.1})
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['exit_code'], 124)
+        self.assertTrue(client.created[0].killed)
+        self.assertTrue(client.created[0].removed)
+        self.assertEqual(runner.pool.idle_count(), 0)
+
+    def test_unhealthy_and_idle_containers_replaced(self):
+        """Test health checks on acquire and reaping of idle containers"""
+        client = FakeDockerClient()
+        runner = self.make_runner(client, idle_timeout_seconds=60)
+        runner.prewarm_pool(['python'])
+
+        client.created[0].status = 'exited'
+        runner.run_code('print(1)', 'python', {'timeout_seconds': 5})
+        self.assertEqual(len(client.run_calls), 2)
+        self.assertTrue(client.created[0].removed)
+
+        runner.pool._idle['python'][0].last_used = time.time() - 120
+        self.assertEqual(runner.pool.reap_idle(), 1)
+        self.assertEqual(runner.pool.idle_count(), 0)
+
+    def test_cleanup_only_prunes_managed_containers(self):
+        """Test that cleanup tears down the pool and filters by label"""
+        client = FakeDockerClient()
+        runner = self.make_runner(client)
+        runner.prewarm_pool(['python'])
+
+        runner.cleanup_containers()
+
+        self.assertTrue(client.created[0].removed)
+        self.assertEqual(client.containers.prune_calls, [{'label': MANAGED_LABEL}])
+
+def docker_daemon_client():
+    """A client for a reachable daemon that has the polyrun-python image, else None"""
+    if not DOCKER_SDK_AVAILABLE:
+        return None
+    try:
+        import docker
+        client = docker.from_env(timeout=10)
+        client.ping()
+        client.images.get('polyrun-python:latest')
+        return client
+    except Exception:
+        return None
+
+class TestContainerPoolAgainstDocker(unittest.TestCase):
+    """Runs the pool path on a real daemon (read-only rootfs, tmpfs workdir)"""
+
+    def setUp(self):
+        self.client = docker_daemon_client()
+        if self.client is None:
+            self.skipTest("no reachable Docker daemon with polyrun-python:latest (run build_containers.sh)")
+
+    def test_pooled_blocks_round_trip_files(self):
+        """Test that code goes in, exports come out and the container is reused"""
+        config = {'docker_pool': {'enabled': True, 'sizes': {'python': 1}, 'idle_timeout_seconds': 300}}
+        runner = DockerRunner(config, docker_client=self.client)
+        self.addCleanup(runner.pool.shutdown)
+
+        first = runner.run_code('total = sum(numbers)\nprint("sum", total)', 'python', {'timeout_seconds': 30},
+                                {'numbers': [1, 2, 3]}, ['total'])
+        second = runner.run_code('print("again")', 'python', {'timeout_seconds': 30})
+
+        self.assertTrue(first['success'], first['error'])
+        self.assertIn('sum 6', first['output'])
+        self.assertEqual(first['exported_data'], {'total': 6})
+        self.assertTrue(second['success'], second['error'])
+        self.assertIn('again', second['output'])
+        self.assertEqual(runner.pool.idle_count('python'), 1)
+
+if __name__ == '__main__':
+    unittest.main()
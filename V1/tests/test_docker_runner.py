@@ -0,0 +1,248 @@
+import unittest
+import sys
+import os
+import json
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fake_docker import FakeDockerClient
+from runners.container_stats import ContainerStatsSampler
+
+try:
+    from runners.docker_runner import DockerRunner
+    DOCKER_SDK_AVAILABLE = True
+except (ImportError, AttributeError):
+    DOCKER_SDK_AVAILABLE = False
+
+def export_handler(container, cmd, environment):
+    """Pretend to run the block: echo the code and write an export file"""
+    source = container.files[cmd[-1]].decode('utf-8')
+    container.files['/work/__export__.json'] = json.dumps({'total': 6}).encode('utf-8')
+    return 0, source.encode('utf-8'), json.dumps(environment).encode('utf-8')
+
+@unittest.skipUnless(DOCKER_SDK_AVAILABLE, "docker SDK not installed")
+class TestDockerDataPassing(unittest.TestCase):
+    """Tests for #import/#export support in DockerRunner"""
+
+    def make_runner(self, client, pooled=True):
+        config = {'docker_pool': {'enabled': pooled, 'sizes': {'python': 1}}}
+        return DockerRunner(config, docker_client=client)
+
+    def test_pooled_imports_and_exports(self):
+        """Test that pooled runs receive imports and return exports"""
+        client = FakeDockerClient(exec_handler=export_handler)
+        runner = self.make_runner(client)
+
+        result = runner.run_code('total = sum(numbers)', 'python', {'timeout_seconds': 5},
+                                 {'numbers': [1, 2, 3]}, ['total'])
+
+        self.assertTrue(result['success'])
+        self.assertIn('numbers = [1, 2, 3]', result['output'])
+        self.assertIn('__export__.json', result['output'])
+        self.assertEqual(result['exported_data'], {'total': 6})
+
+    def test_one_shot_exports_never_touch_the_host(self):
+        """Test that one-shot containers share no host directory and are removed"""
+        client = FakeDockerClient(exec_handler=export_handler)
+        runner = self.make_runner(client, pooled=False)
+
+        result = runner.run_code('total = sum(numbers)', 'python', {'timeout_seconds': 5},
+                                 {'numbers': [1, 2, 3]}, ['total'])
+
+        self.assertNotIn('volumes', client.run_calls[0])
+        self.assertIn('/work', client.run_calls[0]['tmpfs'])
+        self.assertEqual(result['exported_data'], {'total': 6})
+        self.assertFalse(result['pooled'])
+        self.assertTrue(client.created[0].removed)
+
+    def test_bash_imports_use_environment(self):
+        """Test that bash imports are passed as container environment"""
+        client = FakeDockerClient(exec_handler=export_handler)
+        runner = self.make_runner(client)
+
+        result = runner.run_code('echo "$name"', 'bash', {'timeout_seconds': 5}, {'name': 'poly'}, [])
+
+        self.assertEqual(json.loads(result['error']), {'IMPORT_NAME': 'poly'})
+        self.assertEqual(result['exported_data'], {})
+
+@unittest.skipUnless(DOCKER_SDK_AVAILABLE, "docker SDK not installed")
+class TestDockerSession(unittest.TestCase):
+    """Tests for running all blocks of a mix in one container per language"""
+
+    def test_one_container_per_language(self):
+        """Test that a six-block mix starts only one container per language"""
+        client = FakeDockerClient()
+        runner = DockerRunner({'docker_pool': {'enabled': False}}, docker_client=client)
+
+        runner.start_session()
+        for language in ['python', 'cpp', 'python', 'cpp', 'python', 'cpp']:
+            result = runner.run_code('int x = 1;' if language == 'cpp' else 'x = 1', language,
+                                     {'timeout_seconds': 5})
+            self.assertTrue(result['success'])
+        self.assertEqual(len(client.run_calls), 2)
+
+        python_container = client.created[0]
+        self.assertIn('/work/block_1/code.py', python_container.files)
+        self.assertIn('/work/block_5/code.py', python_container.files)
+        self.assertIn(['python3', '/work/block_3/code.py'], python_container.exec_calls)
+
+        # Without pooling the session containers are removed at the end
+        runner.end_session()
+        self.assertTrue(all(container.removed for container in client.created))
+
+    def test_session_exports_are_per_block(self):
+        """Test that exports are read from each block's own directory"""
+        def handler(container, cmd, environment):
+            block_dir = os.path.dirname(cmd[-1])
+            container.files[f'{block_dir}/__export__.json'] = json.dumps({'dir': block_dir}).encode('utf-8')
+            return 0, b'', b''
+
+        client = FakeDockerClient(exec_handler=handler)
+        runner = DockerRunner({'docker_pool': {'enabled': True}}, docker_client=client)
+
+        runner.start_session()
+        first = runner.run_code('dir = 1', 'python', {'timeout_seconds': 5}, {}, ['dir'])
+        second = runner.run_code('dir = 2', 'python', {'timeout_seconds': 5}, {}, ['dir'])
+        runner.end_session()
+
+        self.assertEqual(first['exported_data'], {'dir': '/work/block_1'})
+        self.assertEqual(second['exported_data'], {'dir': '/work/block_2'})
+        # With pooling the container goes back to the pool with a wiped workspace
+        self.assertEqual(runner.pool.idle_count('python'), 1)
+        self.assertEqual(client.created[0].files, {})
+
+    def test_timed_out_session_container_is_replaced(self):
+        """Test that a killed session container is not reused"""
+        client = FakeDockerClient(exec_delay=0.3)
+        runner = DockerRunner({'docker_pool': {'enabled': False}}, docker_client=client)
+
+        runner.start_session()
+        timed_out = runner.run_code('x = 1', 'python', {'timeout_seconds': 0.05})
+        client.exec_delay = 0
+        result = runner.run_code('x = 2', 'python', {'timeout_seconds': 5})
+        runner.end_session()
+
+        self.assertEqual(timed_out['exit_code'], 124)
+        self.assertTrue(result['success'])
+        self.assertEqual(len(client.run_calls), 2)
+        self.assertTrue(client.created[0].removed)
+
+@unittest.skipUnless(DOCKER_SDK_AVAILABLE, "docker SDK not installed")
+class TestSecurityFastPath(unittest.TestCase):
+    """Tests for routing analyzer-approved blocks to the cheaper path"""
+
+    def make_runner(self, client, mode):
+        config = {'docker_pool': {'enabled': True, 'sizes': {'python': 1}},
+                  'security_fast_path': {'enabled': True, 'mode': mode}}
+        return DockerRunner(config, docker_client=client)
+
+    def test_pool_reserved_for_approved_blocks(self):
+        """Test that only approved blocks reuse warm containers"""
+        client = FakeDockerClient()
+        runner = self.make_runner(client, 'pool')
+
+        approved = runner.run_code('print(1)', 'python', {'timeout_seconds': 5})
+        restricted = runner.run_code('open("out.txt", "w")', 'python', {'timeout_seconds': 5})
+
+        self.assertTrue(approved['fast_path'])
+        self.assertFalse(restricted['fast_path'])
+        self.assertTrue(approved['pooled'])
+        self.assertFalse(restricted['pooled'])
+        # The restricted block got its own container, which is gone
+        self.assertEqual(len(client.run_calls), 2)
+        self.assertTrue(client.created[1].removed)
+        self.assertEqual(runner.pool.idle_count('python'), 1)
+
+    def test_session_keeps_unapproved_blocks_apart(self):
+        """Test that a rejected block in a mix session never touches the session or pool containers"""
+        client = FakeDockerClient()
+        runner = self.make_runner(client, 'pool')
+
+        runner.start_session()
+        approved = runner.run_code('print(1)', 'python', {'timeout_seconds': 5})
+        restricted = runner.run_code('open("out.txt", "w")', 'python', {'timeout_seconds': 5})
+        runner.end_session()
+
+        self.assertTrue(approved['pooled'])
+        self.assertFalse(restricted['pooled'])
+        self.assertTrue(client.created[1].removed)
+        self.assertNotIn(['python3', '/work/code.py'], client.created[0].exec_calls)
+        # Only the session container goes back to the pool
+        self.assertEqual(runner.pool.idle_count('python'), 1)
+        self.assertFalse(client.created[0].removed)
+
+    def test_local_mode_skips_containers(self):
+        """Test that approved blocks run on the host in local mode"""
+        client = FakeDockerClient()
+        runner = self.make_runner(client, 'local')
+
+        result = runner.run_code('print(6 * 7)', 'python', {'timeout_seconds': 5})
+
+        self.assertTrue(result['fast_path'])
+        self.assertFalse(result['container_used'])
+        self.assertEqual(result['output'].strip(), '42')
+        self.assertEqual(client.run_calls, [])
+
+def stats_sample(cpu_ns, usage, cache, throttled, periods, pids, max_usage=0):
+    return {
+        'cpu_stats': {
+            'cpu_usage': {'total_usage': cpu_ns},
+            'throttling_data': {'periods': periods, 'throttled_periods': throttled,
+                                'throttled_time': throttled * 1000000}
+        },
+        'memory_stats': {'usage': usage, 'max_usage': max_usage, 'stats': {'inactive_file': cache}},
+        'pids_stats': {'current': pids}
+    }
+
+class TestContainerStats(unittest.TestCase):
+    """Tests for container resource statistics sampling"""
+
+    def test_sampler_reports_peaks_and_deltas(self):
+        """Test peak memory/pids and CPU/throttling deltas from the baseline"""
+        client = FakeDockerClient()
+        client.stats_samples = [
+            stats_sample(1000000000, 10 * 1024 * 1024, 1024 * 1024, 2, 10, 1),
+            stats_sample(1500000000, 60 * 1024 * 1024, 1024 * 1024, 5, 20, 7),
+            stats_sample(2250000000, 20 * 1024 * 1024, 1024 * 1024, 9, 30, 2),
+        ]
+        container = client.containers.run(command=['sleep', 'infinity'])
+
+        sampler = ContainerStatsSampler(container, interval=0.01).start()
+        while client.stats_samples:
+            time.sleep(0.01)
+        summary = sampler.stop()
+
+        self.assertEqual(summary['peak_memory_bytes'], 59 * 1024 * 1024)
+        self.assertAlmostEqual(summary['cpu_time_seconds'], 1.25)
+        self.assertEqual(summary['cpu_throttled_periods'], 7)
+        self.assertEqual(summary['cpu_periods'], 20)
+        self.assertEqual(summary['peak_pids'], 7)
+
+    def test_lifetime_peak_ignored_for_pooled_containers(self):
+        """Test that cgroup v1 max_usage is only trusted for one-shot containers"""
+        client = FakeDockerClient()
+        client.last_stats = stats_sample(1, 1024, 0, 0, 0, 1, max_usage=4096)
+        container = client.containers.run(command=['sleep', 'infinity'])
+
+        pooled = ContainerStatsSampler(container, interval=10, lifetime_peak=False).start().stop()
+        one_shot = ContainerStatsSampler(container, interval=10).start().stop()
+
+        self.assertEqual(pooled['peak_memory_bytes'], 1024)
+        self.assertEqual(one_shot['peak_memory_bytes'], 4096)
+
+    @unittest.skipUnless(DOCKER_SDK_AVAILABLE, "docker SDK not installed")
+    def test_results_include_resource_stats(self):
+        """Test that Docker results carry stats and real memory usage"""
+        client = FakeDockerClient()
+        client.last_stats = stats_sample(5000000, 2048, 0, 0, 0, 1)
+        runner = DockerRunner({'docker_pool': {'enabled': True}}, docker_client=client)
+
+        result = runner.run_code('print(1)', 'python', {'timeout_seconds': 5})
+
+        self.assertEqual(result['memory_used'], 2048)
+        self.assertEqual(result['resource_stats']['peak_pids'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import unittest
+from unittest import mock
+import threading
+import asyncio
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web', 'backend'))
+
+from runners.job_queue import JobQueue, JobQueueFull, run_mix, COMPLETED, FAILED
+
+def echo_executor(code, config, consolidate, log):
+    """Logs each line of code after a short pause, like a slow block"""
+    for line in code.splitlines():
+        time.sleep(0.01)
+        log(line)
+    return {'blocks': 1}
+
+class TestJobQueue(unittest.TestCase):
+    """Tests for the bounded job queue and worker pool"""
+
+    def test_concurrent_jobs_keep_separate_output(self):
+        """Test that jobs running at once never see each other's output"""
+        job_queue = JobQueue({'job_queue': {'workers': 4}}, executor=echo_executor)
+        self.addCleanup(job_queue.shutdown)
+        jobs = [job_queue.submit('\n'.join(f"job{n}-line{i}" for i in range(5))) for n in range(8)]
+
+        for n, job in enumerate(jobs):
+            self.assertTrue(job.wait(10))
+            self.assertEqual(job.status, COMPLETED)
+            self.assertEqual(job.output.splitlines(), [f"job{n}-line{i}" for i in range(5)])
+
+    def test_worker_count_bounds_concurrency(self):
+        """Test that no more than `workers` jobs run at the same time"""
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def executor(code, config, consolidate, log):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        job_queue = JobQueue({'job_queue': {'workers': 2}}, executor=executor)
+        self.addCleanup(job_queue.shutdown)
+        jobs = [job_queue.submit('') for _ in range(6)]
+        for job in jobs:
+            self.assertTrue(job.wait(10))
+        self.assertEqual(peak[0], 2)
+
+    def test_full_queue_rejects_jobs(self):
+        """Test that submit raises once max_queued jobs are waiting"""
+        release = threading.Event()
+        job_queue = JobQueue({'job_queue': {'workers': 1, 'max_queued': 2}},
+                             executor=lambda code, config, consolidate, log: release.wait(10))
+        self.addCleanup(job_queue.shutdown)
+        self.addCleanup(release.set)
+
+        running = job_queue.submit('')
+        while job_queue.stats()['running'] == 0:
+            time.sleep(0.005)
+        job_queue.submit('')
+        job_queue.submit('')
+        with self.assertRaises(JobQueueFull):
+            job_queue.submit('')
+
+        release.set()
+        self.assertTrue(running.wait(10))
+
+    def test_executor_error_fails_job(self):
+        """Test that an exception marks the job failed with the message"""
+        def executor(code, config, consolidate, log):
+            log("before")
+            raise RuntimeError("boom")
+
+        job_queue = JobQueue({'job_queue': {'workers': 1}}, executor=executor)
+        self.addCleanup(job_queue.shutdown)
+        job = job_queue.submit('')
+
+        self.assertTrue(job.wait(10))
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, 'boom')
+        self.assertEqual(job.output, 'before')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_done_callbacks(self):
+        """Test that on_done callbacks run once the job finishes, or at once after"""
+        release = threading.Event()
+        job_queue = JobQueue({'job_queue': {'workers': 1}},
+                             executor=lambda code, config, consolidate, log: release.wait(10))
+        self.addCleanup(job_queue.shutdown)
+        job = job_queue.submit('')
+        calls = []
+        job.on_done(lambda: calls.append(('early', job.status)))
+        self.assertEqual(calls, [])
+
+        release.set()
+        self.assertTrue(job.wait(10))
+        self.assertEqual(calls, [('early', COMPLETED)])
+        job.on_done(lambda: calls.append(('late', job.status)))
+        self.assertEqual(calls[-1], ('late', COMPLETED))
+
+    def test_environment_overrides_worker_count(self):
+        """Test that POLYRUN_JOB_WORKERS sizes the pool per host"""
+        os.environ['POLYRUN_JOB_WORKERS'] = '3'
+        self.addCleanup(os.environ.pop, 'POLYRUN_JOB_WORKERS')
+        self.assertEqual(JobQueue({'job_queue': {'workers': 8}}).workers, 3)
+
+    def test_run_mix_logs_blocks(self):
+        """Test that run_mix passes exports between blocks and logs output"""
+        lines = []
+        result = run_mix('#lang: bash\n#export: greeting\ngreeting="hi"\necho one\n\n'
+                         '#lang: bash\n#import: greeting\necho "$greeting two"\n',
+                         {'execution_modes': {}}, consolidate=False, log=lines.append)
+
+        self.assertEqual(result['blocks'], 2)
+        self.assertEqual(result['failed_blocks'], 0)
+        self.assertIn('one', lines)
+        self.assertIn('hi two', lines)
+
+class TestJobEndpoints(unittest.TestCase):
+    """Tests for POST /jobs and GET /jobs/{id}"""
+
+    def setUp(self):
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            self.skipTest("fastapi test client not installed")
+        import modern_server
+        self.job_queue = JobQueue({'job_queue': {'workers': 2}}, executor=echo_executor)
+        self.addCleanup(self.job_queue.shutdown)
+        modern_server._job_queue = self.job_queue
+        self.addCleanup(setattr, modern_server, '_job_queue', None)
+        self.client = TestClient(modern_server.app)
+
+    def test_submit_and_poll(self):
+        """Test that a submitted job can be polled until it completes"""
+        response = self.client.post('/jobs', json={'code': 'hello\nworld'})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['id']
+
+        self.assertTrue(self.job_queue.get(job_id).wait(10))
+        job = self.client.get(f'/jobs/{job_id}').json()
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['output'], 'hello\nworld')
+
+    def test_unknown_job(self):
+        """Test that an unknown id returns 404"""
+        self.assertEqual(self.client.get('/jobs/missing').status_code, 404)
+
+    def test_execute_waits_for_job(self):
+        """Test that /execute returns the job's isolated output"""
+        response = self.client.post('/execute', json={'code': 'only this'})
+        body = response.json()
+        self.assertEqual((body['success'], body['output'], body['full_log']), (True, 'only this', 'only this'))
+
+    def test_execute_holds_no_executor_thread(self):
+        """Test that a waiting /execute is woken by the job, not a blocked thread"""
+        with mock.patch.object(asyncio.BaseEventLoop, 'run_in_executor', side_effect=AssertionError):
+            response = self.client.post('/execute', json={'code': 'no thread'})
+        self.assertEqual(response.json()['output'], 'no thread')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import importlib.util
+import tempfile
+import time
+import sys
+import os
+
+# Add project root and web backend to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(PROJECT_ROOT, 'web', 'backend')
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, BACKEND_DIR)
+
+from parser import parse_mix_file
+from runners import metrics
+from runners.metrics import MetricsRegistry
+from runners.bash_runner import BashRunner
+from security.manager import SecurityManager
+
+class TestRegistry(unittest.TestCase):
+    """Tests for the Prometheus text rendering"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket, sum and count lines of a labelled histogram"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('demo_seconds', 'Demo', ('language',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, 'py"thon')
+
+        lines = registry.render().splitlines()
+        self.assertEqual(lines[:2], ['# HELP demo_seconds Demo', '# TYPE demo_seconds histogram'])
+        self.assertEqual(lines[2:], [
+            'demo_seconds_bucket{language="py\\"thon",le="0.1"} 1',
+            'demo_seconds_bucket{language="py\\"thon",le="1.0"} 3',
+            'demo_seconds_bucket{language="py\\"thon",le="+Inf"} 4',
+            'demo_seconds_sum{language="py\\"thon"} 6.05',
+            'demo_seconds_count{language="py\\"thon"} 4',
+        ])
+
+    def test_recording_is_cheap(self):
+        """Test that hot-path recording stays in the microsecond range"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('hot_seconds', 'Hot path', ('language', 'stage'))
+        counter = registry.counter('hot_total', 'Hot path', ('language',))
+        start = time.perf_counter()
+        for _ in range(20000):
+            with histogram.time('python', 'run'):
+                counter.inc('python')
+        self.assertLess((time.perf_counter() - start) / 20000, 50e-6)
+
+class TestInstrumentation(unittest.TestCase):
+    """Tests that parsing, runners and security checks record metrics"""
+
+    def test_block_records_stages_and_processes(self):
+        """Test that a bash block records parse, run and export stages"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.mix', delete=False) as f:
+            f.write('#lang: bash\n#export: answer\nanswer=42\n')
+            mix_file = f.name
+        self.addCleanup(os.unlink, mix_file)
+
+        parses = metrics.STAGE_SECONDS.count('mix', 'parse')
+        runs = metrics.STAGE_SECONDS.count('bash', 'run')
+        exports = metrics.STAGE_SECONDS.count('bash', 'export')
+        started = metrics.PROCESSES_STARTED.value('bash', 'local')
+
+        block = parse_mix_file(mix_file)[0]
+        result = BashRunner({'timeout': 10}).run(block['code'], export_vars=block['exports'])
+
+        self.assertEqual(result['exported_data'], {'answer': '42'})
+        self.assertEqual(metrics.STAGE_SECONDS.count('mix', 'parse'), parses + 1)
+        self.assertEqual(metrics.STAGE_SECONDS.count('bash', 'run'), runs + 1)
+        self.assertEqual(metrics.STAGE_SECONDS.count('bash', 'export'), exports + 1)
+        self.assertEqual(metrics.PROCESSES_STARTED.value('bash', 'local'), started + 1)
+        self.assertEqual(metrics.PROCESSES_RUNNING.value('bash'), 0)
+
+    def test_timeouts_and_security_blocks_are_counted(self):
+        """Test the timeout and security event counters"""
+        timeouts = metrics.TIMEOUTS.value('bash')
+        BashRunner({'timeout': 0.2}).run('sleep 5')
+        self.assertEqual(metrics.TIMEOUTS.value('bash'), timeouts + 1)
+
+        blocked = metrics.SECURITY_EVENTS.value('UNSAFE_CODE_BLOCKED', 'python')
+        SecurityManager({}).log_security_event('UNSAFE_CODE_BLOCKED', 'python', 'os.system')
+        self.assertEqual(metrics.SECURITY_EVENTS.value('UNSAFE_CODE_BLOCKED', 'python'), blocked + 1)
+
+class TestMetricsEndpoints(unittest.TestCase):
+    """Tests for GET /metrics on both backends"""
+
+    def setUp(self):
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            self.skipTest("fastapi test client not installed")
+        self.TestClient = TestClient
+
+    def test_web_backend_metrics(self):
+        """Test that /metrics exposes stage histograms and admission gauges"""
+        spec = importlib.util.spec_from_file_location('web_backend_main', os.path.join(BACKEND_DIR, 'main.py'))
+        web_main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(web_main)
+
+        with self.TestClient(web_main.app) as client:
+            web_main.config['execution_modes'] = {}
+            client.post('/api/execute', json={'code': '#lang: bash\necho hi\n'})
+            response = client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['content-type'].startswith('text/plain; version=0.0.4'))
+        body = response.text
+        self.assertIn('polyrun_stage_duration_seconds_count{language="bash",stage="run"}', body)
+        self.assertIn('polyrun_executions_in_flight 0', body)
+        self.assertIn('polyrun_admission_decisions_total{outcome="admitted"}', body)
+        self.assertIn('polyrun_child_cpu_seconds_total{mode="user"}', body)
+
+    def test_modern_server_metrics(self):
+        """Test that /metrics includes the job queue depth"""
+        import modern_server
+        response = self.TestClient(modern_server.app).get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('polyrun_jobs_queued 0', response.text)
+        self.assertIn('# TYPE polyrun_runner_processes_running gauge', response.text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import subprocess
+import threading
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runners.plugin_manager import PluginManager, get_plugin_manager
+from runners.base_runner import BaseRunner
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class EchoRunner(BaseRunner):
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.language = 'echo'
+
+    def run(self, code, import_data=None, export_vars=None):
+        return {'output': code, 'error': '', 'return_code': 0, 'exported_data': {}}
+
+class TestPluginManager(unittest.TestCase):
+    """Tests for the lazily loading, shared PluginManager"""
+
+    def test_construction_imports_no_runners(self):
+        """Test that runner modules are only imported on first use"""
+        script = ("import sys; from runners.plugin_manager import PluginManager; "
+                  "manager = PluginManager({}); assert manager.is_language_supported('js'); "
+                  "print(sorted(m for m in sys.modules if m.startswith('runners.') and m.endswith('_runner') "
+                  "and m != 'runners.base_runner')); manager.get_runner('sh'); "
+                  "print(sorted(m for m in sys.modules if m.endswith('_runner') and m != 'runners.base_runner'))")
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, cwd=PROJECT_ROOT)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.splitlines(), ['[]', "['runners.bash_runner']"])
+
+    def test_aliases_share_one_instance(self):
+        """Test that language aliases reuse the same runner"""
+        manager = PluginManager({})
+        self.assertIs(manager.get_runner('bash'), manager.get_runner('sh'))
+        self.assertIs(manager.get_runner('SHELL'), manager.get_runner('bash'))
+        self.assertIsNone(manager.get_runner('cobol'))
+        self.assertFalse(manager.is_language_supported('cobol'))
+
+    def test_concurrent_first_use_creates_one_runner(self):
+        """Test that racing threads get the same runner instance"""
+        manager = PluginManager({})
+        runners = []
+        threads = [threading.Thread(target=lambda: runners.append(manager.get_runner('python')))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(runners), 8)
+        self.assertEqual(len({id(runner) for runner in runners}), 1)
+
+    def test_shared_manager_per_config(self):
+        """Test that get_plugin_manager reuses one manager per configuration"""
+        first = get_plugin_manager({'timeout': 5, 'log_level': 'INFO'})
+        self.assertIs(get_plugin_manager({'log_level': 'INFO', 'timeout': 5}), first)
+        self.assertIsNot(get_plugin_manager({'timeout': 6}), first)
+
+    def test_custom_runner(self):
+        """Test registering a runner class programmatically"""
+        manager = PluginManager({})
+        manager.add_custom_runner('echo', EchoRunner)
+        self.assertEqual(manager.run_code('echo', 'hi')['output'], 'hi')
+        with self.assertRaises(ValueError):
+            manager.add_custom_runner('bad', object)
+
+if __name__ == '__main__':
+    unittest.main()
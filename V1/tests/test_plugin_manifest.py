@@ -0,0 +1,120 @@
+import unittest
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runners.plugin_manifest import PluginManifest
+from runners.plugin_manager import PluginManager
+
+PLUGIN_SOURCE = '''
+from runners.base_runner import BaseRunner
+
+class {cls}(BaseRunner):
+    aliases = ('{alias}',)
+    capabilities = ('imports', 'exports')
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.language = '{language}'
+
+    def run(self, code, import_data=None, export_vars=None):
+        return {{'output': '{language}:' + code, 'error': '', 'return_code': 0, 'exported_data': {{}}}}
+'''
+
+ENTRY_POINTS = '''[polyrun.runners]
+{language} = {module}:{cls}
+'''
+
+class TestPluginManifest(unittest.TestCase):
+    """Tests for the cached plugin index and entry point discovery"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.plugins_dir = os.path.join(self.temp_dir, 'plugins')
+        os.makedirs(self.plugins_dir)
+        self.config = {'plugins': {
+            'directory': self.plugins_dir,
+            'manifest': os.path.join(self.temp_dir, 'cache', 'plugin_manifest.json'),
+        }}
+
+    def write_plugin(self, language, alias):
+        path = os.path.join(self.plugins_dir, f'{language}_runner.py')
+        with open(path, 'w') as f:
+            f.write(PLUGIN_SOURCE.format(cls=f'{language.title()}Runner', alias=alias, language=language))
+        return path
+
+    def test_manifest_is_cached_until_plugins_change(self):
+        """Test that the index is reused, and rebuilt when a plugin file changes"""
+        path = self.write_plugin('lua', 'luajit')
+        manifest = PluginManifest(self.config)
+
+        entries = manifest.load()
+        self.assertTrue(manifest.rebuilt)
+        self.assertEqual(entries[0]['language'], 'lua')
+        self.assertEqual(entries[0]['aliases'], ['luajit'])
+        self.assertEqual(entries[0]['capabilities'], ['imports', 'exports'])
+
+        self.assertEqual(manifest.load(), entries)
+        self.assertFalse(manifest.rebuilt)
+
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        manifest.load()
+        self.assertTrue(manifest.rebuilt)
+
+    def test_stale_manifest_version_is_rebuilt(self):
+        """Test that an index written by another manifest version is ignored"""
+        manifest = PluginManifest(self.config)
+        manifest.load()
+        with open(manifest.path) as f:
+            data = json.load(f)
+        data['version'] = -1
+        with open(manifest.path, 'w') as f:
+            json.dump(data, f)
+
+        manifest.load()
+        self.assertTrue(manifest.rebuilt)
+
+    def test_plugins_are_not_imported_from_cached_manifest(self):
+        """Test that a cached index registers plugins without importing them"""
+        self.write_plugin('forth', 'fs')
+        PluginManifest(self.config).load()
+        sys.modules.pop('plugins.forth_runner', None)
+
+        manager = PluginManager(self.config)
+        self.assertFalse(manager.manifest.rebuilt)
+        self.assertTrue(manager.is_language_supported('fs'))
+        self.assertNotIn('plugins.forth_runner', sys.modules)
+
+        self.assertIs(manager.get_runner('fs'), manager.get_runner('forth'))
+        self.assertEqual(manager.run_code('fs', '1 2 +')['output'], 'forth:1 2 +')
+
+    def test_entry_point_runners(self):
+        """Test that runners registered as package entry points are discovered"""
+        site_dir = os.path.join(self.temp_dir, 'site')
+        dist_info = os.path.join(site_dir, 'polyrun_tcl-1.0.dist-info')
+        os.makedirs(dist_info)
+        with open(os.path.join(site_dir, 'polyrun_tcl_plugin.py'), 'w') as f:
+            f.write(PLUGIN_SOURCE.format(cls='TclRunner', alias='tclsh', language='tcl'))
+        with open(os.path.join(dist_info, 'METADATA'), 'w') as f:
+            f.write('Metadata-Version: 2.1\nName: polyrun-tcl\nVersion: 1.0\n')
+        with open(os.path.join(dist_info, 'entry_points.txt'), 'w') as f:
+            f.write(ENTRY_POINTS.format(language='tcl', module='polyrun_tcl_plugin', cls='TclRunner'))
+
+        sys.path.insert(0, site_dir)
+        self.addCleanup(sys.path.remove, site_dir)
+        self.addCleanup(sys.modules.pop, 'polyrun_tcl_plugin', None)
+
+        manager = PluginManager(self.config)
+        entry = next(item for item in manager.plugins if item['language'] == 'tcl')
+        self.assertEqual(entry['source'], 'entry_point:polyrun-tcl==1.0')
+        self.assertEqual(manager.run_code('tclsh', 'puts hi')['output'], 'tcl:puts hi')
+
+if __name__ == '__main__':
+    unittest.main()
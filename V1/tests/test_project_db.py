@@ -0,0 +1,489 @@
+import unittest
+import threading
+import tempfile
+import shutil
+import sqlite3
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.project_db import ProjectDatabase
+from database.connection_pool import ConnectionPool
+from database.pagination import CursorError
+from database.share_cache import ShareLinkCache
+
+SAMPLE_MIX = '#lang: python\nprint("hi")\n\n#lang: bash\necho hi\n'
+
+class DatabaseTestCase(unittest.TestCase):
+    """Runs each test in a scratch directory (projects/ is relative to the cwd)"""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, True)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.workdir)
+
+    def make_db(self, **kwargs):
+        db = ProjectDatabase(os.path.join(self.workdir, 'db', 'polyrun.db'), **kwargs)
+        self.addCleanup(db.close)
+        return db
+
+class TestConnectionPool(DatabaseTestCase):
+    """Tests for the pooled SQLite connections"""
+
+    def test_connections_use_wal_and_pragmas(self):
+        """Test that pooled connections are tuned when opened"""
+        pool = ConnectionPool(os.path.join(self.workdir, 'pool.db'))
+        self.addCleanup(pool.close)
+        with pool.connection() as conn:
+            self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], 1)
+            self.assertEqual(conn.execute('PRAGMA cache_size').fetchone()[0], -16000)
+
+    def test_connections_are_reused_and_bounded(self):
+        """Test that sequential calls share one connection and threads at most size"""
+        pool = ConnectionPool(os.path.join(self.workdir, 'pool.db'), size=2)
+        self.addCleanup(pool.close)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            self.assertIs(first, second)
+
+        def borrow():
+            for _ in range(50):
+                with pool.connection() as conn:
+                    conn.execute('SELECT 1')
+
+        threads = [threading.Thread(target=borrow) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(pool._created, 2)
+
+    def test_transaction_rolls_back_on_error(self):
+        """Test that a failing transaction leaves no rows and frees its connection"""
+        pool = ConnectionPool(os.path.join(self.workdir, 'pool.db'), size=1)
+        self.addCleanup(pool.close)
+        with pool.transaction() as conn:
+            conn.execute('CREATE TABLE items (name TEXT)')
+        with self.assertRaises(RuntimeError):
+            with pool.transaction() as conn:
+                conn.execute("INSERT INTO items VALUES ('lost')")
+                raise RuntimeError("boom")
+        with pool.connection() as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM items').fetchone()[0], 0)
+
+def blob_counts(db):
+    with db.pool.connection() as conn:
+        return dict(conn.execute('SELECT hash, ref_count FROM blobs').fetchall())
+
+class TestProjectDatabase(DatabaseTestCase):
+    """Tests for ProjectDatabase on the pool"""
+
+    def test_update_and_delete_use_one_connection(self):
+        """Test that content updates and deletes work with a single pooled connection"""
+        db = self.make_db(pool_size=1)
+        project_id = db.save_project("demo", "desc", "alice", SAMPLE_MIX, tags=["python"], is_public=True)
+
+        self.assertTrue(db.update_project(project_id, content='#lang: bash\necho only\n', name="renamed"))
+        project = db.get_project(project_id)
+        self.assertEqual((project['name'], project['language_count']), ("renamed", 1))
+        self.assertEqual(project['content'], '#lang: bash\necho only\n')
+
+        self.assertTrue(db.delete_project(project_id))
+        self.assertIsNone(db.get_project(project_id))
+        self.assertFalse(os.path.exists(project['file_path']))
+        self.assertFalse(db.delete_project(project_id))
+
+    def test_share_links_and_tags(self):
+        """Test share token access counting and popular tags"""
+        db = self.make_db()
+        project_id = db.save_project("demo", "desc", "alice", SAMPLE_MIX, tags=["python", "bash"])
+        db.save_project("other", "desc", "bob", SAMPLE_MIX, tags=["python"])
+
+        token = db.create_share_link(project_id)
+        self.assertEqual(db.get_project_by_share_token(token)['name'], "demo")
+        self.assertEqual(db.get_popular_tags(1), [("python", 2)])
+        self.assertEqual(db.get_stats()['total_projects'], 2)
+
+    def test_concurrent_saves_and_reads(self):
+        """Test that threads saving and reading at once all succeed"""
+        db = self.make_db()
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(10):
+                    project_id = db.save_project(f"p{n}-{i}", "", f"author{n}", SAMPLE_MIX, is_public=True)
+                    self.assertEqual(db.get_project(project_id)['name'], f"p{n}-{i}")
+                    db.list_projects(author=f"author{n}")
+            except (AssertionError, sqlite3.Error) as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(db.get_stats()['total_projects'], 80)
+        self.assertEqual(len(db.list_projects(author="author3")), 10)
+
+class TestBlobStorage(DatabaseTestCase):
+    """Tests for content-addressed project content"""
+
+    def test_identical_content_is_stored_once(self):
+        """Test reference counting across saves, updates and deletes"""
+        db = self.make_db()
+        first = db.save_project("a", "", "alice", SAMPLE_MIX)
+        second = db.save_project("b", "", "bob", SAMPLE_MIX)
+        self.assertEqual(list(blob_counts(db).values()), [2])
+        self.assertFalse(os.path.exists('projects'))
+
+        db.update_project(second, content='#lang: bash\necho changed\n')
+        self.assertEqual(sorted(blob_counts(db).values()), [1, 1])
+        self.assertEqual(db.get_project(first)['content'], SAMPLE_MIX)
+        self.assertEqual(db.get_project(second)['content'], '#lang: bash\necho changed\n')
+
+        db.delete_project(first)
+        db.delete_project(second)
+        self.assertEqual(blob_counts(db), {})
+
+    def test_large_content_is_compressed(self):
+        """Test that repetitive sources are stored zlib-compressed"""
+        db = self.make_db()
+        content = SAMPLE_MIX * 200
+        project_id = db.save_project("big", "", "alice", content)
+
+        stats = db.get_stats()
+        self.assertEqual(stats['content_bytes'], len(content))
+        self.assertLess(stats['stored_bytes'], len(content) / 10)
+        token = db.create_share_link(project_id)
+        self.assertEqual(db.get_project_by_share_token(token)['content'], content)
+
+    def test_migrates_legacy_files(self):
+        """Test that a pre-blob database keeps working and migrates its files"""
+        db_path = os.path.join(self.workdir, 'legacy.db')
+        os.makedirs('projects')
+        with open('projects/old.mix', 'w') as f:
+            f.write(SAMPLE_MIX)
+        conn = sqlite3.connect(db_path)
+        conn.execute('''CREATE TABLE projects (id TEXT PRIMARY KEY, name TEXT NOT NULL, description TEXT,
+                        author TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, is_public BOOLEAN DEFAULT FALSE,
+                        file_path TEXT NOT NULL, language_count INTEGER DEFAULT 0, tags TEXT, metadata TEXT)''')
+        conn.execute("INSERT INTO projects (id, name, file_path) VALUES ('old', 'Old', 'projects/old.mix')")
+        conn.execute("INSERT INTO projects (id, name, file_path) VALUES ('gone', 'Gone', 'projects/gone.mix')")
+        conn.commit()
+        conn.close()
+
+        db = ProjectDatabase(db_path)
+        self.addCleanup(db.close)
+        self.assertEqual(db.get_project('old')['content'], SAMPLE_MIX)
+
+        self.assertEqual(db.migrate_files_to_blobs(delete_files=True), {'migrated': 1, 'missing': 1})
+        self.assertFalse(os.path.exists('projects/old.mix'))
+        self.assertEqual(db.get_project('old')['content'], SAMPLE_MIX)
+        self.assertEqual(db.migrate_files_to_blobs(), {'migrated': 0, 'missing': 1})
+        # Rows from before the search index were indexed on open
+        self.assertEqual([project['id'] for project in db.search_projects('old', is_public=None)], ['old'])
+
+class TestSearch(DatabaseTestCase):
+    """Tests for FTS5 project search"""
+
+    def names(self, projects):
+        return [project['name'] for project in projects]
+
+    def test_ranked_prefix_search(self):
+        """Test that name matches rank first and words match as prefixes"""
+        db = self.make_db()
+        db.save_project("Matrix helpers", "numpy utilities", "a", SAMPLE_MIX, tags=["python"], is_public=True)
+        db.save_project("Plotting", "uses a matrix of points", "a", SAMPLE_MIX, tags=["python"], is_public=True)
+        db.save_project("Matrix secret", "private", "a", SAMPLE_MIX, is_public=False)
+        db.save_project("Shell tricks", "bash", "a", SAMPLE_MIX, tags=["bash"], is_public=True)
+
+        self.assertEqual(self.names(db.search_projects("matrix")), ["Matrix helpers", "Plotting"])
+        self.assertEqual(self.names(db.search_projects("num")), ["Matrix helpers"])
+        self.assertEqual(db.search_projects("num", prefix=False), [])
+        self.assertEqual(self.names(db.search_projects("python matrix")), ["Matrix helpers", "Plotting"])
+        self.assertEqual(self.names(db.search_projects("matrix", is_public=False)), ["Matrix secret"])
+        self.assertEqual(db.search_projects('c++ "AND" OR *'), [])
+        self.assertEqual(db.search_projects('  '), [])
+
+    def test_pagination(self):
+        """Test limit and offset over ranked results"""
+        db = self.make_db()
+        for n in range(5):
+            db.save_project(f"demo {n}", "", "a", SAMPLE_MIX, is_public=True)
+
+        pages = [self.names(db.search_projects("demo", limit=2, offset=offset)) for offset in (0, 2, 4)]
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sorted(sum(pages, [])), [f"demo {n}" for n in range(5)])
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test that triggers keep the index in sync"""
+        db = self.make_db()
+        project_id = db.save_project("alpha", "", "a", SAMPLE_MIX, is_public=True)
+        db.update_project(project_id, name="beta", tags=["gamma"])
+
+        self.assertEqual(db.search_projects("alpha"), [])
+        self.assertEqual(self.names(db.search_projects("gamma")), ["beta"])
+        db.delete_project(project_id)
+        self.assertEqual(db.search_projects("beta"), [])
+
+    def test_content_search_is_optional(self):
+        """Test that sources are only searchable with search_content"""
+        plain = self.make_db()
+        plain.save_project("demo", "", "a", '#lang: python\nimport pandas\n', is_public=True)
+        self.assertEqual(plain.search_projects("pandas"), [])
+
+        db = ProjectDatabase(os.path.join(self.workdir, 'content.db'), search_content=True)
+        self.addCleanup(db.close)
+        project_id = db.save_project("demo", "", "a", '#lang: python\nimport pandas\n', is_public=True)
+        self.assertEqual(self.names(db.search_projects("pandas")), ["demo"])
+        db.update_project(project_id, content='#lang: python\nimport polars\n', name="renamed")
+        self.assertEqual(db.search_projects("pandas"), [])
+        self.assertEqual(self.names(db.search_projects("polars")), ["renamed"])
+
+class TestProjectTags(DatabaseTestCase):
+    """Tests for the project_tags relation and tag filters"""
+
+    def counts(self, db):
+        return dict(db.get_popular_tags(100))
+
+    def test_usage_counts_follow_saves_updates_and_deletes(self):
+        """Test that retagging and deleting decrement usage counts"""
+        db = self.make_db()
+        first = db.save_project("one", "", "a", SAMPLE_MIX, tags=["python", "bash", "python"])
+        second = db.save_project("two", "", "a", SAMPLE_MIX, tags=["python"])
+        self.assertEqual(db.get_project(first)['tags'], ["python", "bash"])
+        self.assertEqual(self.counts(db), {"python": 2, "bash": 1})
+
+        self.assertTrue(db.update_project(first, tags=["cpp", "python"]))
+        self.assertEqual(self.counts(db), {"python": 2, "cpp": 1})
+        self.assertFalse(db.update_project("missing", tags=["ghost"]))
+        self.assertNotIn("ghost", self.counts(db))
+
+        db.delete_project(second)
+        db.update_project(first, name="renamed")
+        self.assertEqual(self.counts(db), {"python": 1, "cpp": 1})
+        db.delete_project(first)
+        self.assertEqual(self.counts(db), {})
+
+    def test_tag_filters(self):
+        """Test tag-filtered listing, paging and search"""
+        db = self.make_db()
+        db.save_project("alpha demo", "", "a", SAMPLE_MIX, tags=["python"], is_public=True)
+        db.save_project("beta demo", "", "b", SAMPLE_MIX, tags=["bash", "python-extra"], is_public=True)
+        db.save_project("gamma demo", "", "a", SAMPLE_MIX, tags=["python", "bash"], is_public=False)
+
+        names = lambda projects: [project['name'] for project in projects]
+        self.assertEqual(names(db.list_projects(tag="python")), ["gamma demo", "alpha demo"])
+        self.assertEqual(names(db.list_projects(tag="bash", is_public=True)), ["beta demo"])
+        self.assertEqual(names(db.list_projects_page(tag="python", limit=1)['projects']), ["gamma demo"])
+        self.assertEqual(names(db.search_projects("demo", tag="python")), ["alpha demo"])
+        self.assertEqual(sorted(names(db.search_projects("demo", tag="bash", is_public=None))),
+                         ["beta demo", "gamma demo"])
+        self.assertEqual(db.list_projects(tag="pyth"), [])
+
+    def test_existing_databases_are_backfilled(self):
+        """Test that opening a database without project_tags relinks and recounts tags"""
+        path = os.path.join(self.workdir, 'old.db')
+        db = ProjectDatabase(path)
+        project_id = db.save_project("one", "", "a", SAMPLE_MIX, tags=["python", "bash"])
+        db.save_project("two", "", "a", SAMPLE_MIX, tags=["python"])
+        with db.pool.transaction() as conn:
+            conn.execute('DROP TABLE project_tags')
+            # Stale counts left by deletes before the relation existed
+            conn.execute("UPDATE tags SET usage_count = 9")
+            conn.execute("INSERT INTO tags (name, usage_count) VALUES ('orphan', 3)")
+        db.close()
+
+        db = ProjectDatabase(path)
+        self.addCleanup(db.close)
+        self.assertEqual(dict(db.get_popular_tags()), {"python": 2, "bash": 1})
+        self.assertEqual([project['id'] for project in db.list_projects(tag="bash")], [project_id])
+
+class TestStats(DatabaseTestCase):
+    """Tests for the trigger-maintained statistics"""
+
+    def scanned(self, db):
+        """The statistics get_stats used to compute with full scans"""
+        with db.pool.connection() as conn:
+            scalar = lambda sql: conn.execute(sql).fetchone()[0]
+            return {
+                'total_projects': scalar('SELECT COUNT(*) FROM projects'),
+                'public_projects': scalar('SELECT COUNT(*) FROM projects WHERE is_public = TRUE'),
+                'active_shares': scalar('SELECT COUNT(*) FROM shared_links WHERE is_active = TRUE'),
+                'language_distribution': dict(conn.execute(
+                    'SELECT language_count, COUNT(*) FROM projects GROUP BY language_count').fetchall()),
+                'content_blobs': scalar('SELECT COUNT(*) FROM blobs'),
+                'content_bytes': scalar('SELECT COALESCE(SUM(size), 0) FROM blobs'),
+                'stored_bytes': scalar('SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs'),
+            }
+
+    def assert_consistent(self, db):
+        stats = db.get_stats()
+        languages = stats.pop('languages')
+        self.assertEqual(stats, self.scanned(db))
+        return languages
+
+    def test_counters_follow_every_change(self):
+        """Test that counters match full scans after inserts, updates and deletes"""
+        db = self.make_db()
+        self.assertEqual(self.assert_consistent(db), {})
+        first = db.save_project("one", "", "a", SAMPLE_MIX, is_public=True)
+        second = db.save_project("two", "", "a", '#lang: Python\nx = 1\n#lang: cpp\nint x;\n' + 'y' * 500)
+        db.save_project("three", "", "a", '#lang: javascript\nconsole.log(1)\n', is_public=True)
+        db.create_share_link(first)
+        db.create_share_link(second)
+        self.assertEqual(self.assert_consistent(db), {'python': 2, 'bash': 1, 'cpp': 1, 'javascript': 1})
+
+        db.update_project(second, is_public=True, content='#lang: bash\necho 1\n')
+        db.update_project(first, is_public=False)
+        with db.pool.transaction() as conn:
+            conn.execute('UPDATE shared_links SET is_active = FALSE WHERE project_id = ?', (first,))
+        self.assertEqual(self.assert_consistent(db), {'bash': 2, 'python': 1, 'javascript': 1})
+
+        db.delete_project(first)
+        db.delete_project(second)
+        self.assertEqual(self.assert_consistent(db), {'javascript': 1})
+        self.assertEqual(db.get_stats()['total_projects'], 1)
+
+    def test_existing_databases_are_recounted(self):
+        """Test that opening a database without the stats tables fills them"""
+        path = os.path.join(self.workdir, 'old.db')
+        db = ProjectDatabase(path)
+        db.save_project("one", "", "a", SAMPLE_MIX, is_public=True)
+        db.save_project("two", "", "a", '#lang: cpp\nint main() {}\n')
+        with db.pool.transaction() as conn:
+            triggers = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name NOT LIKE 'projects_fts%'")]
+            for trigger in triggers:
+                conn.execute(f'DROP TRIGGER {trigger}')
+            for table in ('project_stats', 'language_count_stats', 'project_languages', 'language_stats'):
+                conn.execute(f'DROP TABLE {table}')
+        db.close()
+
+        db = ProjectDatabase(path)
+        self.addCleanup(db.close)
+        self.assertEqual(self.assert_consistent(db), {'python': 1, 'bash': 1, 'cpp': 1})
+        db.save_project("three", "", "a", SAMPLE_MIX)
+        self.assertEqual(self.assert_consistent(db), {'python': 2, 'bash': 2, 'cpp': 1})
+
+class TestShareLinkCache(DatabaseTestCase):
+    """Tests for cached share links and write-behind access counts"""
+
+    def access_count(self, db, token):
+        with db.pool.connection() as conn:
+            return conn.execute('SELECT access_count FROM shared_links WHERE share_token = ?',
+                                (token,)).fetchone()[0]
+
+    def test_accesses_are_written_in_batches(self):
+        """Test that views are tallied in memory and flushed together, including on close"""
+        path = os.path.join(self.workdir, 'share.db')
+        db = ProjectDatabase(path, share_flush_interval=3600)
+        project_id = db.save_project("demo", "", "a", SAMPLE_MIX)
+        first, second = db.create_share_link(project_id), db.create_share_link(project_id)
+
+        for _ in range(5):
+            self.assertEqual(db.get_project_by_share_token(first)['name'], "demo")
+        db.get_project_by_share_token(second)
+        self.assertEqual(self.access_count(db, first), 0)
+        self.assertEqual(db.flush_share_accesses(), 6)
+        self.assertEqual((self.access_count(db, first), self.access_count(db, second)), (5, 1))
+        self.assertEqual(db.flush_share_accesses(), 0)
+
+        db.get_project_by_share_token(second)
+        db.close()
+        db = ProjectDatabase(path, share_flush_interval=0)
+        self.addCleanup(db.close)
+        self.assertEqual(self.access_count(db, second), 2)
+        db.get_project_by_share_token(second)
+        self.assertEqual(self.access_count(db, second), 3)
+
+    def test_cached_projects_follow_updates_and_deletes(self):
+        """Test that hot tokens are served from memory until their project changes"""
+        db = self.make_db(share_flush_interval=3600)
+        project_id = db.save_project("demo", "", "a", SAMPLE_MIX)
+        token = db.create_share_link(project_id)
+        shared = db.get_project_by_share_token(token)
+        self.assertEqual(shared['id'], project_id)
+        self.assertEqual(shared['share_access_count'], 0)
+        shared['tags'].append("mutated")
+
+        with db.pool.transaction() as conn:
+            conn.execute("UPDATE projects SET name = 'changed behind the cache'")
+        self.assertEqual(db.get_project_by_share_token(token)['name'], "demo")
+        self.assertEqual(db.get_project_by_share_token(token)['tags'], [])
+        self.assertEqual(db.share_cache.hits, 2)
+
+        db.update_project(project_id, name="renamed")
+        self.assertEqual(db.get_project_by_share_token(token)['name'], "renamed")
+        db.delete_project(project_id)
+        self.assertIsNone(db.get_project_by_share_token(token))
+        self.assertIsNone(db.get_project_by_share_token("unknown"))
+
+    def test_entries_lapse(self):
+        """Test the time to live and the link's own expiry"""
+        now = [0.0]
+        cache = ShareLinkCache(ttl=10, clock=lambda: now[0])
+        cache.put("token", {'project_id': 'p'})
+        cache.put("expired", {'project_id': 'p'}, expires_at='2000-01-01 00:00:00')
+        self.assertEqual(cache.get("token"), {'project_id': 'p'})
+        self.assertIsNone(cache.get("expired"))
+        now[0] = 11
+        self.assertIsNone(cache.get("token"))
+        self.assertEqual(len(cache), 0)
+
+class TestListPagination(DatabaseTestCase):
+    """Tests for keyset pagination of project listings"""
+
+    def walk(self, db, **kwargs):
+        pages, cursor = [], None
+        while True:
+            page = db.list_projects_page(cursor=cursor, **kwargs)
+            pages.append([project['name'] for project in page['projects']])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_project_once(self):
+        """Test that cursors walk projects saved in the same second without gaps"""
+        db = self.make_db()
+        for n in range(7):
+            db.save_project(f"p{n}", "", f"author{n % 2}", SAMPLE_MIX, is_public=n != 3)
+
+        pages = self.walk(db, limit=3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), [f"p{n}" for n in reversed(range(7))])
+        self.assertEqual(sum(pages, []), [project['name'] for project in db.list_projects()])
+
+        self.assertEqual(self.walk(db, limit=2, author="author1", is_public=True), [["p5", "p1"]])
+        self.assertEqual(self.walk(db, limit=10, is_public=False), [["p3"]])
+
+    def test_summary_leaves_out_metadata(self):
+        """Test the lightweight projection used by list views"""
+        db = self.make_db()
+        db.save_project("demo", "desc", "a", SAMPLE_MIX, tags=["x"], metadata={"big": "value"})
+
+        project = db.list_projects_page()['projects'][0]
+        self.assertEqual(project['tags'], ["x"])
+        self.assertNotIn('metadata', project)
+        self.assertNotIn('row_id', project)
+        self.assertEqual(db.list_projects(summary=True)[0], project)
+        self.assertEqual(db.list_projects_page(summary=False)['projects'][0]['metadata'], {"big": "value"})
+
+    def test_invalid_cursor(self):
+        """Test that a tampered cursor is rejected"""
+        db = self.make_db()
+        for cursor in ("garbage!", "e30", "WyJ4Il0"):
+            with self.assertRaises(CursorError):
+                db.list_projects_page(cursor=cursor)
+
+if __name__ == '__main__':
+    unittest.main()
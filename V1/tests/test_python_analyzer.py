@@ -0,0 +1,152 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from security.python_analyzer import analyze_python
+from security.manager import SecurityManager
+
+class TestPythonAnalyzer(unittest.TestCase):
+    """Tests for AST-based Python safety analysis"""
+
+    def assertVerdict(self, code, verdict):
+        report = analyze_python(code)
+        self.assertEqual(report['verdict'], verdict, report['findings'])
+        return report
+
+    def test_plain_code_is_safe(self):
+        """Test that ordinary code, including reading files, is safe"""
+        report = self.assertVerdict(
+            'import math\nwith open("data.txt") as f:\n    print(math.sqrt(len(f.read())))', 'safe')
+        self.assertEqual(report['imports'], ['math'])
+        self.assertEqual(report['findings'], [])
+
+    def test_aliased_imports_are_resolved(self):
+        """Test that aliases and from-imports resolve to qualified names"""
+        self.assertVerdict('import os as o\no.system("ls")', 'unsafe')
+        self.assertVerdict('from os import system as run\nrun("ls")', 'unsafe')
+        self.assertVerdict('import os\nrunner = os.execvp', 'unsafe')
+        self.assertVerdict('import os\nprint(os.getcwd())', 'safe')
+
+    def test_dynamic_access(self):
+        """Test getattr resolution and dynamic imports"""
+        self.assertVerdict('import os\ngetattr(os, "system")("ls")', 'unsafe')
+        self.assertVerdict('import os\nname = "sys" + "tem"\ngetattr(os, name)("ls")', 'restricted')
+        self.assertVerdict('m = __import__("o" + "s")', 'unsafe')
+        self.assertVerdict('import builtins\nbuiltins.eval("1")', 'unsafe')
+        self.assertVerdict('().__class__.__base__.__subclasses__()', 'unsafe')
+
+    def test_shadowed_builtins_are_restricted(self):
+        """Test that user definitions named like builtins are allowed, but not fast-pathed"""
+        self.assertVerdict('def compile(src):\n    return src\nprint(compile("x"))', 'restricted')
+        self.assertVerdict('if False:\n    eval = None\neval("1")', 'restricted')
+
+    def test_os_backends_are_unsafe(self):
+        """Test that the modules os wraps are blocked like os itself"""
+        self.assertVerdict('import posix\nposix.system("id")', 'unsafe')
+        self.assertVerdict('import nt', 'unsafe')
+        self.assertVerdict('from _posixsubprocess import fork_exec', 'unsafe')
+
+    def test_writes_and_network_are_restricted(self):
+        """Test that writes and network modules need full isolation"""
+        report = self.assertVerdict('open("out.txt", "w").write("x")', 'restricted')
+        self.assertIn("mode 'w'", report['findings'][0]['detail'])
+        self.assertVerdict('import urllib.request', 'restricted')
+        self.assertVerdict('import socket', 'unsafe')
+
+    def test_star_imports(self):
+        """Test that star imports are restricted and their names still resolved"""
+        self.assertVerdict('from os import *\nsystem("id")', 'unsafe')
+        self.assertVerdict('from sys import *', 'restricted')
+        self.assertVerdict('from io import *', 'restricted')
+        self.assertFalse(self.assertVerdict('from math import *\nprint(pi)', 'safe')['pure'])
+
+    def test_file_and_process_escapes(self):
+        """Test writes, links and session changes outside the open() builtin"""
+        report = self.assertVerdict('import io\nio.open("out.txt", "w")', 'restricted')
+        self.assertIn('io.open()', report['findings'][0]['detail'])
+        self.assertVerdict('import codecs\ncodecs.open("out.txt", mode="a")', 'restricted')
+        self.assertVerdict('import pathlib\npathlib.Path("out.txt").write_text("x")', 'restricted')
+        self.assertVerdict('import os\nos.symlink("/etc/passwd", "link")', 'restricted')
+        self.assertVerdict('import os\nos.truncate("data.txt", 0)', 'restricted')
+        self.assertVerdict('import os\nos.setsid()', 'restricted')
+        self.assertVerdict('import runpy\nrunpy.run_path("script.py")', 'unsafe')
+        self.assertVerdict('import code\ncode.interact()', 'unsafe')
+        self.assertVerdict('g = (x for x in [])\ng.gi_frame.f_builtins["eval"]("1")', 'unsafe')
+
+    def test_purity_is_an_allowlist(self):
+        """Test that only allowlisted modules, builtins and attributes are pure"""
+        for code in ('print(sum(range(10)))', 'import statistics\nprint(statistics.mean([1, 2]))',
+                     'from collections import Counter\nprint(Counter("aab").most_common(1))',
+                     'class A:\n    def __init__(self):\n        super().__init__()\nprint(type(A()).__name__)'):
+            self.assertTrue(analyze_python(code)['pure'], code)
+        for code in ('import os\nprint(os.getcwd())', 'print(open("data.txt").read())',
+                     'f = open', 'if False:\n    from math import pi as open\nopen("x", "w")',
+                     'import enum\nenum.bltns', 'from datetime import sys',
+                     'import random\nrandom._os', 'print(print.__self__)'):
+            self.assertFalse(analyze_python(code)['pure'], code)
+
+    def test_syntax_errors(self):
+        """Test that unparseable code is reported, not raised"""
+        report = self.assertVerdict('def broken(:', 'restricted')
+        self.assertTrue(report['syntax_error'])
+
+class TestSecurityManagerAnalysis(unittest.TestCase):
+    """Tests for the analyzer inside SecurityManager"""
+
+    def test_reading_files_is_no_longer_blocked(self):
+        """Test that the AST analyzer replaces the over-blocking open() regex"""
+        manager = SecurityManager({})
+        self.assertTrue(manager.validate_code_safety('print(open("data.txt", "r").read())', 'python')[0])
+        legacy = SecurityManager({'security_python_analysis': False})
+        self.assertFalse(legacy.validate_code_safety('print(open("data.txt", "r").read())', 'python')[0])
+
+    def test_unsafe_message_names_the_construct(self):
+        """Test that blocked code reports what was found and where"""
+        is_safe, message = SecurityManager({}).validate_code_safety('x = 1\nimport os as o\no.system("ls")', 'python')
+        self.assertFalse(is_safe)
+        self.assertIn('os.system', message)
+        self.assertIn('line 3', message)
+
+    def test_fast_path_decision_is_cached(self):
+        """Test that the fast path reuses the cached analysis report"""
+        manager = SecurityManager({})
+        self.assertTrue(manager.allows_fast_path('print(sum(range(10)))', 'python'))
+        self.assertFalse(manager.allows_fast_path('open("out.txt", "a")', 'python'))
+        self.assertFalse(manager.allows_fast_path('echo hi', 'bash'))
+
+        hits = manager.verdict_cache.hits
+        manager.allows_fast_path('print(sum(range(10)))', 'python')
+        self.assertGreater(manager.verdict_cache.hits, hits)
+
+    def test_rebound_builtins_are_blocked(self):
+        """Test that shadowing a dangerous builtin does not get it past validation"""
+        manager = SecurityManager({})
+        for code in ('if False:\n    eval = None\neval("__import__(\'os\').system(\'id\')")',
+                     'def f(exec):\n    pass\nexec("import subprocess")',
+                     'import posix\nposix.system("id")'):
+            self.assertFalse(manager.validate_code_safety(code, 'python')[0], code)
+            self.assertFalse(manager.allows_fast_path(code, 'python'), code)
+
+    def test_fast_path_needs_a_pure_block(self):
+        """Test that escapes the denylist misses still never reach the fast path"""
+        manager = SecurityManager({})
+        self.assertFalse(manager.validate_code_safety('from os import *\nsystem("id")', 'python')[0])
+        for code in ('from os import *\nsystem("id")', 'import io\nio.open("p", "w")',
+                     'import pathlib\npathlib.Path("p").write_text("x")', 'import os\nos.symlink("a", "b")',
+                     'import os\nos.truncate("p", 0)', 'import os\nos.setsid()',
+                     'import runpy\nrunpy.run_path("p")', 'import code\ncode.interact()',
+                     'import shelve\nshelve.open("p")', 'print(open("data.txt").read())'):
+            self.assertFalse(manager.allows_fast_path(code, 'python'), code)
+        self.assertTrue(manager.allows_fast_path('import math\nprint(math.sqrt(2))', 'python'))
+
+    def test_syntax_errors_fall_back_to_regex_rules(self):
+        """Test that unparseable blocks still get the regex rules"""
+        is_safe, message = SecurityManager({}).validate_code_safety('os.system("ls") (', 'python')
+        self.assertFalse(is_safe)
+        self.assertIn('dangerous pattern', message)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser import parse_mix_file, consolidate_language_blocks
+from runners.result_cache import ResultCache
+from runners.plugin_manager import PluginManager
+
+class TestResultCache(unittest.TestCase):
+    """Tests for opt-in block result memoization"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.config = {
+            'result_cache': {
+                'enabled': True,
+                'directory': self.cache_dir,
+                'ttl_seconds': 60,
+                'max_entries': 3
+            }
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_cache_directive_parsing(self):
+        """Test that #cache marks a block as cacheable"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.mix', delete=False) as f:
+            f.write('#lang: python\n#cache\nprint("a")\n\n#lang: python\nprint("b")\n')
+            temp_file = f.name
+        try:
+            blocks = parse_mix_file(temp_file)
+            self.assertTrue(blocks[0]['cache'])
+            self.assertFalse(blocks[1]['cache'])
+            self.assertNotIn('#cache', blocks[0]['code'])
+
+            # A consolidated block is only cacheable if every part opted in
+            consolidated = consolidate_language_blocks(blocks)
+            self.assertFalse(consolidated[0]['cache'])
+        finally:
+            os.remove(temp_file)
+
+    def test_key_depends_on_imports_and_toolchain(self):
+        """Test that imported values and toolchain version change the key"""
+        cache = ResultCache(self.config)
+        base = cache.make_key('python', 'print(x)', 'Python 3.11', {'x': 1}, ['y'])
+        self.assertEqual(base, cache.make_key('python', 'print(x)', 'Python 3.11', {'x': 1}, ['y']))
+        self.assertNotEqual(base, cache.make_key('python', 'print(x)', 'Python 3.11', {'x': 2}, ['y']))
+        self.assertNotEqual(base, cache.make_key('python', 'print(x)', 'Python 3.12', {'x': 1}, ['y']))
+        self.assertNotEqual(base, cache.make_key('python', 'print(x)', 'Python 3.11', {'x': 1}, ['z']))
+
+    def test_put_get_and_failures_not_cached(self):
+        """Test round trip of successful results and skipping of failures"""
+        cache = ResultCache(self.config)
+        result = {'output': 'hi\n', 'error': '', 'return_code': 0,
+                  'exported_data': {'y': [1, 2]}, 'execution_time': 0.5}
+        self.assertTrue(cache.put('ok', result))
+        self.assertFalse(cache.put('bad', dict(result, return_code=1)))
+        self.assertFalse(cache.put('partial', dict(result, truncated=True)))
+
+        hit = cache.get('ok')
+        self.assertTrue(hit['cache_hit'])
+        self.assertEqual(hit['output'], 'hi\n')
+        self.assertEqual(hit['exported_data'], {'y': [1, 2]})
+        self.assertEqual(hit['cached_execution_time'], 0.5)
+        self.assertIsNone(cache.get('bad'))
+        self.assertIsNone(cache.get('partial'))
+
+    def test_ttl_and_eviction(self):
+        """Test expiry and size-bounded eviction"""
+        cache = ResultCache(self.config)
+        result = {'output': '', 'error': '', 'return_code': 0, 'exported_data': {}}
+        for i in range(5):
+            cache.put(f'key{i}', result)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+        cache.ttl_seconds = 0
+        time.sleep(0.01)
+        self.assertIsNone(cache.get('key4'))
+
+    def test_plugin_manager_marks_cache_hits(self):
+        """Test that repeated cacheable runs are served from the cache"""
+        manager = PluginManager(self.config)
+        code = 'y = 21 * 2\nprint(y)'
+        first = manager.run_code('python', code, {}, ['y'], cacheable=True)
+        second = manager.run_code('python', code, {}, ['y'], cacheable=True)
+        self.assertFalse(first['cache_hit'])
+        self.assertTrue(second['cache_hit'])
+        self.assertEqual(second['output'], first['output'])
+        self.assertEqual(second['exported_data'], {'y': 42})
+
+        uncached = manager.run_code('python', code, {}, ['y'])
+        self.assertNotIn('cache_hit', uncached)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import subprocess
+import tempfile
+import shutil
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runners.sandbox import Sandbox
+from runners.python_runner import PythonRunner
+from runners.bash_runner import BashRunner
+
+SANDBOX_CONFIG = {'execution_modes': {'python': 'sandbox', 'bash': 'sandbox'}}
+
+@unittest.skipUnless(sys.platform.startswith('linux') and Sandbox.is_available(),
+                     "unprivileged namespaces not available")
+class TestSandbox(unittest.TestCase):
+    """Tests for the Linux namespace sandbox execution mode"""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.workdir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_isolation(self):
+        """Test read-only root, private workdir, PID namespace and no network"""
+        self.write('secret.txt', 'host data')
+        script = self.write('probe.py', '\n'.join([
+            'import os, socket',
+            'print(os.getpid(), os.getuid(), sorted(os.listdir(os.path.dirname(__file__))))',
+            'for path in ["/etc/polyrun-probe", "/var/tmp/polyrun-probe"]:',
+            '    try:',
+            '        open(path, "w")',
+            '        print("writable", path)',
+            '    except OSError:',
+            '        pass',
+            'try:',
+            '    socket.create_connection(("127.0.0.1", 22), timeout=1)',
+            '    print("network")',
+            'except OSError:',
+            '    pass',
+        ]))
+
+        result = Sandbox({}).run(['python3', script], 10, files=[script])
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "1 1000 ['probe.py']")
+
+    def test_outputs_are_collected(self):
+        """Test that requested files written inside come back to the host"""
+        output = os.path.join(self.workdir, 'out.txt')
+        result = Sandbox({}).run(['sh', '-c', f'echo done > {output}; echo extra > {self.workdir}/other'],
+                                 10, collect=[output])
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        with open(output) as f:
+            self.assertEqual(f.read(), 'done\n')
+        self.assertFalse(os.path.exists(os.path.join(self.workdir, 'other')))
+
+    def test_timeout_and_limits(self):
+        """Test wall clock timeout and the file size rlimit"""
+        with self.assertRaises(subprocess.TimeoutExpired):
+            Sandbox({}).run(['sleep', '30'], 0.5)
+
+        sandbox = Sandbox({'sandbox': {'limits': {'file_size_mb': 1}}})
+        result = sandbox.run(['sh', '-c', 'head -c 2000000 /dev/zero > /tmp/big'], 10)
+        self.assertNotEqual(result.returncode, 0)
+
+    def test_runners_use_sandbox_mode(self):
+        """Test that runners keep imports/exports working in sandbox mode"""
+        python = PythonRunner(SANDBOX_CONFIG).run('import os\ntotal = sum(numbers)\nprint(os.getpid())',
+                                                 {'numbers': [1, 2, 3]}, ['total'])
+        self.assertEqual(python['output'].strip(), '1')
+        self.assertEqual(python['exported_data'], {'total': 6})
+
+        bash = BashRunner(SANDBOX_CONFIG).run('echo "$IMPORT_NAME"', {'name': 'poly'}, [])
+        self.assertEqual(bash['output'].strip(), 'poly')
+
+class TestExecutionMode(unittest.TestCase):
+    """Tests for per-language execution mode selection"""
+
+    def test_unavailable_sandbox_falls_back_to_local(self):
+        """Test that runners run locally when namespaces are unavailable"""
+        available = Sandbox._available
+        Sandbox._available = False
+        try:
+            runner = PythonRunner(SANDBOX_CONFIG)
+            self.assertEqual(runner.get_execution_mode(), 'sandbox')
+            result = runner.run('import os\nprint(os.getpid() > 1)')
+        finally:
+            Sandbox._available = available
+        self.assertEqual(result['output'].strip(), 'True')
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "namespace sandbox is Linux only")
+    def test_setup_failure_falls_back_to_local(self):
+        """Test that a sandbox that cannot be set up is disabled, not fatal"""
+        available = Sandbox._available
+        Sandbox._available = None
+        try:
+            config = dict(SANDBOX_CONFIG, sandbox={'uid': -1})
+            result = PythonRunner(config).run('print("ran")')
+            self.assertFalse(Sandbox._available)
+        finally:
+            Sandbox._available = available
+        self.assertEqual(result['output'].strip(), 'ran')
+
+    def test_default_mode_is_local(self):
+        """Test that languages without an entry run locally"""
+        self.assertEqual(PythonRunner({}).get_execution_mode(), 'local')
+        self.assertEqual(PythonRunner({'execution_modes': {'bash': 'sandbox'}}).get_execution_mode(), 'local')
+
+if __name__ == '__main__':
+    unittest.main()
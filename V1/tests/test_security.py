@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from security.manager import SecurityManager, CompiledPolicy, required_literal
+
+class TestSecurityManager(unittest.TestCase):
+    """Tests for compiled security policies and verdict memoization"""
+
+    def test_required_literal(self):
+        """Test literal extraction from rule patterns"""
+        self.assertEqual(required_literal(r'os\.system\s*\('), 'os.system')
+        self.assertEqual(required_literal(r'exec[lv]*\s*\('), 'exec')
+        self.assertEqual(required_literal(r'#include\s*<sys/'), '#include')
+        self.assertEqual(required_literal(r'Popen?\('), 'pope')
+        self.assertEqual(required_literal(r'\s*eval'), '')
+        self.assertEqual(required_literal(r'eval|exec'), '')
+
+    def test_compiled_policy_matches_first_rule_in_order(self):
+        """Test that the compiled policy reports the same rule as a sequential scan"""
+        policy = CompiledPolicy([r'fork\s*\(', r'system\s*\(', r'\s+danger'])
+        self.assertEqual(policy.search('SYSTEM("ls"); fork();'), r'fork\s*\(')
+        self.assertEqual(policy.search('x =  danger'), r'\s+danger')
+        self.assertIsNone(policy.search('int main() { return 0; }'))
+
+    def test_config_rules_are_applied(self):
+        """Test that rules from config extend the built-in patterns"""
+        manager = SecurityManager({'security_rules': {'python': [r'shutil\.rmtree', {'pattern': r'numpy'}]}})
+
+        is_safe, message = manager.validate_code_safety('import shutil\nshutil.rmtree("/")', 'python')
+        self.assertFalse(is_safe)
+        self.assertIn('shutil', message)
+        self.assertFalse(manager.validate_code_safety('import numpy', 'python')[0])
+        self.assertTrue(SecurityManager({}).validate_code_safety('import numpy', 'python')[0])
+
+    def test_verdicts_are_memoized(self):
+        """Test that repeated blocks hit the verdict cache"""
+        manager = SecurityManager({})
+        code = 'int main() { return 0; }'
+
+        first = manager.validate_code_safety(code, 'cpp')
+        second = manager.validate_code_safety(code, 'cpp')
+
+        self.assertEqual(first, (True, "Code passed safety validation"))
+        self.assertEqual(first, second)
+        self.assertEqual(manager.verdict_cache.hits, 1)
+        self.assertEqual(manager.verdict_cache.misses, 1)
+
+if __name__ == '__main__':
+    unittest.main()
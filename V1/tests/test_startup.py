@@ -0,0 +1,72 @@
+import unittest
+import subprocess
+import tempfile
+import shutil
+import sys
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(PROJECT_ROOT, 'main.py')
+CONFIG = os.path.join(PROJECT_ROOT, 'config.json')
+
+# Modules a hello-world bash mix must not pull in
+DEFERRED_MODULES = [
+    'docker', 'runners.docker_runner', 'psutil', 'importlib.metadata',
+    'runners.python_runner', 'runners.cpp_runner', 'runners.javascript_runner',
+]
+
+# Cumulative import time of main.py's own imports (site excluded), in
+# microseconds; generous so slow CI machines stay green
+IMPORT_BUDGET_US = 75000
+
+def parse_importtime(stderr):
+    """Map module -> cumulative microseconds for top-level imports"""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level
+        imports[name.strip()] = (int(cumulative), name[1:].rstrip())
+    return imports
+
+class TestStartup(unittest.TestCase):
+    """Import-time budget for `python main.py file.mix`"""
+
+    def test_hello_world_import_budget(self):
+        """Test that a trivial mix defers heavy imports and stays in budget"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.mix', delete=False) as f:
+            f.write('#lang: bash\necho "hello"\n')
+            mix_file = f.name
+        self.addCleanup(os.unlink, mix_file)
+
+        # The plugin manifest (and any run log) is written under the cwd
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, True)
+
+        env = dict(os.environ, DOCKER_HOST='unix:///nonexistent/docker.sock')
+        command = [MAIN, '-c', CONFIG, mix_file]
+        # First run builds the plugin manifest; measure a warm start
+        subprocess.run([sys.executable] + command, cwd=workdir,
+                       capture_output=True, timeout=60, env=env)
+        result = subprocess.run([sys.executable, '-X', 'importtime'] + command,
+                                cwd=workdir, capture_output=True, text=True, timeout=60, env=env)
+        imports = parse_importtime(result.stderr)
+
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        self.assertIn('hello', result.stderr)
+        for module in DEFERRED_MODULES:
+            self.assertNotIn(module, imports, f"{module} imported at startup")
+
+        top_level = sum(cumulative for cumulative, name in imports.values()
+                        if not name.startswith(' ') and name not in ('site', 'encodings'))
+        self.assertLess(top_level, IMPORT_BUDGET_US)
+
+        # The run log file is opt-in
+        self.assertFalse(os.path.exists(os.path.join(workdir, 'output')))
+        subprocess.run([sys.executable, MAIN, '-c', CONFIG, '--log-file', mix_file], cwd=workdir,
+                       capture_output=True, timeout=60, env=env)
+        self.assertEqual(len(os.listdir(os.path.join(workdir, 'output'))), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import unittest
+import importlib.util
+import threading
+import asyncio
+import json
+import time
+import sys
+import os
+
+# Add project root and web backend to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(PROJECT_ROOT, 'web', 'backend')
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, BACKEND_DIR)
+
+from runners.process_stream import stream_output, run_streaming, STREAMED_TAIL_CHARS
+from runners.cancellation import CancelToken
+from runners.python_runner import PythonRunner
+from runners.sandbox import Sandbox
+from streaming import OutputFrames
+
+class TestProcessStreaming(unittest.TestCase):
+    """Tests for live stdout/stderr from runner child processes"""
+
+    def test_chunks_arrive_while_running(self):
+        """Test that output is reported before the process exits"""
+        chunks = []
+        result = run_streaming(['bash', '-c', 'echo first; sleep 0.3; echo second; echo oops >&2'], 10,
+                               lambda stream, text: chunks.append((time.time(), stream, text)))
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, 'first\nsecond\n')
+        self.assertEqual(result.stderr, 'oops\n')
+        first = next(at for at, stream, text in chunks if 'first' in text)
+        second = next(at for at, stream, text in chunks if 'second' in text)
+        self.assertGreater(second - first, 0.2)
+        self.assertIn(('stderr', 'oops\n'), [(stream, text) for _, stream, text in chunks])
+
+    def test_streamed_output_keeps_a_bounded_tail(self):
+        """Test that a listener gets everything while the result keeps only the tail"""
+        seen = []
+        command = ['python3', '-c', f"print('x' * {STREAMED_TAIL_CHARS * 4}, end=''); print('END', end='')"]
+        result = run_streaming(command, 10, lambda stream, text: seen.append(len(text)))
+
+        self.assertEqual(sum(seen), STREAMED_TAIL_CHARS * 4 + 3)
+        self.assertEqual(len(result.stdout), STREAMED_TAIL_CHARS)
+        self.assertTrue(result.stdout.endswith('xEND'))
+        self.assertTrue(result.truncated)
+
+        # Without a listener (cancellation only) the full output is returned
+        result = run_streaming(command, 10, token=CancelToken())
+        self.assertEqual(len(result.stdout), STREAMED_TAIL_CHARS * 4 + 3)
+        self.assertFalse(result.truncated)
+
+    def test_runner_streams_in_every_mode(self):
+        """Test that a Python block streams live locally and in the sandbox"""
+        modes = ['local'] + (['sandbox'] if Sandbox.is_available() else [])
+        for mode in modes:
+            with self.subTest(mode=mode):
+                runner = PythonRunner({'timeout': 10, 'execution_modes': {'python': mode}})
+                chunks = []
+                with stream_output(lambda stream, text: chunks.append((time.time(), text))):
+                    result = runner.run("import time\nprint('tick')\ntime.sleep(0.3)\nprint('tock')")
+
+                self.assertEqual(result['output'], 'tick\ntock\n')
+                ticks = [at for at, text in chunks if 'tick' in text]
+                tocks = [at for at, text in chunks if 'tock' in text]
+                self.assertTrue(ticks and tocks, chunks)
+                self.assertGreater(tocks[0] - ticks[0], 0.2)
+
+    def test_no_listener_outside_context(self):
+        """Test that other threads are not streamed"""
+        chunks = []
+        with stream_output(lambda stream, text: chunks.append(text)):
+            thread = threading.Thread(target=lambda: PythonRunner({'timeout': 10}).run("print('elsewhere')"))
+            thread.start()
+            thread.join()
+        self.assertEqual(chunks, [])
+
+class TestOutputFrames(unittest.TestCase):
+    """Tests for websocket frame coalescing and backpressure"""
+
+    def test_coalesces_and_splits(self):
+        """Test that same-stream writes merge and large data is split"""
+        frames = OutputFrames({'websocket_streaming': {'max_frame_chars': 4}})
+        for text in ['a', 'b', 'c']:
+            frames.write('stdout', text)
+        frames.write('stderr', 'E')
+        frames.write('stdout', '0123456789')
+
+        self.assertEqual(frames.drain(), [('stdout', 'abc'), ('stderr', 'E'),
+                                          ('stdout', '0123'), ('stdout', '4567'), ('stdout', '89')])
+        self.assertEqual(frames.drain(), [])
+
+    def test_writer_blocks_until_drained(self):
+        """Test that pending output is bounded per connection"""
+        frames = OutputFrames({'websocket_streaming': {'max_pending_chars': 10}})
+        written = []
+
+        def chatty():
+            for n in range(5):
+                frames.write('stdout', 'x' * 10)
+                written.append(n)
+
+        writer = threading.Thread(target=chatty, daemon=True)
+        writer.start()
+        time.sleep(0.1)
+        self.assertEqual(written, [0])
+
+        frames.drain()
+        time.sleep(0.1)
+        self.assertEqual(written, [0, 1])
+
+        frames.close()
+        writer.join(1)
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(frames.drain(), [])
+
+    def test_forward_sends_numbered_frames(self):
+        """Test that forward flushes on its timer and after completion"""
+        frames = OutputFrames({'websocket_streaming': {'flush_interval_ms': 10}})
+        sent = []
+
+        async def scenario():
+            done = asyncio.Event()
+
+            async def send(frame):
+                sent.append(frame)
+
+            sender = asyncio.create_task(frames.forward(send, done, 3))
+            frames.write('stdout', 'early')
+            await asyncio.sleep(0.05)
+            early = list(sent)
+            frames.write('stderr', 'late')
+            done.set()
+            await sender
+            return early
+
+        early = asyncio.run(scenario())
+        self.assertEqual(early, [{'type': 'output', 'seq': 1, 'block': 3, 'stream': 'stdout', 'data': 'early'}])
+        self.assertEqual(sent[-1], {'type': 'output', 'seq': 2, 'block': 3, 'stream': 'stderr', 'data': 'late'})
+
+class TestWebsocketStreaming(unittest.TestCase):
+    """End-to-end test for /api/ws/execute"""
+
+    def test_output_frames_precede_block_result(self):
+        """Test that a block's output arrives as frames before its result"""
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            self.skipTest("fastapi test client not installed")
+        spec = importlib.util.spec_from_file_location('web_backend_main', os.path.join(BACKEND_DIR, 'main.py'))
+        web_main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(web_main)
+
+        messages = []
+        with TestClient(web_main.app) as client:
+            with client.websocket_connect('/api/ws/execute') as websocket:
+                websocket.send_text(json.dumps({
+                    'code': '#lang: bash\necho one\nsleep 0.3\necho two\necho warn >&2\n'
+                }))
+                while not messages or messages[-1]['type'] not in ('complete', 'error'):
+                    messages.append(json.loads(websocket.receive_text()))
+
+        types = [message['type'] for message in messages]
+        frames = [message for message in messages if message['type'] == 'output']
+        self.assertLess(types.index('output'), types.index('block_result'))
+        self.assertEqual([frame['seq'] for frame in frames], list(range(1, len(frames) + 1)))
+        stdout = [frame['data'] for frame in frames if frame['stream'] == 'stdout']
+        self.assertEqual(stdout[0], 'one\n')
+        self.assertEqual(''.join(stdout), 'one\ntwo\n')
+        self.assertIn('warn\n', [frame['data'] for frame in frames if frame['stream'] == 'stderr'])
+
+        # Streamed output is not repeated in the result
+        result = next(message for message in messages if message['type'] == 'block_result')
+        self.assertEqual(result['return_code'], 0)
+        self.assertNotIn('output', result)
+        self.assertNotIn('error', result)
+
+if __name__ == '__main__':
+    unittest.main()
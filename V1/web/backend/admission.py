@@ -0,0 +1,285 @@
+"""
+Admission control for the PolyRun web backends
+Per-client token buckets, a cap on in-flight executions with a bounded
+wait queue, and Retry-After hints derived from observed latency
+"""
+
+import asyncio
+import ipaddress
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from runners.metrics import Collected
+
+DEFAULT_ADMISSION = {
+    'max_in_flight': 4,
+    'max_queue_depth': 16,
+    'rate_per_second': 1.0,
+    'burst': 5,
+    'max_clients': 10000,
+    'min_retry_after': 1,
+    'max_retry_after': 60,
+    # Proxies whose forwarding header names the client (addresses or CIDRs);
+    # empty means the peer address is the client
+    'trusted_proxies': [],
+    'forwarded_header': 'x-forwarded-for',
+}
+
+# Weight of the newest sample in the latency moving averages
+LATENCY_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Request refused; status_code is 429 (rate limited) or 503 (overloaded)"""
+
+    def __init__(self, status_code, retry_after, reason):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class TokenBucket:
+    """Refills rate tokens per second up to burst; each request takes one"""
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now):
+        """Take a token; returns 0 on success, else seconds until one is available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self, now):
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+def ewma(previous, sample):
+    return sample if previous is None else previous + LATENCY_SMOOTHING * (sample - previous)
+
+
+class AdmissionController:
+    """
+    Gatekeeper for execution endpoints, configured by the "admission"
+    section of config.json
+
+    A request first takes a token from its client's bucket (429 when
+    empty). It then runs if fewer than max_in_flight executions are
+    active, waits if fewer than max_queue_depth requests are already
+    waiting, and is shed with 503 otherwise. Both rejections carry a
+    Retry-After in seconds: the bucket refill time for 429, the moving
+    average of recent admission-to-completion latency for 503.
+    """
+
+    def __init__(self, config=None):
+        settings = dict(DEFAULT_ADMISSION)
+        settings.update((config or {}).get('admission', {}))
+        self.enabled = settings.get('enabled', True)
+        self.max_in_flight = settings['max_in_flight']
+        self.max_queue_depth = settings['max_queue_depth']
+        self.rate = settings['rate_per_second']
+        self.burst = settings['burst']
+        self.max_clients = settings['max_clients']
+        self.min_retry_after = settings['min_retry_after']
+        self.max_retry_after = settings['max_retry_after']
+        self.trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in settings['trusted_proxies']]
+        self.forwarded_header = settings['forwarded_header'].lower()
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.queue_wait = None
+        self.latency = None
+        self.counters = {'admitted': 0, 'rejected_rate_limited': 0, 'rejected_overloaded': 0}
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._slots = None
+
+    def client_key(self, request):
+        """The client a request is rate limited as, seen through trusted proxies"""
+        return client_key(request, self.trusted_proxies, self.forwarded_header)
+
+    def check_rate(self, client):
+        """Take a token for client or raise AdmissionRejected(429)"""
+        if not self.enabled or not self.rate:
+            return
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                if len(self._buckets) >= self.max_clients:
+                    self._prune(now)
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+            wait = bucket.take(now)
+            if wait:
+                self.counters['rejected_rate_limited'] += 1
+        if wait:
+            raise AdmissionRejected(429, self._clamp(wait), f"Rate limit exceeded for {client}")
+
+    def reject_overloaded(self, reason, latency=None):
+        """Count a load-shedding rejection and build the 503 to raise"""
+        with self._lock:
+            self.counters['rejected_overloaded'] += 1
+        return AdmissionRejected(503, self.retry_after(latency), reason)
+
+    def retry_after(self, latency=None):
+        """Seconds a shed client should wait, from observed latency"""
+        latency = latency if latency is not None else self.latency
+        return self._clamp(latency or self.min_retry_after)
+
+    def check_capacity(self):
+        """Raise AdmissionRejected(503) when the wait queue is already full"""
+        if self.enabled and self.in_flight >= self.max_in_flight and self.waiting >= self.max_queue_depth:
+            raise self.reject_overloaded(
+                f"Server busy: {self.in_flight} executions running, {self.waiting} waiting")
+
+    @asynccontextmanager
+    async def admit(self, client):
+        """
+        Hold an execution slot for the duration of the block
+
+        Raises AdmissionRejected before yielding when the client is rate
+        limited or the wait queue is full.
+        """
+        self.check_rate(client)
+        self.check_capacity()
+        async with self.slot():
+            yield
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Wait for and hold one of the max_in_flight execution slots
+
+        No rate or queue-depth check: callers that were already admitted
+        (such as the programs of a batch) wait their turn instead.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        arrived = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.monotonic()
+        self.in_flight += 1
+        with self._lock:
+            self.counters['admitted'] += 1
+            self.queue_wait = ewma(self.queue_wait, started - arrived)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            with self._lock:
+                self.latency = ewma(self.latency, time.monotonic() - arrived)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters,
+                        in_flight=self.in_flight,
+                        waiting=self.waiting,
+                        max_in_flight=self.max_in_flight,
+                        max_queue_depth=self.max_queue_depth,
+                        queue_wait_seconds=self.queue_wait,
+                        latency_seconds=self.latency,
+                        clients=len(self._buckets))
+
+    def _clamp(self, seconds):
+        return int(min(self.max_retry_after, max(self.min_retry_after, math.ceil(seconds))))
+
+    def _prune(self, now):
+        """Forget clients whose buckets have refilled (caller holds the lock)"""
+        for client, bucket in list(self._buckets.items()):
+            if bucket.is_full(now):
+                del self._buckets[client]
+        # Still full of active clients: drop the least recently seen
+        while len(self._buckets) >= self.max_clients:
+            oldest = min(self._buckets, key=lambda client: self._buckets[client].updated)
+            del self._buckets[oldest]
+
+
+def client_key(request, trusted_proxies=(), forwarded_header='x-forwarded-for'):
+    """
+    Identify the caller of a Starlette request or websocket
+
+    When the peer is a trusted proxy, the forwarding header (X-Forwarded-For
+    or Forwarded) is walked from the right, past any further trusted
+    proxies, to the first address a trusted proxy saw connecting. Entries
+    left of that one are supplied by the client and never used.
+    """
+    host = request.client.host if request.client else None
+    if host is None:
+        return 'unknown'
+    if not trusted_proxies or not _is_trusted(host, trusted_proxies):
+        return host
+
+    values = ','.join(request.headers.getlist(forwarded_header))
+    if forwarded_header == 'forwarded':
+        hops = [_forwarded_for(element) for element in values.split(',')]
+    else:
+        hops = values.split(',')
+    for hop in reversed(hops):
+        address = _parse_address(hop)
+        if address is None:
+            # Missing or obfuscated: the last trusted hop is all we know
+            break
+        host = str(address)
+        if not _is_trusted(address, trusted_proxies):
+            break
+    return host
+
+
+def _is_trusted(address, trusted_proxies):
+    if isinstance(address, str):
+        address = _parse_address(address)
+    return address is not None and any(address in network for network in trusted_proxies)
+
+
+def _forwarded_for(element):
+    """The for= parameter of one RFC 7239 Forwarded element, or ''"""
+    for pair in element.split(';'):
+        name, _, value = pair.partition('=')
+        if name.strip().lower() == 'for':
+            return value
+    return ''
+
+
+def _parse_address(value):
+    """An IP address from a forwarding header entry, dropping quotes and port"""
+    value = value.strip().strip('"')
+    if value.startswith('['):
+        value = value[1:value.find(']')] if ']' in value else ''
+    elif value.count(':') == 1:
+        value = value.split(':')[0]
+    try:
+        return ipaddress.ip_address(value)
+    except ValueError:
+        return None
+
+
+def admission_metrics(get_controller):
+    """Scrape-time metrics for the controller returned by get_controller()"""
+    return [
+        Collected('polyrun_executions_in_flight', 'Executions holding an execution slot', (),
+                  lambda: {(): get_controller().in_flight}),
+        Collected('polyrun_executions_waiting', 'Admitted executions waiting for a slot', (),
+                  lambda: {(): get_controller().waiting}),
+        Collected('polyrun_admission_decisions_total', 'Admission decisions by outcome', ('outcome',),
+                  lambda: {(outcome,): count for outcome, count in get_controller().counters.items()},
+                  kind='counter'),
+    ]
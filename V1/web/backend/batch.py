@@ -0,0 +1,118 @@
+"""
+Batch execution for PolyRun
+Decodes a JSON array or NDJSON upload of .mix programs, runs each
+distinct program once on a bounded set of workers and yields one result
+per program as soon as it is known
+"""
+
+import asyncio
+import hashlib
+import json
+
+DEFAULT_BATCH = {
+    'max_programs': 1000,
+    'max_parallel': 4,
+    'dedupe': True,
+}
+
+
+class BatchError(ValueError):
+    """The upload is not a batch of programs (400)"""
+
+
+def batch_settings(config=None):
+    """The "batch" section of config.json over the defaults"""
+    settings = dict(DEFAULT_BATCH)
+    settings.update((config or {}).get('batch', {}))
+    return settings
+
+
+def parse_programs(body, content_type=''):
+    """
+    Decode the entries of a batch upload
+
+    The body is a JSON array, a {"programs": [...]} object, or NDJSON with
+    one program per line when content_type mentions ndjson. An entry is an
+    object like the /api/execute request or a bare string of .mix code.
+    An NDJSON line that is not valid JSON becomes a BatchError entry so the
+    rest of the batch still runs; a body that cannot be decoded at all
+    raises BatchError.
+    """
+    try:
+        text = body.decode('utf-8') if isinstance(body, bytes) else body
+    except UnicodeDecodeError:
+        raise BatchError("Batch body is not UTF-8")
+
+    if 'ndjson' in content_type or 'jsonl' in content_type:
+        entries = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError as e:
+                entries.append(BatchError(f"Line {number} is not valid JSON: {e}"))
+    else:
+        try:
+            entries = json.loads(text)
+        except ValueError as e:
+            raise BatchError(f"Batch body is not valid JSON: {e}")
+        if isinstance(entries, dict):
+            entries = entries.get('programs')
+        if not isinstance(entries, list):
+            raise BatchError("Expected a JSON array of programs or NDJSON")
+
+    return [{'code': entry} if isinstance(entry, str) else entry for entry in entries]
+
+
+def program_key(code, consolidate=True):
+    """Identity of a program for deduplication within a batch"""
+    return hashlib.sha256(json.dumps([code, bool(consolidate)]).encode('utf-8')).hexdigest()
+
+
+async def run_batch(programs, execute, max_parallel, dedupe=True):
+    """
+    Run programs and yield their results in completion order
+
+    Args:
+        programs: List of (program_id, key, payload); entries sharing a
+            non-None key are executed once when dedupe is on
+        execute: Coroutine function taking a payload and returning a
+            result dict
+        max_parallel: Number of programs executing at once
+        dedupe: Reuse one execution for identical programs
+
+    Yields:
+        The result dict plus index, id and duplicate_of (the index whose
+        execution was reused, or None)
+    """
+    groups = {}
+    for index, (program_id, key, payload) in enumerate(programs):
+        group_key = key if dedupe and key is not None else ('unique', index)
+        groups.setdefault(group_key, []).append((index, program_id, payload))
+
+    pending = asyncio.Queue()
+    for members in groups.values():
+        pending.put_nowait(members)
+    finished = asyncio.Queue()
+
+    async def worker():
+        while not pending.empty():
+            members = pending.get_nowait()
+            try:
+                result = await execute(members[0][2])
+            except Exception as e:
+                result = {'success': False, 'error': f"Internal error: {e}"}
+            await finished.put((members, result))
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(max_parallel, len(groups))))]
+    try:
+        for _ in range(len(groups)):
+            members, result = await finished.get()
+            first = members[0][0]
+            for index, program_id, _ in members:
+                yield dict(result, index=index, id=program_id,
+                           duplicate_of=first if index != first else None)
+    finally:
+        for task in workers:
+            task.cancel()
@@ -1,23 +1,34 @@
 # FastAPI Backend for PolyRun Web Interface
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import List, Dict, Any, Optional
 import json
 import sys
 import os
 import asyncio
 import logging
+import uuid
 from datetime import datetime
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
 from parser import parse_mix_file, validate_mix_file, consolidate_language_blocks
-from runners.plugin_manager import PluginManager
+from runners.plugin_manager import get_plugin_manager
 from security.manager import SecurityManager
+from admission import AdmissionController, AdmissionRejected, admission_metrics
+from streaming import OutputFrames
+from batch import BatchError, batch_settings, parse_programs, program_key, run_batch
+from runners.process_stream import stream_output
+from runners.cancellation import CancelToken, cancellable
+from runners import metrics as execution_metrics
+from database.async_db import AsyncProjectDatabase
+from database.pagination import CursorError
 
 app = FastAPI(title="PolyRun API", description="Multi-language code execution API", version="1.0.0")
 
@@ -33,14 +44,27 @@ app.add_middleware(
 # Global managers
 plugin_manager = None
 security_manager = None
+admission = AdmissionController()
 config = {}
 
+# Cancel tokens of running executions by execution id (HTTP and websocket)
+active_executions: Dict[str, CancelToken] = {}
+
+# Saved projects, opened on first use (see get_project_db)
+project_db: Optional[AsyncProjectDatabase] = None
+
 # Data models
 class CodeExecutionRequest(BaseModel):
     code: str
     language: Optional[str] = None
     consolidate: bool = True
     docker_enabled: bool = False
+    # Optional client-chosen id, so a waiting request can be cancelled
+    execution_id: Optional[str] = None
+
+class BatchProgram(CodeExecutionRequest):
+    # Caller's label for the program, echoed in its result line
+    id: Optional[str] = None
 
 class ExecutionResult(BaseModel):
     success: bool
@@ -50,6 +74,18 @@ class ExecutionResult(BaseModel):
     memory_used: int
     blocks_executed: int
     blocks_consolidated: int
+    cache_hits: int = 0
+    execution_id: Optional[str] = None
+    cancelled: bool = False
+
+class ProjectCreate(BaseModel):
+    name: str
+    code: str
+    description: str = ""
+    author: Optional[str] = None
+    tags: List[str] = []
+    is_public: bool = False
+    metadata: Dict[str, Any] = {}
 
 class LanguageInfo(BaseModel):
     name: str
@@ -90,7 +126,7 @@ manager = ConnectionManager()
 @app.on_event("startup")
 async def startup_event():
     """Initialize the application"""
-    global plugin_manager, security_manager, config
+    global plugin_manager, security_manager, admission, config
     
     # Load configuration
     config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
@@ -106,14 +142,23 @@ async def startup_event():
         }
     
     # Initialize managers
-    plugin_manager = PluginManager(config)
+    plugin_manager = get_plugin_manager(config)
     security_manager = SecurityManager(config)
+    admission = AdmissionController(config)
     
     # Setup logging
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
     logger.info("PolyRun API server started")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Let queued project writes finish and close the database"""
+    global project_db
+    if project_db is not None:
+        await project_db.close()
+        project_db = None
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
     """Serve the main web interface"""
@@ -156,9 +201,196 @@ async def get_supported_languages():
         ))
     return languages
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    """429/503 with a Retry-After hint"""
+    return JSONResponse(status_code=exc.status_code,
+                        content={"detail": exc.reason, "retry_after": exc.retry_after},
+                        headers={"Retry-After": str(exc.retry_after)})
+
+@app.get("/api/admission")
+async def get_admission_stats():
+    """Admission control counters (admitted, rejected, in flight, waiting)"""
+    return admission.stats()
+
+# Admission gauges read the current controller (replaced at startup)
+backend_metrics = admission_metrics(lambda: admission)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: stage latencies, runner processes, admission state"""
+    return Response(execution_metrics.render(backend_metrics), media_type=execution_metrics.CONTENT_TYPE)
+
+def get_project_db() -> AsyncProjectDatabase:
+    """The project database from the "project_database" config section, opened on first use"""
+    global project_db
+    if project_db is None:
+        settings = config.get("project_database", {})
+        path = settings.get("path", "database/polyrun.db")
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), path)
+        project_db = AsyncProjectDatabase(path, readers=settings.get("readers", 4),
+                                          search_content=settings.get("search_content", False),
+                                          share_cache_ttl=settings.get("share_cache_ttl", 60),
+                                          share_flush_interval=settings.get("share_flush_interval", 5))
+    return project_db
+
+@app.post("/api/projects", status_code=201)
+async def create_project(project: ProjectCreate):
+    """Save a project; private projects are not served until accounts exist"""
+    project_id = await get_project_db().save_project(
+        project.name, project.description, project.author, project.code,
+        tags=project.tags, is_public=project.is_public, metadata=project.metadata)
+    return {"id": project_id}
+
+@app.get("/api/projects")
+async def list_projects(author: Optional[str] = None, tag: Optional[str] = None,
+                        limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None):
+    """Public projects, newest first; pass next_cursor back for the following page"""
+    try:
+        return await get_project_db().list_projects_page(author=author, is_public=True, tag=tag,
+                                                         limit=limit, cursor=cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/projects/search")
+async def search_projects(q: str, tag: Optional[str] = None, limit: int = Query(20, ge=1, le=100),
+                          offset: int = Query(0, ge=0)):
+    """Full-text search over public projects, best matches first"""
+    projects = await get_project_db().search_projects(q, is_public=True, tag=tag, limit=limit, offset=offset)
+    return {"projects": projects}
+
+@app.get("/api/projects/stats")
+async def get_project_stats():
+    """Project counts, languages used and popular tags"""
+    db = get_project_db()
+    stats = await db.get_stats()
+    stats["popular_tags"] = dict(await db.get_popular_tags())
+    return stats
+
+async def get_public_project(project_id: str) -> Dict[str, Any]:
+    """
+    A public project, or 404
+
+    There are no accounts yet, so private projects look the same as
+    missing ones here, like in the listings and search.
+    """
+    project = await get_project_db().get_project(project_id)
+    if project is None or not project["is_public"]:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+@app.get("/api/projects/{project_id}")
+async def get_project(project_id: str):
+    """A public project with its .mix source"""
+    return await get_public_project(project_id)
+
+@app.post("/api/projects/{project_id}/share")
+async def share_project(project_id: str, expires_at: Optional[str] = None):
+    """Create a share link for a public project"""
+    await get_public_project(project_id)
+    return {"share_token": await get_project_db().create_share_link(project_id, expires_at)}
+
+@app.get("/api/shared/{share_token}")
+async def get_shared_project(share_token: str):
+    """A project opened through an active share link"""
+    project = await get_project_db().get_project_by_share_token(share_token)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Share link not found or expired")
+    return project
+
+def register_execution(execution_id: Optional[str] = None):
+    """Create the cancel token for a new execution; 409 if the id is in use"""
+    execution_id = execution_id or uuid.uuid4().hex
+    if execution_id in active_executions:
+        raise HTTPException(status_code=409, detail=f"Execution {execution_id} is already running")
+    token = CancelToken()
+    active_executions[execution_id] = token
+    return execution_id, token
+
+@app.post("/api/executions/{execution_id}/cancel")
+async def cancel_execution(execution_id: str):
+    """Kill the running block of an execution and skip the remaining ones"""
+    token = active_executions.get(execution_id)
+    if token is None:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    token.cancel()
+    return {"execution_id": execution_id, "cancelled": True}
+
 @app.post("/api/execute", response_model=ExecutionResult)
-async def execute_code(request: CodeExecutionRequest):
+async def execute_code(request: CodeExecutionRequest, http_request: Request):
     """Execute multi-language code"""
+    execution_id, token = register_execution(request.execution_id)
+    try:
+        async with admission.admit(admission.client_key(http_request)):
+            # Blocks run on a worker thread so queued requests do not stall the event loop
+            result = await asyncio.get_running_loop().run_in_executor(None, run_execution, request, token)
+    finally:
+        active_executions.pop(execution_id, None)
+    result.execution_id = execution_id
+    return result
+
+@app.post("/api/batch")
+async def execute_batch(http_request: Request, execution_id: Optional[str] = None):
+    """
+    Execute many .mix programs, streaming one NDJSON result line per
+    program as it completes
+
+    The body is a JSON array of programs or NDJSON (application/x-ndjson).
+    The batch is rate limited as one request; its programs then share the
+    server's execution slots, at most batch.max_parallel at a time, and
+    identical programs are executed once. Cancel the whole batch through
+    /api/executions/{id}/cancel with the id in the X-Execution-Id header.
+    """
+    settings = batch_settings(config)
+    try:
+        entries = parse_programs(await http_request.body(), http_request.headers.get('content-type', ''))
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(entries) > settings['max_programs']:
+        raise HTTPException(status_code=413,
+                            detail=f"Batch has {len(entries)} programs, the limit is {settings['max_programs']}")
+
+    admission.check_rate(admission.client_key(http_request))
+    admission.check_capacity()
+    execution_id, token = register_execution(execution_id)
+
+    programs = []
+    for entry in entries:
+        if isinstance(entry, BatchError):
+            programs.append((None, None, entry))
+            continue
+        try:
+            program = BatchProgram.model_validate(entry)
+        except ValidationError as e:
+            label = entry.get('id') if isinstance(entry, dict) else None
+            programs.append((label, None, BatchError(f"Invalid program: {e.errors()[0]['msg']}")))
+            continue
+        programs.append((program.id, program_key(program.code, program.consolidate), program))
+
+    async def execute(program):
+        if isinstance(program, BatchError):
+            return ExecutionResult(success=False, output="", error=str(program), execution_time=0.0,
+                                   memory_used=0, blocks_executed=0, blocks_consolidated=0).model_dump()
+        async with admission.slot():
+            result = await asyncio.get_running_loop().run_in_executor(None, run_execution, program, token)
+        return result.model_dump()
+
+    async def lines():
+        try:
+            async for result in run_batch(programs, execute, settings['max_parallel'], settings['dedupe']):
+                result['execution_id'] = execution_id
+                yield json.dumps(result) + "\n"
+        finally:
+            # Finished, or the client went away: stop anything still running
+            token.cancel()
+            active_executions.pop(execution_id, None)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson",
+                             headers={"X-Execution-Id": execution_id})
+
+def run_execution(request: CodeExecutionRequest, token: Optional[CancelToken] = None) -> ExecutionResult:
+    """Parse, validate and run a .mix request (blocking)"""
     try:
         # Create temporary file
         import tempfile
@@ -193,9 +425,14 @@ async def execute_code(request: CodeExecutionRequest):
             total_errors = []
             total_time = 0.0
             total_memory = 0
+            cache_hits = 0
             shared_data = {}
             
             for i, block in enumerate(blocks):
+                if token is not None and token.cancelled:
+                    total_errors.append("Execution cancelled")
+                    break
+                
                 lang = block['language']
                 code = block['code']
                 imports = block.get('imports', [])
@@ -207,11 +444,15 @@ async def execute_code(request: CodeExecutionRequest):
                     if var_name in shared_data:
                         import_data[var_name] = shared_data[var_name]
                 
-                # Execute block
-                result = plugin_manager.run_code(lang, code, import_data, exports)
+                # Execute block (cancelling kills its process group)
+                with cancellable(token):
+                    result = plugin_manager.run_code(lang, code, import_data, exports,
+                                                     cacheable=block.get('cache', False))
                 
                 total_time += result.get('execution_time', 0)
                 total_memory += result.get('memory_used', 0)
+                if result.get('cache_hit'):
+                    cache_hits += 1
                 
                 if result['return_code'] == 0:
                     total_output.append(f"[{lang}] {result['output']}")
@@ -231,7 +472,9 @@ async def execute_code(request: CodeExecutionRequest):
                 execution_time=total_time,
                 memory_used=total_memory,
                 blocks_executed=len(blocks),
-                blocks_consolidated=original_count - len(blocks) if request.consolidate else 0
+                blocks_consolidated=original_count - len(blocks) if request.consolidate else 0,
+                cache_hits=cache_hits,
+                cancelled=token is not None and token.cancelled
             )
             
         finally:
@@ -254,99 +497,178 @@ async def execute_code(request: CodeExecutionRequest):
 async def websocket_execute(websocket: WebSocket):
     """WebSocket endpoint for real-time code execution"""
     await manager.connect(websocket)
+    # The execution runs as a task so {"type": "cancel"} can arrive meanwhile
+    running = None
+    token = None
     try:
         while True:
             # Receive execution request
             data = await websocket.receive_text()
             request_data = json.loads(data)
             
-            # Send start message
-            await manager.send_personal_message(
-                json.dumps({"type": "start", "message": "Execution started"}), 
-                websocket
-            )
+            if request_data.get("type") == "cancel":
+                if running is not None and not running.done():
+                    token.cancel()
+                continue
             
-            # Execute code (similar to POST endpoint but with progress updates)
-            try:
-                code = request_data.get("code", "")
-                consolidate = request_data.get("consolidate", True)
-                
-                # Create temp file and parse
-                import tempfile
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.mix', delete=False) as f:
-                    f.write(code)
-                    temp_file = f.name
-                
-                blocks = parse_mix_file(temp_file)
-                if consolidate:
-                    original_count = len(blocks)
-                    blocks = consolidate_language_blocks(blocks)
-                    await manager.send_personal_message(
-                        json.dumps({
-                            "type": "consolidation", 
-                            "message": f"Consolidated {original_count} blocks into {len(blocks)} blocks"
-                        }), 
-                        websocket
-                    )
-                
-                shared_data = {}
-                for i, block in enumerate(blocks):
-                    lang = block['language']
-                    code_block = block['code']
-                    
-                    await manager.send_personal_message(
-                        json.dumps({
-                            "type": "block_start", 
-                            "block": i + 1, 
-                            "language": lang
-                        }), 
-                        websocket
-                    )
-                    
-                    # Execute block
-                    imports = block.get('imports', [])
-                    exports = block.get('exports', [])
-                    import_data = {var: shared_data.get(var) for var in imports if var in shared_data}
-                    
-                    result = plugin_manager.run_code(lang, code_block, import_data, exports)
-                    
-                    # Send result
-                    await manager.send_personal_message(
-                        json.dumps({
-                            "type": "block_result",
-                            "block": i + 1,
-                            "language": lang,
-                            "success": result['return_code'] == 0,
-                            "output": result['output'],
-                            "error": result['error'],
-                            "execution_time": result.get('execution_time', 0)
-                        }), 
-                        websocket
-                    )
-                    
-                    # Update shared data
-                    if result.get('exported_data'):
-                        shared_data.update(result['exported_data'])
-                
-                # Send completion
-                await manager.send_personal_message(
-                    json.dumps({"type": "complete", "message": "Execution completed"}), 
-                    websocket
-                )
-                
-                os.unlink(temp_file)
-                
-            except Exception as e:
+            if running is not None and not running.done():
                 await manager.send_personal_message(
-                    json.dumps({
-                        "type": "error", 
-                        "message": f"Execution error: {str(e)}"
-                    }), 
+                    json.dumps({"type": "error", "message": "An execution is already running"}),
                     websocket
                 )
+                continue
+            
+            token = CancelToken()
+            running = asyncio.create_task(admit_websocket_execution(websocket, request_data, token))
     
     except WebSocketDisconnect:
         manager.disconnect(websocket)
+        # Nobody is listening any more: stop burning CPU on the run
+        if running is not None and not running.done():
+            token.cancel()
+
+async def admit_websocket_execution(websocket: WebSocket, request_data: Dict[str, Any], token: CancelToken):
+    """Run a websocket execution once admitted, or report the rejection"""
+    execution_id = uuid.uuid4().hex
+    active_executions[execution_id] = token
+    try:
+        async with admission.admit(admission.client_key(websocket)):
+            await run_websocket_execution(websocket, request_data, token, execution_id)
+    except AdmissionRejected as e:
+        await manager.send_personal_message(
+            json.dumps({
+                "type": "rejected",
+                "status": e.status_code,
+                "retry_after": e.retry_after,
+                "message": e.reason
+            }),
+            websocket
+        )
+    except Exception as e:
+        # Connection closed mid-run; the receive loop handles the disconnect
+        logging.getLogger(__name__).debug(f"Websocket execution ended: {e}")
+    finally:
+        active_executions.pop(execution_id, None)
+
+async def run_websocket_execution(websocket: WebSocket, request_data: Dict[str, Any],
+                                  token: CancelToken, execution_id: str):
+    """Run one websocket execution request, sending progress messages"""
+    # Send start message
+    await manager.send_personal_message(
+        json.dumps({"type": "start", "message": "Execution started", "execution_id": execution_id}), 
+        websocket
+    )
+    
+    # Execute code (similar to POST endpoint but with progress updates)
+    frames = OutputFrames(config)
+    
+    async def send_frame(frame):
+        await manager.send_personal_message(json.dumps(frame), websocket)
+    
+    try:
+        code = request_data.get("code", "")
+        consolidate = request_data.get("consolidate", True)
+        
+        # Create temp file and parse
+        import tempfile
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.mix', delete=False) as f:
+            f.write(code)
+            temp_file = f.name
+        
+        blocks = parse_mix_file(temp_file)
+        if consolidate:
+            original_count = len(blocks)
+            blocks = consolidate_language_blocks(blocks)
+            await manager.send_personal_message(
+                json.dumps({
+                    "type": "consolidation", 
+                    "message": f"Consolidated {original_count} blocks into {len(blocks)} blocks"
+                }), 
+                websocket
+            )
+        
+        shared_data = {}
+        for i, block in enumerate(blocks):
+            if token.cancelled:
+                break
+            
+            lang = block['language']
+            code_block = block['code']
+            
+            await manager.send_personal_message(
+                json.dumps({
+                    "type": "block_start", 
+                    "block": i + 1, 
+                    "language": lang
+                }), 
+                websocket
+            )
+            
+            # Execute block
+            imports = block.get('imports', [])
+            exports = block.get('exports', [])
+            import_data = {var: shared_data.get(var) for var in imports if var in shared_data}
+            
+            # Stream stdout/stderr while the block runs; frames are numbered
+            # across the whole execution
+            done = asyncio.Event()
+            streamed_from = frames.seq
+            sender = asyncio.create_task(frames.forward(send_frame, done, i + 1))
+            
+            def run_block():
+                with stream_output(frames.write), cancellable(token):
+                    return plugin_manager.run_code(lang, code_block, import_data, exports,
+                                                   cacheable=block.get('cache', False))
+            
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(None, run_block)
+            finally:
+                done.set()
+                await sender
+            
+            # Send result; output already sent as frames is not repeated
+            message = {
+                "type": "block_result",
+                "block": i + 1,
+                "language": lang,
+                "success": result['return_code'] == 0,
+                "return_code": result['return_code'],
+                "exports": sorted(result.get('exported_data') or {}),
+                "execution_time": result.get('execution_time', 0),
+                "cache_hit": result.get('cache_hit', False)
+            }
+            if frames.seq == streamed_from:
+                # Nothing streamed (cache hit, container run, runner error)
+                message["output"] = result['output']
+                message["error"] = result['error']
+            await manager.send_personal_message(json.dumps(message), websocket)
+            
+            # Update shared data
+            if result.get('exported_data'):
+                shared_data.update(result['exported_data'])
+        
+        # Send completion
+        if token.cancelled:
+            await manager.send_personal_message(
+                json.dumps({"type": "cancelled", "message": "Execution cancelled", "execution_id": execution_id}),
+                websocket
+            )
+        else:
+            await manager.send_personal_message(
+                json.dumps({"type": "complete", "message": "Execution completed"}), 
+                websocket
+            )
+        
+        os.unlink(temp_file)
+        
+    except Exception as e:
+        await manager.send_personal_message(
+            json.dumps({
+                "type": "error", 
+                "message": f"Execution error: {str(e)}"
+            }), 
+            websocket
+        )
 
 # Serve static files (if directory exists)
 static_dir = os.path.join(os.path.dirname(__file__), "..", "frontend", "static")
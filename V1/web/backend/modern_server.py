@@ -1,16 +1,20 @@
 # Modern FastAPI Backend for PolyRun Web Interface
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from pydantic import BaseModel
+from typing import Optional
 import sys
 import os
 import json
+import asyncio
 import logging
-import tempfile
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from admission import AdmissionController, AdmissionRejected, admission_metrics
 
 app = FastAPI(title="PolyRun API", version="1.0.0")
 
@@ -26,6 +30,8 @@ app.add_middleware(
 class CodeRequest(BaseModel):
     code: str
     consolidate: bool = True
+    # Optional client-chosen id, so a waiting /execute can be cancelled
+    execution_id: Optional[str] = None
 
 @app.get("/", response_class=HTMLResponse)
 async def get_interface():
@@ -558,129 +564,132 @@ int main() {
 </html>
     """
 
-@app.post("/execute")
-async def execute_code(request: CodeRequest):
-    """Execute multi-language code with cloud platform compatibility"""
+def load_config():
+    """Load config.json from the project root"""
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.json')
+    with open(config_path, 'r') as f:
+        return json.load(f)
+
+_job_queue = None
+_admission = None
+
+def get_job_queue():
+    """Process-wide job queue, created on first use"""
+    global _job_queue
+    if _job_queue is None:
+        from runners.job_queue import JobQueue
+        _job_queue = JobQueue(load_config())
+    return _job_queue
+
+def get_admission():
+    """Process-wide admission controller, created on first use"""
+    global _admission
+    if _admission is None:
+        _admission = AdmissionController(load_config())
+    return _admission
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    """429/503 with a Retry-After hint"""
+    return JSONResponse(status_code=exc.status_code,
+                        content={"detail": exc.reason, "retry_after": exc.retry_after},
+                        headers={"Retry-After": str(exc.retry_after)})
+
+def admit_job(http_request, request):
+    """
+    Rate limit the caller, then queue the job
+
+    The job queue's workers and max_queued are the in-flight and queue
+    depth limits here; a full queue is shed with 503.
+    """
+    from runners.job_queue import JobQueueFull
+    admission = get_admission()
+    admission.check_rate(admission.client_key(http_request))
+    job_queue = get_job_queue()
     try:
-        # Import necessary modules
-        import io
-        import contextlib
-        
-        # Create temporary file for the code
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.mix', delete=False) as f:
-            f.write(request.code)
-            temp_file = f.name
-        
-        # Capture output
-        output_buffer = io.StringIO()
-        
-        try:
-            with contextlib.redirect_stdout(output_buffer):
-                with contextlib.redirect_stderr(output_buffer):
-                    # Execute the code by calling the execution function directly
-                    from parser import parse_mix_file, consolidate_language_blocks
-                    from runners.plugin_manager import PluginManager
-                    
-                    # Load config
-                    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.json')
-                    with open(config_path, 'r') as f:
-                        config = json.load(f)
-                    
-                    # Parse the mix file
-                    blocks = parse_mix_file(temp_file)
-                    print(f"📂 Parsed {len(blocks)} code blocks")
-                    
-                    # Apply consolidation if requested
-                    if request.consolidate:
-                        blocks = consolidate_language_blocks(blocks)
-                        print(f"🔄 Consolidated to {len(blocks)} blocks")
-                    
-                    # Initialize plugin manager and execute blocks
-                    plugin_manager = PluginManager(config)
-                    export_data = {}
-                    
-                    for i, block in enumerate(blocks):
-                        language = block['language']
-                        code = block['code']
-                        imports = block.get('imports', [])
-                        exports = block.get('exports', [])
-                        
-                        print(f"\n🚀 Running block {i+1}: {language}")
-                        
-                        # Prepare import data
-                        import_data = {}
-                        for var in imports:
-                            if var in export_data:
-                                import_data[var] = export_data[var]
-                                print(f"📥 Importing {var}: {import_data[var]}")
-                        
-                        # Get runner and execute
-                        runner = plugin_manager.get_runner(language)
-                        if runner:
-                            result = runner.run(code, import_data, exports)
-                            
-                            # Print the actual code output first
-                            output_displayed = False
-                            if isinstance(result, dict):
-                                if result.get('output'):
-                                    print(result['output'].strip())
-                                    output_displayed = True
-                                if result.get('error'):
-                                    print(f"Error: {result['error'].strip()}")
-                            elif hasattr(result, 'output') and result.output:
-                                print(result.output.strip())
-                                output_displayed = True
-                            elif isinstance(result, str):
-                                print(result.strip())
-                                output_displayed = True
-                            
-                            # Handle exports - check if result is dict and has exported_data
-                            if exports and isinstance(result, dict) and 'exported_data' in result:
-                                for var, value in result['exported_data'].items():
-                                    if var in exports:
-                                        export_data[var] = value
-                                        print(f"📤 Exported {var}: {value}")
-                            
-                            if not output_displayed:
-                                print(f"✅ Block completed successfully")
-                        else:
-                            print(f"❌ No runner found for language: {language}")
-                            
-            captured_output = output_buffer.getvalue()
-            
-            return {
-                "success": True,
-                "output": captured_output,
-                "full_log": captured_output
-            }
-            
-        except Exception as e:
-            error_output = output_buffer.getvalue()
-            return {
-                "success": False,
-                "error": str(e),
-                "output": error_output,
-                "full_log": error_output
-            }
-            
-    except Exception as e:
+        return job_queue.submit(request.code, request.consolidate, job_id=request.execution_id)
+    except JobQueueFull as e:
+        raise admission.reject_overloaded(str(e), latency=job_queue.latency)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: CodeRequest, http_request: Request):
+    """Queue a .mix execution and return its id for polling"""
+    job = admit_job(http_request, request)
+    return {"id": job.id, "status": job.status, "url": f"/jobs/{job.id}"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, output and result of a queued job"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; its worker is freed right away"""
+    job = get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"id": job.id, "status": job.status}
+
+def _resolve(future):
+    # The request may have been cancelled (client gone) before the job finished
+    if not future.done():
+        future.set_result(None)
+
+@app.post("/execute")
+async def execute_code(request: CodeRequest, http_request: Request):
+    """Execute multi-language code and wait for the result"""
+    from runners.job_queue import COMPLETED, CANCELLED
+    job = admit_job(http_request, request)
+    
+    # The worker resolves a future when the job finishes; no thread waits
+    loop = asyncio.get_running_loop()
+    finished = loop.create_future()
+    job.on_done(lambda: loop.call_soon_threadsafe(_resolve, finished))
+    await finished
+    
+    output = job.output
+    if job.status == COMPLETED:
         return {
-            "success": False,
-            "error": f"Server error: {str(e)}"
-        }
-        
-    finally:
-        # Clean up temp file
-        if 'temp_file' in locals():
-            try:
-                os.unlink(temp_file)
-            except:
-                pass
+            "success": True,
+            "execution_id": job.id,
+            "output": output,
+            "full_log": output
+        }
+    return {
+        "success": False,
+        "execution_id": job.id,
+        "cancelled": job.status == CANCELLED,
+        "error": "Execution cancelled" if job.status == CANCELLED else job.error,
+        "output": output,
+        "full_log": output
+    }
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "version": "1.0.0"}
+    return {
+        "status": "healthy",
+        "version": "1.0.0",
+        "jobs": get_job_queue().stats(),
+        "admission": get_admission().stats()
+    }
+
+_backend_metrics = None
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage latencies, runner processes, queue depth"""
+    from runners.metrics import CONTENT_TYPE, render
+    from runners.job_queue import job_queue_metrics
+    global _backend_metrics
+    if _backend_metrics is None:
+        _backend_metrics = admission_metrics(get_admission) + job_queue_metrics(get_job_queue)
+    return Response(render(_backend_metrics), media_type=CONTENT_TYPE)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,103 @@
+"""
+Websocket output framing for PolyRun
+Coalesces the stdout/stderr chunks produced by runner threads into
+sequence-numbered frames, flushed on a short timer, with a bound on
+unsent output per connection
+"""
+
+import asyncio
+import threading
+
+DEFAULT_STREAMING = {
+    'flush_interval_ms': 50,
+    'max_frame_chars': 16384,
+    'max_pending_chars': 262144,
+}
+
+
+class OutputFrames:
+    """
+    Buffer between runner reader threads and one websocket
+
+    write() is called from reader threads; when max_pending_chars are
+    waiting to be sent it blocks, which in turn stalls the child process
+    on its full pipe, so a chatty block cannot grow server memory. The
+    event loop side runs forward(), which drains the buffer every
+    flush_interval_ms into frames of at most max_frame_chars, merging
+    consecutive writes to the same stream.
+    """
+
+    def __init__(self, config=None):
+        settings = dict(DEFAULT_STREAMING)
+        settings.update((config or {}).get('websocket_streaming', {}))
+        self.flush_interval = settings['flush_interval_ms'] / 1000
+        self.max_frame_chars = settings['max_frame_chars']
+        self.max_pending_chars = settings['max_pending_chars']
+
+        self.seq = 0
+        self.closed = False
+        self._chunks = []
+        self._pending = 0
+        self._condition = threading.Condition()
+
+    def write(self, stream, text):
+        """Queue output from a reader thread, waiting while the buffer is full"""
+        with self._condition:
+            while self._pending >= self.max_pending_chars and not self.closed:
+                self._condition.wait()
+            if self.closed:
+                # Connection gone: let the block run to completion unobserved
+                return
+            if self._chunks and self._chunks[-1][0] == stream:
+                self._chunks[-1][1].append(text)
+            else:
+                self._chunks.append((stream, [text]))
+            self._pending += len(text)
+
+    def drain(self):
+        """Take everything queued as (stream, data) frames"""
+        with self._condition:
+            chunks, self._chunks = self._chunks, []
+            self._pending = 0
+            self._condition.notify_all()
+
+        frames = []
+        for stream, parts in chunks:
+            data = ''.join(parts)
+            for start in range(0, len(data), self.max_frame_chars):
+                frames.append((stream, data[start:start + self.max_frame_chars]))
+        return frames
+
+    def close(self):
+        """Stop accepting output and release any blocked writers"""
+        with self._condition:
+            self.closed = True
+            self._chunks = []
+            self._pending = 0
+            self._condition.notify_all()
+
+    async def forward(self, send, done, block):
+        """
+        Send frames until done is set and the buffer is empty
+
+        Args:
+            send: Coroutine function taking the frame dict
+            done: asyncio.Event set once the block has finished writing
+            block: Block number included in each frame
+        """
+        try:
+            while True:
+                finished = done.is_set()
+                for stream, data in self.drain():
+                    self.seq += 1
+                    await send({"type": "output", "seq": self.seq, "block": block,
+                                "stream": stream, "data": data})
+                if finished:
+                    return
+                try:
+                    await asyncio.wait_for(done.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+        except Exception:
+            self.close()
+            raise